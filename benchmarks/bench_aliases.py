@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+
+"""
+Scalability benchmarks for `fsnav.core.Aliases`
+
+Times construction through each `Aliases.update()` input form, item
+assignment, `copy()`, `user_defined()`, `default()`, lookups, and `repr()` at
+increasing table sizes and measures peak memory with `tracemalloc`.  Results
+are written as JSON and can be compared against a previous run:
+
+    $ python benchmarks/bench_aliases.py --output baseline.json
+    $ python benchmarks/bench_aliases.py --baseline baseline.json
+
+The exit code is non-zero if any benchmark regressed against the baseline or
+if its per-entry cost grows faster than `--max-growth` between the smallest
+and largest size, which usually means something went quadratic or started
+revalidating entries it already validated.
+"""
+
+
+from __future__ import print_function
+
+import json
+import os
+import pickle
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import click
+
+import fsnav
+from fsnav import core
+
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+N_DIRECTORIES = 64
+
+
+def _make_table(size, directories):
+
+    """
+    Build a plain dictionary with `size` aliases pointing at existing
+    directories.
+    """
+
+    return dict(
+        ('alias%07d' % i, directories[i % len(directories)]) for i in range(size))
+
+
+def _benchmarks(table):
+
+    """
+    Get the callables to time for a table.  Each callable is independent so
+    it can be timed and traced separately.
+
+    Returns
+    -------
+    list
+        ``(name, callable)`` tuples.
+    """
+
+    pairs = list(table.items())
+    keys = list(table)
+    aliases = core.Aliases(table)
+    with_defaults = core.Aliases(list(core.DEFAULT_ALIASES.items()) + pairs)
+
+    def setitem():
+        a = core.Aliases()
+        for alias, path in pairs:
+            a[alias] = path
+
+    def lookup():
+        for alias in keys:
+            aliases[alias]
+
+    return [
+        ('construct_kwargs', lambda: core.Aliases(**table)),
+        ('construct_mapping', lambda: core.Aliases(table)),
+        ('construct_pairs', lambda: core.Aliases(pairs)),
+        ('setitem', setitem),
+        ('validate_paths', lambda: core.validate_paths(list(table.values()))),
+        ('copy', aliases.copy),
+        ('user_defined', with_defaults.user_defined),
+        ('default', with_defaults.default),
+        ('lookup', lookup),
+        ('repr', lambda: repr(aliases)),
+        ('pickle', lambda: pickle.loads(pickle.dumps(aliases, pickle.HIGHEST_PROTOCOL))),
+        ('to_from_bytes', lambda: core.Aliases.from_bytes(aliases.to_bytes())),
+    ]
+
+
+def _measure(func, repeat):
+
+    """
+    Time a callable and measure its peak memory usage.
+
+    Returns
+    -------
+    dict
+    """
+
+    seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak}
+
+
+def run(sizes, repeat, directories):
+
+    """
+    Run all benchmarks at every size.
+
+    Returns
+    -------
+    dict
+        ``{benchmark: {size: measurement}}``
+    """
+
+    results = {}
+    for size in sizes:
+        table = _make_table(size, directories)
+        for name, func in _benchmarks(table):
+            measurement = _measure(func, repeat)
+            measurement['per_entry_ns'] = measurement['seconds'] / size * 1e9
+            results.setdefault(name, {})[str(size)] = measurement
+            click.echo("%-20s %9d  %10.4fs  %9.1f ns/entry  %12d bytes" % (
+                name, size, measurement['seconds'], measurement['per_entry_ns'],
+                measurement['peak_bytes']), err=True)
+    return results
+
+
+def find_regressions(results, baseline=None, tolerance=0.25, max_growth=4.0):
+
+    """
+    Compare results against a baseline and check how the per-entry cost of
+    each benchmark grows with the table size.
+
+    Parameters
+    ----------
+    results : dict
+        Output from `run()`.
+    baseline : dict or None, optional
+        Output from a previous `run()`.
+    tolerance : float, optional
+        Allowed relative slowdown per entry compared to the baseline.
+    max_growth : float, optional
+        Allowed ratio between the per-entry cost at the largest and smallest
+        size.  Linear benchmarks stay close to 1.
+
+    Returns
+    -------
+    list
+        Human readable descriptions of each regression.
+    """
+
+    regressions = []
+    for name, by_size in sorted(results.items()):
+
+        sizes = sorted(by_size, key=int)
+        smallest = by_size[sizes[0]]['per_entry_ns']
+        largest = by_size[sizes[-1]]['per_entry_ns']
+        if len(sizes) > 1 and smallest > 0 and largest / smallest > max_growth:
+            regressions.append(
+                "%s: per-entry cost grew %.1fx from %s to %s entries"
+                % (name, largest / smallest, sizes[0], sizes[-1]))
+
+        if baseline is None:
+            continue
+        for size in sizes:
+            try:
+                previous = baseline[name][size]['per_entry_ns']
+            except KeyError:
+                continue
+            current = by_size[size]['per_entry_ns']
+            if current > previous * (1 + tolerance):
+                regressions.append(
+                    "%s: %.1f ns/entry at %s entries, baseline %.1f ns/entry"
+                    % (name, current, size, previous))
+
+    return regressions
+
+
+@click.command()
+@click.option(
+    '--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+    help="Comma separated table sizes"
+)
+@click.option(
+    '--repeat', type=click.INT, default=3, help="Take the best of N runs"
+)
+@click.option(
+    '--output', type=click.Path(), help="Write results to this file instead of stdout"
+)
+@click.option(
+    '--baseline', type=click.File(), help="Compare against results from a previous run"
+)
+@click.option(
+    '--tolerance', type=click.FLOAT, default=0.25,
+    help="Allowed relative slowdown compared to the baseline"
+)
+@click.option(
+    '--max-growth', type=click.FLOAT, default=4.0,
+    help="Allowed growth in per-entry cost between the smallest and largest size"
+)
+def main(sizes, repeat, output, baseline, tolerance, max_growth):
+
+    """
+    Benchmark fsnav.core.Aliases at increasing table sizes.
+    """
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        directories = []
+        for i in range(N_DIRECTORIES):
+            directories.append(os.path.join(tempdir, 'dir%s' % i))
+            os.mkdir(directories[-1])
+        results = run([int(s) for s in sizes.split(',')], repeat, directories)
+    finally:
+        shutil.rmtree(tempdir)
+
+    report = {
+        'meta': {
+            'fsnav': fsnav.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        click.echo(text)
+
+    regressions = find_regressions(
+        results, json.load(baseline)['results'] if baseline else None,
+        tolerance=tolerance, max_growth=max_growth)
+    for line in regressions:
+        click.echo("REGRESSION: %s" % line, err=True)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
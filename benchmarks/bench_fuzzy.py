@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+
+"""
+Fuzzy search benchmarks for `fsnav.fuzzy.FuzzyIndex`
+
+Builds an index of synthetic aliases and paths at increasing sizes and times
+`search()` for queries that match almost everything, a fraction of the
+candidates, and almost nothing, which shows how much work the character
+bitset prefilter saves:
+
+    $ python benchmarks/bench_fuzzy.py --sizes 10000,100000 --output results.json
+"""
+
+
+from __future__ import print_function
+
+import json
+import platform
+import random
+import string
+import time
+import timeit
+
+import click
+
+import fsnav
+from fsnav import fuzzy
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_QUERIES = ('src', 'svcapi', 'qzx', 'zzzzqq')
+
+
+def _make_table(size, seed=0):
+
+    """
+    Build aliases and paths that look like service checkouts.
+    """
+
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+             for _ in range(500)]
+    table = {}
+    for i in range(size):
+        name = '-'.join(rng.sample(words, 2))
+        table['%s-%s' % (name, i)] = '/src/%s/%s/%s' % (
+            rng.choice(words), rng.choice(words), name)
+    return table
+
+
+def run(sizes, queries, repeat, limit):
+
+    """
+    Time index construction and searches at every size.
+
+    Returns
+    -------
+    dict
+        ``{size: {'build': seconds, 'queries': {query: measurement}}}``
+    """
+
+    results = {}
+    for size in sizes:
+        table = _make_table(size)
+        build = min(timeit.repeat(lambda: fuzzy.FuzzyIndex(table), number=1, repeat=repeat))
+        index = fuzzy.FuzzyIndex(table)
+        result = {'build': build, 'queries': {}}
+        for query in queries:
+            seconds = min(timeit.repeat(
+                lambda: index.search(query, limit=limit), number=1, repeat=repeat))
+            matches = len(index.search(query, limit=None))
+            result['queries'][query] = {'seconds': seconds, 'matches': matches}
+            click.echo("%9d  %-10s  %8.4fs  %9d matches" % (size, query, seconds, matches),
+                       err=True)
+        results[str(size)] = result
+    return results
+
+
+@click.command()
+@click.option(
+    '--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+    help="Comma separated numbers of aliases"
+)
+@click.option(
+    '--queries', default=','.join(DEFAULT_QUERIES), help="Comma separated queries"
+)
+@click.option(
+    '--repeat', type=click.INT, default=3, help="Take the best of N runs"
+)
+@click.option(
+    '--limit', type=click.INT, default=fuzzy.DEFAULT_LIMIT, help="Number of matches to rank"
+)
+@click.option(
+    '--output', type=click.Path(), help="Write results to this file instead of stdout"
+)
+def main(sizes, queries, repeat, limit, output):
+
+    """
+    Benchmark fuzzy alias search at increasing table sizes.
+    """
+
+    results = run([int(s) for s in sizes.split(',')], queries.split(','), repeat, limit)
+    report = {
+        'meta': {
+            'fsnav': fsnav.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'limit': limit,
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        click.echo(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+
+"""
+Validation benchmarks against a simulated slow filesystem
+
+Runs `Aliases()` construction, default alias filtering and configfile loading
+through `fsnav.testing.SlowFilesystem()` at several per-call latencies and
+with a fraction of dead paths.  Latency is simulated rather than slept by
+default, so each measurement reports the number of filesystem calls, the time
+they would have taken on a filesystem with that latency, and the CPU time
+spent outside of them:
+
+    $ python benchmarks/bench_slowfs.py --output baseline.json
+    $ python benchmarks/bench_slowfs.py --baseline baseline.json
+
+Use `--sleep` to actually wait for the latency, which is needed to see the
+effect of parallel validation.  The exit code is non-zero if any benchmark
+makes more filesystem calls per alias than the baseline.
+"""
+
+
+from __future__ import print_function
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import click
+
+import fsnav
+from fsnav import core
+from fsnav import resolver
+from fsnav.testing import SlowFilesystem
+
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_LATENCIES = (0.0001, 0.001, 0.01)
+DEAD_PREFIX = 'dead'
+
+
+def _make_table(size, tempdir, dead_fraction):
+
+    """
+    Build a plain dictionary with `size` aliases.  Every path exists on disk
+    but paths for the first `dead_fraction` of aliases are failed by the
+    simulated filesystem.
+    """
+
+    n_dead = int(size * dead_fraction)
+    table = {}
+    for i in range(size):
+        name = '%s%07d' % (DEAD_PREFIX if i < n_dead else 'alias', i)
+        table[name] = os.path.join(tempdir, name)
+        os.mkdir(table[name])
+    return table
+
+
+def _benchmarks(table, tempdir):
+
+    """
+    Get the callables to run against the simulated filesystem.
+
+    Returns
+    -------
+    list
+        ``(name, callable)`` tuples.
+    """
+
+    configfile = os.path.join(tempdir, 'config.json')
+    with open(configfile, 'w') as f:
+        json.dump({core.CONFIGFILE_ALIAS_SECTION: table}, f)
+
+    def construct():
+        aliases = core.Aliases()
+        for alias, path in table.items():
+            try:
+                aliases[alias] = path
+            except ValueError:
+                pass
+
+    return [
+        ('construct', construct),
+        ('default_aliases', lambda: core._existing_aliases(table)),
+        ('load_configfile', lambda: resolver.load_aliases(configfile)),
+    ]
+
+
+def run(sizes, latencies, dead_fraction, sleep):
+
+    """
+    Run all benchmarks at every size and latency.
+
+    Returns
+    -------
+    dict
+        ``{benchmark: {size: {latency: measurement}}}``
+    """
+
+    results = {}
+    for size in sizes:
+        tempdir = tempfile.mkdtemp()
+        try:
+            table = _make_table(size, tempdir, dead_fraction)
+            for name, func in _benchmarks(table, tempdir):
+                for latency in latencies:
+                    fs = SlowFilesystem(latency=latency, sleep=sleep)
+                    fs.add_rule(os.path.join(tempdir, DEAD_PREFIX + '*'), fail=True)
+                    start = time.time()
+                    with fs:
+                        func()
+                    wall = time.time() - start
+                    measurement = {
+                        'calls': len(fs.calls),
+                        'calls_per_entry': len(fs.calls) / float(size),
+                        'simulated_seconds': fs.elapsed,
+                        'wall_seconds': wall,
+                        'max_in_flight': fs.max_in_flight,
+                    }
+                    results.setdefault(name, {}).setdefault(
+                        str(size), {})[str(latency)] = measurement
+                    click.echo("%-16s %7d  %8.4fs/call  %8d calls  %10.3fs simulated  "
+                               "%8.3fs wall" % (name, size, latency, measurement['calls'],
+                                                fs.elapsed, wall), err=True)
+        finally:
+            shutil.rmtree(tempdir)
+    return results
+
+
+def find_regressions(results, baseline):
+
+    """
+    Find benchmarks that make more filesystem calls per alias than the
+    baseline.
+
+    Returns
+    -------
+    list
+        Human readable descriptions of each regression.
+    """
+
+    regressions = []
+    for name, by_size in sorted(results.items()):
+        for size, by_latency in sorted(by_size.items()):
+            for latency, measurement in sorted(by_latency.items()):
+                try:
+                    previous = baseline[name][size][latency]['calls_per_entry']
+                except KeyError:
+                    continue
+                if measurement['calls_per_entry'] > previous:
+                    regressions.append(
+                        "%s: %.2f calls/entry at %s entries and %ss latency, baseline %.2f"
+                        % (name, measurement['calls_per_entry'], size, latency, previous))
+    return regressions
+
+
+@click.command()
+@click.option(
+    '--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+    help="Comma separated table sizes"
+)
+@click.option(
+    '--latencies', default=','.join(str(l) for l in DEFAULT_LATENCIES),
+    help="Comma separated per-call latencies in seconds"
+)
+@click.option(
+    '--dead', 'dead_fraction', type=click.FLOAT, default=0.1,
+    help="Fraction of aliases pointing at paths that fail"
+)
+@click.option(
+    '--sleep', is_flag=True, help="Actually wait for the latency instead of simulating it"
+)
+@click.option(
+    '--output', type=click.Path(), help="Write results to this file instead of stdout"
+)
+@click.option(
+    '--baseline', type=click.File(), help="Compare against results from a previous run"
+)
+def main(sizes, latencies, dead_fraction, sleep, output, baseline):
+
+    """
+    Benchmark alias validation against a simulated slow filesystem.
+    """
+
+    results = run([int(s) for s in sizes.split(',')],
+                  [float(l) for l in latencies.split(',')], dead_fraction, sleep)
+
+    report = {
+        'meta': {
+            'fsnav': fsnav.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'dead_fraction': dead_fraction,
+            'sleep': sleep,
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        click.echo(text)
+
+    regressions = find_regressions(results, json.load(baseline)['results']) if baseline else []
+    for line in regressions:
+        click.echo("REGRESSION: %s" % line, err=True)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
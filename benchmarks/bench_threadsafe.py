@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+
+
+"""
+Read throughput of `fsnav.threadsafe.ConcurrentAliases` across threads
+
+Each reader thread performs a fixed number of lookups while a writer thread
+keeps publishing updates.  The same workload runs against a plain `Aliases()`
+guarded by a lock for comparison:
+
+    $ python benchmarks/bench_threadsafe.py --threads 1,2,4,8 --output results.json
+
+Lookups are pure Python, so on CPython the GIL caps total throughput.  What
+the benchmark shows is that lock-free readers keep their throughput as
+threads and writes are added, while lock-guarded readers contend with each
+other and with the writer.
+"""
+
+
+from __future__ import print_function
+
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import click
+
+import fsnav
+from fsnav import core
+from fsnav.threadsafe import ConcurrentAliases
+
+
+DEFAULT_THREADS = (1, 2, 4, 8)
+N_DIRECTORIES = 64
+
+
+class _LockedAliases(object):
+
+    """
+    Baseline: a regular `Aliases()` with every access guarded by a lock.
+    """
+
+    def __init__(self, table):
+        self._lock = threading.Lock()
+        self._aliases = core.Aliases(table)
+
+    def get(self, alias):
+        with self._lock:
+            return self._aliases.get(alias)
+
+    def update(self, table):
+        with self._lock:
+            self._aliases.update(table)
+
+
+def _stress(aliases, keys, threads, reads, write_interval, updates):
+
+    """
+    Run `threads` readers performing `reads` lookups each while a writer
+    applies `updates` every `write_interval` seconds.
+
+    Returns
+    -------
+    dict
+    """
+
+    start_barrier = threading.Barrier(threads + 2)
+    stop = threading.Event()
+    writes = [0]
+
+    def reader(seed):
+        rng = random.Random(seed)
+        sample = [rng.choice(keys) for _ in range(1000)]
+        start_barrier.wait()
+        for i in range(reads):
+            aliases.get(sample[i % 1000])
+
+    def writer():
+        i = 0
+        start_barrier.wait()
+        while not stop.wait(write_interval):
+            aliases.update(updates[i % len(updates)])
+            writes[0] += 1
+            i += 1
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    for t in readers:
+        t.start()
+    start_barrier.wait()
+    start = time.time()
+    for t in readers:
+        t.join()
+    seconds = time.time() - start
+    stop.set()
+    writer_thread.join()
+
+    return {
+        'seconds': seconds,
+        'reads_per_second': threads * reads / seconds,
+        'writes': writes[0],
+    }
+
+
+def run(threads, size, reads, write_interval, directories):
+
+    """
+    Run the stress test for both implementations at every thread count.
+
+    Returns
+    -------
+    dict
+        ``{implementation: {threads: measurement}}``
+    """
+
+    table = dict(
+        ('alias%07d' % i, directories[i % len(directories)]) for i in range(size))
+    keys = list(table)
+    updates = [{'hot%s' % i: directories[i % len(directories)]} for i in range(8)]
+
+    results = {}
+    for name, factory in (('concurrent', ConcurrentAliases), ('locked', _LockedAliases)):
+        for n in threads:
+            measurement = _stress(factory(table), keys, n, reads, write_interval, updates)
+            results.setdefault(name, {})[str(n)] = measurement
+            click.echo("%-12s %3d threads  %12.0f reads/s  %6d writes" % (
+                name, n, measurement['reads_per_second'], measurement['writes']), err=True)
+    return results
+
+
+@click.command()
+@click.option(
+    '--threads', default=','.join(str(t) for t in DEFAULT_THREADS),
+    help="Comma separated reader thread counts"
+)
+@click.option(
+    '--size', type=click.INT, default=10000, help="Number of aliases"
+)
+@click.option(
+    '--reads', type=click.INT, default=200000, help="Lookups per reader thread"
+)
+@click.option(
+    '--write-interval', type=click.FLOAT, default=0.001,
+    help="Seconds between updates published by the writer thread"
+)
+@click.option(
+    '--output', type=click.Path(), help="Write results to this file instead of stdout"
+)
+def main(threads, size, reads, write_interval, output):
+
+    """
+    Stress ConcurrentAliases with concurrent readers and a writer.
+    """
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        directories = []
+        for i in range(N_DIRECTORIES):
+            directories.append(os.path.join(tempdir, 'dir%s' % i))
+            os.mkdir(directories[-1])
+        results = run([int(t) for t in threads.split(',')], size, reads, write_interval,
+                      directories)
+    finally:
+        shutil.rmtree(tempdir)
+
+    report = {
+        'meta': {
+            'fsnav': fsnav.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'size': size,
+            'reads': reads,
+            'write_interval': write_interval,
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        click.echo(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,9 @@ FS Nav - File System Navigation shortcuts for the commandline
 """
 
 
-from .core import Aliases, CONFIGFILE, DEFAULT_ALIASES
+from .core import Aliases, LayeredAliases, ShardedAliases, CONFIGFILE, DEFAULT_ALIASES
+from .resolver import Resolver, resolve, resolve_many
+from .threadsafe import ConcurrentAliases
 
 
 __version__ = '0.9.2'
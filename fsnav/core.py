@@ -4,14 +4,21 @@ Core functions and classes for FS Nav
 
 
 import getpass
+import json
 import os
 from os.path import expanduser
 from os.path import join
 import re
 import sys
 
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # pragma no cover
+    from collections import MutableMapping
 
-__all__ = ['Aliases', 'CONFIGFILE', 'DEFAULT_ALIASES']
+
+__all__ = ['AliasPattern', 'Aliases', 'LayeredAliases', 'ShardedAliases', 'CONFIGFILE',
+           'DEFAULT_ALIASES']
 
 
 class Aliases(dict):
@@ -89,16 +96,22 @@ class Aliases(dict):
         """
         Enable ``Aliases[alias] = path`` syntax with the necessary validations.
         A valid `alias` does not contain spaces or punctuation and must match
-        the regex defined in `fsnav.ALIAS_REGEX`.  A valid `path` must
-        exist and be executable.  Note that `~/` is expanded but `*` wildcards
-        are not supported.
+        the regex defined in `fsnav.ALIAS_REGEX`, optionally prefixed by a
+        namespace like ``infra:logs``.  A valid `path` must exist and be
+        executable.  Note that `~/` is expanded but `*` wildcards are not
+        supported.
+
+        Pattern aliases like ``svc-{name}`` map every matching alias to a
+        path like ``/srv/services/{name}``.  The path is not validated until
+        a matching alias is looked up.  See `AliasPattern()`.
 
         Raises
         ------
-        ValueError
-            Invalid alias.
         KeyError
-            Invalid path.
+            Invalid alias or pattern alias.
+        ValueError
+            Invalid path, including `None`, or a pattern path without the
+            placeholder.
 
         Returns
         -------
@@ -111,14 +124,18 @@ class Aliases(dict):
         else:
             path = os.path.expanduser(path)
 
+        # Patterns are validated when they are looked up
+        if is_pattern(alias):
+            self._pattern_table()[alias] = AliasPattern(alias, path)
+
         # Validate the alias
-        if re.match(ALIAS_REGEX, alias) is None:
+        elif not validate_alias(alias):
             raise KeyError(
-                "Aliases can only contain alphanumeric characters and '-' or '_': '%s'"
-                % alias)
+                "Aliases can only contain alphanumeric characters and '-' or '_' and "
+                "an optional 'namespace%s' prefix: '%s'" % (NAMESPACE_SEP, alias))
 
         # Validate the path
-        elif not os.path.isdir(path) and not os.access(path, os.X_OK):
+        elif not self._check_path(path):
             raise ValueError("Can't access path: '%s'" % path)
 
         # Alias and path passed validate - add
@@ -128,6 +145,223 @@ class Aliases(dict):
             # validation
             super(Aliases, self).__setitem__(alias, path)
 
+    def _check_path(self, path):
+
+        """
+        Validate a path unless `update()` already did.
+
+        Returns
+        -------
+        bool
+        """
+
+        checked = self.__dict__.get('_checked_paths')
+        if checked is not None and path in checked:
+            return checked[path]
+        return validate_path(path)
+
+    def _update_validated(self, alias_path):
+
+        """
+        Add aliases and paths that have already been validated without
+        validating them again.  Paths must already be expanded.
+
+        Parameters
+        ----------
+        alias_path : dict
+            Validated aliases and paths
+
+        Returns
+        -------
+        None
+        """
+
+        patterns = [a for a in alias_path if is_pattern(a)]
+        if not patterns:
+            dict.update(self, alias_path)
+            return
+        table = self._pattern_table()
+        for alias, path in list(alias_path.items()):
+            if is_pattern(alias):
+                table[alias] = AliasPattern(alias, path)
+            else:
+                dict.__setitem__(self, alias, path)
+
+    def __delitem__(self, alias):
+
+        if is_pattern(alias):
+            del self._pattern_table()[alias]
+        else:
+            super(Aliases, self).__delitem__(alias)
+
+    def __missing__(self, alias):
+
+        """
+        Called by `dict.__getitem__()` for aliases that don't exist.  Tries
+        the pattern aliases.
+        """
+
+        table = self._pattern_table()
+        if alias in table:
+            return table[alias].path
+        path = self.match_pattern(alias)
+        if path is None:
+            raise KeyError(alias)
+        return path
+
+    def __contains__(self, alias):
+
+        """
+        Checks aliases and pattern aliases without validating any paths, so
+        an alias matching a pattern is contained even if its path doesn't
+        exist.
+        """
+
+        if dict.__contains__(self, alias):
+            return True
+        table = self._pattern_table()
+        if alias in table:
+            return True
+        return any(p.match(alias) is not None for p in list(table.values()))
+
+    def get(self, alias, default=None):
+
+        """
+        Overrides dict.get() to also match pattern aliases
+
+        Returns
+        -------
+        str
+        """
+
+        try:
+            return self[alias]
+        except KeyError:
+            return default
+
+    def _pattern_table(self):
+
+        # Instances restored by `_restore()` skip `__init__()`
+        return self.__dict__.setdefault('_patterns', {})
+
+    def patterns(self):
+
+        """
+        Get the pattern aliases and their path templates
+
+        Returns
+        -------
+        dict
+        """
+
+        return dict((a, p.path) for a, p in list(self._pattern_table().items()))
+
+    def match_pattern(self, alias):
+
+        """
+        Expand the most specific pattern alias matching an alias whose path
+        exists.  Only the matching patterns' paths are validated.
+
+        Parameters
+        ----------
+        alias : str
+            Alias to match
+
+        Returns
+        -------
+        str or None
+        """
+
+        patterns = sorted(
+            self._pattern_table().values(), key=lambda p: (-p.specificity, p.alias))
+        for pattern in patterns:
+            path = pattern.match(alias)
+            if path is not None and validate_path(path, lookup=True):
+                return path
+        return None
+
+    def enumerate_patterns(self, prefix=''):
+
+        """
+        List the aliases matching pattern aliases by listing the directories
+        their paths point to.  Only patterns that can produce aliases
+        starting with `prefix` are listed and the paths are not validated.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Only include aliases starting with this prefix.
+
+        Returns
+        -------
+        generator
+            ``(alias, path)`` tuples.
+        """
+
+        for template in sorted(self._pattern_table()):
+            for alias, path in self._pattern_table()[template].enumerate(prefix):
+                if not dict.__contains__(self, alias):
+                    yield alias, path
+
+    def __reduce__(self):
+
+        """
+        Pickle aliases and paths as a plain dictionary.  They were validated
+        when they were added, so unpickling restores them directly instead of
+        validating every entry again, which makes passing an instance to
+        `multiprocessing` workers as cheap as passing a `dict`.
+        """
+
+        return _restore, (self.__class__, dict(self), self.__dict__ or None)
+
+    def to_bytes(self):
+
+        """
+        Serialize aliases and paths into a compact form that can be restored
+        with `from_bytes()` without validating them again.  Paths are sorted
+        and stored as the number of characters shared with the previous path
+        plus the remainder, so aliases under a common directory only store
+        that directory once.
+
+        Returns
+        -------
+        bytes
+        """
+
+        fields = []
+        previous = ''
+        items = list(self.items()) + list(self.patterns().items())
+        for path, alias in sorted((p, a) for a, p in items):
+            shared = _shared_prefix(previous, path)
+            fields.extend((str(shared), alias, path[shared:]))
+            previous = path
+        body = '\0'.join(fields).encode('utf-8', _ENCODING_ERRORS)
+        return _SERIAL_HEADER + str(len(items)).encode('ascii') + b'\0' + body
+
+    @classmethod
+    def from_bytes(cls, data):
+
+        """
+        Restore aliases serialized with `to_bytes()`.  Only use data from a
+        trusted source since aliases and paths are not validated.
+
+        Parameters
+        ----------
+        data : bytes
+            Output from `to_bytes()`
+
+        Raises
+        ------
+        ValueError
+            Data was not produced by `to_bytes()`.
+
+        Returns
+        -------
+        Aliases
+        """
+
+        return _restore(cls, _decode(data))
+
     def as_dict(self):
 
         """
@@ -160,21 +394,32 @@ class Aliases(dict):
     def update(self, alias_iterable=None, **alias_path):
 
         """
-        Overrides dict.update() to force usage of new self.__setitem__()
+        Overrides dict.update() to force usage of new self.__setitem__().
+        Paths are validated together with `validate_paths()`.
 
         Returns
         -------
         None
         """
 
+        items = []
         if alias_iterable and hasattr(alias_iterable, 'keys'):
-            for alias in alias_iterable:
-                self[alias] = alias_iterable[alias]
+            items.extend((alias, alias_iterable[alias]) for alias in alias_iterable)
         elif alias_iterable and not hasattr(alias_iterable, 'keys'):
-            for (alias, path) in alias_iterable:
+            items.extend(alias_iterable)
+        items.extend(alias_path.items())
+
+        # Validate every path at once and then add them one at a time so
+        # aliases are still checked in order
+        paths = set(
+            os.path.expanduser(p) for a, p in items if p is not None and not is_pattern(a))
+        valid = validate_paths(paths)
+        self.__dict__['_checked_paths'] = dict((p, p in valid) for p in paths)
+        try:
+            for alias, path in items:
                 self[alias] = path
-        for alias, path in list(alias_path.items()):
-            self[alias] = path
+        finally:
+            del self.__dict__['_checked_paths']
 
     def copy(self):
 
@@ -186,7 +431,9 @@ class Aliases(dict):
         Aliases
         """
 
-        return Aliases(**self.as_dict())
+        other = Aliases(**self.as_dict())
+        other._update_validated(self.patterns())
+        return other
 
     def user_defined(self):
 
@@ -199,8 +446,12 @@ class Aliases(dict):
             All user-defined aes
         """
 
-        return Aliases({a: p for a, p in list(self.items()) if a not in DEFAULT_ALIASES or
-                        p != DEFAULT_ALIASES[a]})
+        # Entries have already been validated or are trusted
+        user_defined = Aliases()
+        user_defined._update_validated({a: p for a, p in list(self.items()) if a not in
+                                        DEFAULT_ALIASES or p != DEFAULT_ALIASES[a]})
+        user_defined._update_validated(self.patterns())
+        return user_defined
 
     def default(self):
 
@@ -213,13 +464,1167 @@ class Aliases(dict):
             Default aliases
         """
 
-        return Aliases({a: p for a, p in list(self.items()) if a in DEFAULT_ALIASES and
-                        p == DEFAULT_ALIASES[a]})
+        default = Aliases()
+        default._update_validated({a: p for a, p in list(self.items()) if a in DEFAULT_ALIASES and
+                                   p == DEFAULT_ALIASES[a]})
+        return default
+
+
+class ShardedAliases(Aliases):
+
+    def __init__(self, shard_dir, *args, **kwargs):
+
+        """
+        An `Aliases()` instance that also contains namespaced aliases like
+        ``infra:logs``.  Each namespace lives in its own shard file in
+        `shard_dir` and is only read when an alias from that namespace is
+        accessed, so a large number of namespaces does not slow down lookups.
+
+            >>> aliases = ShardedAliases(shard_dir(CONFIGFILE))
+            >>> aliases.namespaces()
+            ['infra', 'web']
+            >>> aliases['infra:logs']
+            '/var/log'
+
+        Shards are JSON encoded just like the configfile and contain aliases
+        without the namespace prefix in a section called
+        `CONFIGFILE_ALIAS_SECTION`.
+
+        Parameters
+        ----------
+        shard_dir : str or None
+            Directory containing ``<namespace>.json`` shard files.  `None`
+            disables shard loading.
+        """
+
+        self.shard_dir = shard_dir
+        self._loaded_namespaces = set()
+        Aliases.__init__(self, *args, **kwargs)
+
+    def __missing__(self, alias):
+
+        """
+        Called by `dict.__getitem__()` for aliases that are not loaded.  Loads
+        the alias's shard and tries again.
+        """
+
+        namespace = split_namespace(alias)[0] if NAMESPACE_SEP in alias else None
+        if namespace is not None and namespace not in self._loaded_namespaces:
+            self.load_namespace(namespace)
+            if dict.__contains__(self, alias):
+                return dict.__getitem__(self, alias)
+        return super(ShardedAliases, self).__missing__(alias)
+
+    def __contains__(self, alias):
+
+        # Loads the alias's shard but doesn't validate any paths
+        if NAMESPACE_SEP in alias:
+            self.load_namespace(split_namespace(alias)[0])
+        return super(ShardedAliases, self).__contains__(alias)
+
+    def __setitem__(self, alias, path):
+
+        # Make sure the rest of the shard is loaded so it isn't lost when
+        # the aliases are written back to the shard
+        if NAMESPACE_SEP in alias:
+            self.load_namespace(split_namespace(alias)[0])
+        super(ShardedAliases, self).__setitem__(alias, path)
+
+    def __delitem__(self, alias):
+
+        if NAMESPACE_SEP in alias:
+            self.load_namespace(split_namespace(alias)[0])
+        super(ShardedAliases, self).__delitem__(alias)
+
+    def copy(self):
+
+        """
+        Creates a copy of `ShardedAliases()` and all loaded aliases and paths
+
+        Returns
+        -------
+        ShardedAliases
+        """
+
+        other = ShardedAliases(self.shard_dir)
+        other._loaded_namespaces.update(self._loaded_namespaces)
+        # Everything in `self` has already been validated or is trusted
+        other._update_validated(self.as_dict())
+        other._update_validated(self.patterns())
+        return other
+
+    @classmethod
+    def from_bytes(cls, data, shard_dir=None):
+
+        """
+        Restore aliases serialized with `to_bytes()`.  Namespaces with
+        aliases in `data` are considered loaded.  See `Aliases.from_bytes()`.
+
+        Parameters
+        ----------
+        data : bytes
+            Output from `to_bytes()`
+        shard_dir : str or None, optional
+            See `ShardedAliases()`.
+
+        Returns
+        -------
+        ShardedAliases
+        """
+
+        aliases = cls(shard_dir)
+        alias_path = _decode(data)
+        aliases._loaded_namespaces.update(
+            split_namespace(a)[0] for a in alias_path if NAMESPACE_SEP in a)
+        aliases._update_validated(alias_path)
+        return aliases
+
+    def namespaces(self):
+
+        """
+        List all namespaces with a shard file without loading them
+
+        Returns
+        -------
+        list
+        """
+
+        if self.shard_dir is None or not os.path.isdir(self.shard_dir):
+            return []
+        return sorted(
+            name[:-len(SHARD_EXT)] for name in os.listdir(self.shard_dir)
+            if name.endswith(SHARD_EXT))
+
+    def loaded_namespaces(self):
+
+        """
+        List the namespaces that have been loaded
+
+        Returns
+        -------
+        list
+        """
+
+        return sorted(self._loaded_namespaces)
+
+    def load_namespace(self, namespace):
+
+        """
+        Load all aliases from a namespace's shard file.  Loading a namespace
+        more than once or a namespace without a shard file does nothing.
+        Like the configfile's aliases, their paths are trusted instead of
+        validated and invalid entries are skipped.
+
+        Parameters
+        ----------
+        namespace : str
+            Namespace to load
+
+        Returns
+        -------
+        None
+        """
+
+        if namespace in self._loaded_namespaces:
+            return
+        self._loaded_namespaces.add(namespace)
+
+        if self.shard_dir is None or re.match(ALIAS_REGEX, namespace) is None:
+            return
+        try:
+            with open(shard_path(self.shard_dir, namespace)) as f:
+                shard = json.load(f)[CONFIGFILE_ALIAS_SECTION]
+        except (IOError, OSError, ValueError, KeyError):
+            return
+        loaded = {}
+        for a, p in list(shard.items()):
+            alias = namespace + NAMESPACE_SEP + a
+            if p is None or not (is_pattern(alias) or validate_alias(alias)):
+                continue
+            loaded[alias] = os.path.expanduser(p)
+        for alias in [a for a in loaded if is_pattern(a)]:
+            try:
+                AliasPattern(alias, loaded[alias])
+            except (KeyError, ValueError):
+                del loaded[alias]
+        self._update_validated(loaded)
+
+    def iter_all(self):
+
+        """
+        Iterate over all aliases and paths, including namespaces that have
+        not been loaded yet.  Shards are loaded one at a time as the iterator
+        reaches them.
+
+        Returns
+        -------
+        generator
+        """
+
+        for a, p in list(self.items()):
+            if NAMESPACE_SEP not in a:
+                yield a, p
+        for namespace in sorted(set(self.namespaces()) | self._loaded_namespaces):
+            self.load_namespace(namespace)
+            prefix = namespace + NAMESPACE_SEP
+            for a, p in sorted(self.items()):
+                if a.startswith(prefix):
+                    yield a, p
+
+
+class LayeredAliases(MutableMapping):
+
+    def __init__(self, default=None, discovered=None, configfile=None, runtime=None):
+
+        """
+        Look aliases up in a stack of layers, like `collections.ChainMap()`,
+        instead of merging them into a single `Aliases()`.  Layers are
+        searched in `LAYERS` order so runtime overrides win over the
+        configfile, which wins over discovered repositories and the defaults.
+
+            >>> aliases = LayeredAliases(
+            ...     default=Aliases(DEFAULT_ALIASES), configfile=ShardedAliases(shard_dir(CONFIGFILE)))
+            >>> aliases['ghub'] = '~/github'
+            >>> aliases.layer_of('ghub')
+            'runtime'
+            >>> aliases.layer_of('home')
+            'default'
+
+        Layers are used as-is and are neither copied nor validated, so
+        building the table does not depend on the size of the lower layers.
+        New aliases are validated and added to the runtime layer.  Deleting
+        an alias removes it from the runtime and configfile layers.
+
+        Parameters
+        ----------
+        default : dict or Aliases or None, optional
+            Default aliases.
+        discovered : dict or Aliases or None, optional
+            Aliases for discovered repositories.
+        configfile : dict or Aliases or ShardedAliases or None, optional
+            Aliases from the configfile.
+        runtime : dict or Aliases or None, optional
+            Aliases added after loading.
+        """
+
+        self._layers = {}
+        for name, layer in zip(LAYERS, (runtime, configfile, discovered, default)):
+            self._layers[name] = Aliases() if layer is None else layer
+
+    def __repr__(self):
+
+        return "%s(%s)" % (self.__class__.__name__, self.as_dict())
+
+    __str__ = __repr__
+
+    def __getitem__(self, alias):
+
+        for name in LAYERS:
+            try:
+                return self._layers[name][alias]
+            except KeyError:
+                pass
+        raise KeyError(alias)
+
+    def __contains__(self, alias):
+
+        return any(alias in self._layers[name] for name in LAYERS)
+
+    def __setitem__(self, alias, path):
+
+        # Make sure the rest of the shard is loaded so it isn't lost when
+        # the aliases are written back to the shard
+        if NAMESPACE_SEP in alias:
+            self.load_namespace(split_namespace(alias)[0])
+        self._layers[LAYER_RUNTIME][alias] = path
+
+    def __delitem__(self, alias):
+
+        if NAMESPACE_SEP in alias:
+            self.load_namespace(split_namespace(alias)[0])
+        found = False
+        for name in WRITABLE_LAYERS:
+            try:
+                del self._layers[name][alias]
+                found = True
+            except KeyError:
+                pass
+        if not found:
+            raise KeyError(alias)
+
+    def __iter__(self):
+
+        seen = set()
+        for name in LAYERS:
+            for alias in self._layers[name]:
+                if alias not in seen:
+                    seen.add(alias)
+                    yield alias
+
+    def __len__(self):
+
+        return len(set().union(*self._layers.values()))
+
+    def layer(self, name):
+
+        """
+        Get one of the `LAYERS`.
+
+        Returns
+        -------
+        dict or Aliases
+        """
+
+        return self._layers[name]
+
+    def layer_of(self, alias):
+
+        """
+        Get the name of the layer an alias is found in.
+
+        Returns
+        -------
+        str or None
+            `None` if the alias does not exist.
+        """
+
+        for name in LAYERS:
+            if alias in self._layers[name]:
+                return name
+        return None
+
+    def _update_validated(self, alias_path):
+
+        """
+        Add already validated aliases and expanded paths to the runtime
+        layer.  See `Aliases._update_validated()`.
+        """
+
+        # Like `__setitem__()`, so the rest of the shard isn't lost when the
+        # aliases are written back to the shard
+        for namespace in set(split_namespace(a)[0] for a in alias_path if NAMESPACE_SEP in a):
+            self.load_namespace(namespace)
+        runtime = self._layers[LAYER_RUNTIME]
+        if isinstance(runtime, Aliases):
+            runtime._update_validated(alias_path)
+        else:
+            runtime.update(alias_path)
+
+    def as_dict(self):
+
+        """
+        Merge all loaded aliases and paths into an actual dictionary
+
+        Returns
+        -------
+        dict
+        """
+
+        merged = {}
+        for name in reversed(LAYERS):
+            merged.update(self._layers[name])
+        return merged
+
+    def copy(self):
+
+        """
+        Create a copy that can be modified without modifying this instance.
+        Only the writable layers are copied and the others are shared.
+
+        Returns
+        -------
+        LayeredAliases
+        """
+
+        layers = dict(self._layers)
+        for name in WRITABLE_LAYERS:
+            layer = layers[name]
+            if isinstance(layer, ShardedAliases):
+                layers[name] = layer.copy()
+            else:
+                layers[name] = Aliases()
+                layers[name]._update_validated(layer)
+                layers[name]._update_validated(_patterns(layer))
+        return self.__class__(**layers)
+
+    def user_defined(self):
+
+        """
+        Extract the aliases from the configfile and runtime layers, excluding
+        any that are identical to a default alias.  The other layers are not
+        read.
+
+        Returns
+        -------
+        Aliases
+        """
+
+        user_defined = Aliases()
+        for name in reversed(WRITABLE_LAYERS):
+            user_defined._update_validated(
+                {a: p for a, p in list(self._layers[name].items()) if a not in
+                 DEFAULT_ALIASES or p != DEFAULT_ALIASES[a]})
+            user_defined._update_validated(_patterns(self._layers[name]))
+        return user_defined
+
+    def default(self):
+
+        """
+        Extract the default aliases that are not overridden by another layer.
+
+        Returns
+        -------
+        Aliases
+        """
+
+        default = Aliases()
+        default._update_validated(
+            {a: p for a, p in list(self._layers[LAYER_DEFAULT].items()) if self.get(a) == p})
+        return default
+
+    def patterns(self):
+
+        """
+        Get the pattern aliases from every layer.  See `Aliases.patterns()`.
+
+        Returns
+        -------
+        dict
+        """
+
+        patterns = {}
+        for name in reversed(LAYERS):
+            patterns.update(_patterns(self._layers[name]))
+        return patterns
+
+    def enumerate_patterns(self, prefix=''):
+
+        """
+        List the aliases matching pattern aliases in every layer.  See
+        `Aliases.enumerate_patterns()`.
+
+        Returns
+        -------
+        generator
+        """
+
+        seen = set()
+        for name in LAYERS:
+            layer = self._layers[name]
+            if isinstance(layer, Aliases):
+                for alias, path in layer.enumerate_patterns(prefix):
+                    if alias not in seen:
+                        seen.add(alias)
+                        yield alias, path
+
+    def _sharded(self):
+
+        return [self._layers[name] for name in LAYERS
+                if isinstance(self._layers[name], ShardedAliases)]
+
+    def namespaces(self):
+
+        """
+        List all namespaces with a shard file in any layer.  See
+        `ShardedAliases.namespaces()`.
+
+        Returns
+        -------
+        list
+        """
+
+        return sorted(set().union(*[layer.namespaces() for layer in self._sharded()]))
+
+    def loaded_namespaces(self):
+
+        """
+        List the namespaces that have been loaded in any layer.
+
+        Returns
+        -------
+        list
+        """
+
+        return sorted(set().union(*[layer.loaded_namespaces() for layer in self._sharded()]))
+
+    def load_namespace(self, namespace):
+
+        """
+        Load a namespace in every layer with shards.  See
+        `ShardedAliases.load_namespace()`.
+
+        Returns
+        -------
+        None
+        """
+
+        for layer in self._sharded():
+            layer.load_namespace(namespace)
+
+    def iter_all(self):
+
+        """
+        Iterate over all aliases and paths, including namespaces that have
+        not been loaded yet.  See `ShardedAliases.iter_all()`.
+
+        Returns
+        -------
+        generator
+        """
+
+        seen = set()
+        for name in LAYERS:
+            layer = self._layers[name]
+            items = layer.iter_all() if isinstance(layer, ShardedAliases) else layer.items()
+            for a, p in items:
+                if a not in seen:
+                    seen.add(a)
+                    yield a, p
+
+
+class AliasPattern(object):
+
+    def __init__(self, alias, path):
+
+        """
+        A pattern alias like ``svc-{name}`` pointing to a path template like
+        ``/srv/services/{name}``, which stands in for one alias per
+        directory without storing or validating any of them.
+
+            >>> pattern = AliasPattern('svc-{name}', '/srv/services/{name}')
+            >>> pattern.match('svc-api')
+            '/srv/services/api'
+            >>> list(pattern.enumerate('svc-a'))
+            [('svc-api', '/srv/services/api'), ('svc-auth', '/srv/services/auth')]
+
+        The alias must contain exactly one placeholder, which matches the
+        same characters as an alias, and the path must contain the same
+        placeholder.
+
+        Parameters
+        ----------
+        alias : str
+            Alias with a placeholder
+        path : str
+            Path template.  Not validated.
+
+        Raises
+        ------
+        KeyError
+            Invalid alias.
+        ValueError
+            The path doesn't contain the alias's placeholder.
+        """
+
+        names = _PLACEHOLDER_RE.findall(alias)
+        prefix, suffix = '', ''
+        if len(names) == 1:
+            prefix, suffix = alias.split('{%s}' % names[0], 1)
+        if len(names) != 1 or '{' in prefix + suffix or '}' in prefix + suffix or \
+                not validate_alias(prefix + 'x' + suffix):
+            raise KeyError("Pattern aliases must be a valid alias containing a single "
+                           "'{name}' placeholder: '%s'" % alias)
+        placeholder = '{%s}' % names[0]
+        path = os.path.expanduser(path)
+        if placeholder not in path:
+            raise ValueError("Path for pattern alias '%s' must contain '%s': '%s'" % (
+                alias, placeholder, path))
+
+        self.alias = alias
+        self.path = path
+        self.placeholder = placeholder
+        self.prefix = prefix
+        self.suffix = suffix
+        self.specificity = len(prefix) + len(suffix)
+        self._regex = re.compile(
+            '^%s(%s)%s$' % (re.escape(prefix), _PLACEHOLDER_VALUE, re.escape(suffix)))
+
+    def __repr__(self):
+
+        return "%s(%r, %r)" % (self.__class__.__name__, self.alias, self.path)
+
+    def match(self, alias):
+
+        """
+        Expand the path for an alias without validating it.
+
+        Returns
+        -------
+        str or None
+            `None` if the alias doesn't match.
+        """
+
+        match = self._regex.match(alias)
+        if match is None:
+            return None
+        return self.expand(match.group(1))
+
+    def expand(self, value):
+
+        """
+        Substitute a value for the placeholder in the path.
+
+        Returns
+        -------
+        str
+        """
+
+        return self.path.replace(self.placeholder, value)
+
+    def enumerate(self, prefix=''):
+
+        """
+        List the directory containing the placeholder's path component to
+        find every alias the pattern currently stands for.  Nothing is
+        listed if no alias could start with `prefix`.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Only include aliases starting with this prefix.
+
+        Returns
+        -------
+        generator
+            ``(alias, path)`` tuples sorted by alias.
+        """
+
+        if not (self.prefix.startswith(prefix) or prefix.startswith(self.prefix)):
+            return
+
+        # Split /srv/app-{name}-prod/current into /srv, app- and -prod
+        before, after = self.path.split(self.placeholder, 1)
+        parent, head = os.path.split(before)
+        tail = after.split(os.sep, 1)[0]
+        for entry in _list_directories(parent or os.curdir):
+            if not (entry.startswith(head) and entry.endswith(tail)):
+                continue
+            value = entry[len(head):len(entry) - len(tail)]
+            alias = self.prefix + value + self.suffix
+            if _PLACEHOLDER_VALUE_RE.match(value) and alias.startswith(prefix):
+                yield alias, self.expand(value)
+
+
+def is_pattern(alias):
+
+    """
+    Check if an alias is a pattern alias like ``svc-{name}``.
+
+    Returns
+    -------
+    bool
+    """
+
+    return '{' in alias
+
+
+def _patterns(layer):
+
+    return layer.patterns() if isinstance(layer, Aliases) else {}
+
+
+def _mtime_ns(st):
+
+    """
+    Get a stat result's modification time in nanoseconds.  Python 2 only
+    has `st_mtime`.
+
+    Returns
+    -------
+    int
+    """
+
+    if hasattr(st, 'st_mtime_ns'):
+        return st.st_mtime_ns
+    return int(st.st_mtime * 1e9)  # pragma no cover
+
+
+def _list_directories(path):
+
+    """
+    List the names of the directories in a directory, sorted.  Uses the file
+    types returned with the listing where possible instead of calling
+    `os.stat()` on every entry.
+
+    Returns
+    -------
+    list
+    """
+
+    try:
+        if not _HAS_SCANDIR:  # pragma no cover
+            return sorted(os.listdir(path))
+        return sorted(entry.name for entry in os.scandir(path) if entry.is_dir())
+    except OSError:
+        return []
+
+
+def _restore(cls, alias_path, state=None):
+
+    """
+    Create an `Aliases()` instance or subclass from already validated aliases
+    and paths.  Used to unpickle.
+
+    Parameters
+    ----------
+    cls : type
+        `Aliases()` or a subclass
+    alias_path : dict
+        Aliases and expanded paths
+    state : dict or None, optional
+        Instance attributes
+
+    Returns
+    -------
+    Aliases
+    """
+
+    aliases = cls.__new__(cls)
+    if state:
+        aliases.__dict__.update(state)
+    aliases._update_validated(alias_path)
+    return aliases
+
+
+def _shared_prefix(s1, s2):
+
+    """
+    Get the length of the common prefix of two strings with a binary search,
+    which is much faster than comparing one character at a time.
+
+    Returns
+    -------
+    int
+    """
+
+    lo, hi = 0, min(len(s1), len(s2))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if s1[:mid] == s2[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _decode(data):
+
+    """
+    Decode the output of `Aliases.to_bytes()`.
+
+    Returns
+    -------
+    dict
+    """
+
+    if not data.startswith(_SERIAL_HEADER):
+        raise ValueError("Not serialized aliases")
+    count, _, body = data[len(_SERIAL_HEADER):].partition(b'\0')
+    count = int(count)
+    if not count:
+        return {}
+
+    fields = body.decode('utf-8', _ENCODING_ERRORS).split('\0')
+    if len(fields) != 3 * count:
+        raise ValueError("Truncated serialized aliases")
+    alias_path = {}
+    path = ''
+    for i in range(0, len(fields), 3):
+        path = path[:int(fields[i])] + fields[i + 2]
+        alias_path[fields[i + 1]] = path
+    return alias_path
+
+
+def validate_alias(alias):
+
+    """
+    Check if an alias is valid.  See `Aliases.__setitem__()`.
+
+    Parameters
+    ----------
+    alias : str
+        Alias with or without a namespace
+
+    Returns
+    -------
+    bool
+    """
+
+    return all(_ALIAS_RE.match(part) is not None for part in split_namespace(alias))
+
+
+def validate_path(path, lookup=False):
+
+    """
+    Check if a path can be assigned to an alias.  See `Aliases.__setitem__()`.
+
+    Paths are only checked if the validation policy for the mount they are on
+    allows it.  See `validation_policy()`.
+
+    Parameters
+    ----------
+    path : str
+        Expanded path
+    lookup : bool, optional
+        The alias is being used rather than loaded, so paths with a
+        `POLICY_LAZY` policy are checked too.
+
+    Returns
+    -------
+    bool
+    """
+
+    if not _needs_check(path, lookup):
+        return True
+    return os.path.isdir(path) or os.access(path, os.X_OK)
+
+
+def validate_paths(paths, lookup=False):
+
+    """
+    Check a batch of paths like `validate_path()` with fewer system calls.
+    Paths are grouped by their parent directory and parents containing at
+    least `BATCH_MIN_PATHS` of them are listed once, so directories are
+    recognized from the listing instead of checking every path.  Paths that
+    are not found as directories in the listing, like executable files or
+    names that differ in case on case-insensitive filesystems, are checked
+    individually.
+
+    Parameters
+    ----------
+    paths : iterable
+        Expanded paths
+    lookup : bool, optional
+        See `validate_path()`.
+
+    Returns
+    -------
+    set
+        Valid paths.
+    """
+
+    # Paths the validation policy doesn't allow checking are trusted
+    groups = {}
+    valid = set()
+    for path in set(paths):
+        if _needs_check(path, lookup):
+            groups.setdefault(os.path.dirname(path.rstrip(os.sep)), []).append(path)
+        else:
+            valid.add(path)
+
+    for parent, members in list(groups.items()):
+        found = set()
+        if _HAS_SCANDIR and len(members) >= BATCH_MIN_PATHS:
+            wanted = dict((os.path.basename(p.rstrip(os.sep)), p) for p in members)
+            try:
+                for entry in os.scandir(parent or os.curdir):
+                    if entry.name in wanted and entry.is_dir():
+                        found.add(wanted[entry.name])
+            except OSError:
+                pass
+        valid.update(found)
+        valid.update(p for p in members if p not in found and validate_path(p, lookup=lookup))
+    return valid
+
+
+def read_mountinfo(path=None):
+
+    """
+    Parse a Linux ``mountinfo`` table.
+
+    Parameters
+    ----------
+    path : str or None, optional
+        Defaults to `MOUNTINFO`.
+
+    Returns
+    -------
+    dict
+        Mount points and their filesystem types.  Empty if the table can't be
+        read, like on platforms other than Linux.
+    """
+
+    try:
+        with open(path or MOUNTINFO) as f:
+            lines = f.read().splitlines()
+    except (IOError, OSError):
+        return {}
+
+    # Fields are documented in proc(5).  Mounts listed later hide earlier
+    # mounts on the same mount point.
+    mounts = {}
+    for line in lines:
+        fields = line.split()
+        try:
+            sep = fields.index('-', 6)
+            mount_point = fields[4]
+            fstype = fields[sep + 1]
+        except (ValueError, IndexError):
+            continue
+        mounts[_MOUNTINFO_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), mount_point)] = fstype
+    return mounts
+
+
+def mount_table():
+
+    """
+    Get the mount table, which is only read once per process.  See
+    `read_mountinfo()`.
+
+    Returns
+    -------
+    dict
+    """
+
+    global _mount_table
+    if _mount_table is None:
+        _mount_table = read_mountinfo()
+    return _mount_table
+
+
+def classify_path(path):
+
+    """
+    Find the mount a path is on without touching the filesystem.  Symlinks
+    are not resolved, so a path is classified by where it appears to be.
+
+    Parameters
+    ----------
+    path : str
+        Expanded path
+
+    Returns
+    -------
+    tuple
+        ``(mount_point, fstype, mount_class)`` where `mount_class` is one of
+        `MOUNT_CLASSES`.  `mount_point` and `fstype` are `None` if the mount
+        table is unavailable.
+    """
+
+    mounts = mount_table()
+    if not mounts:
+        return None, None, MOUNT_LOCAL
+    current = os.path.normpath(os.path.abspath(path))
+    while current not in mounts:
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None, None, MOUNT_LOCAL
+        current = parent
+
+    fstype = mounts[current]
+    if fstype == 'autofs':
+        mount_class = MOUNT_AUTOFS
+    elif fstype in REMOTE_FSTYPES or fstype.split('.', 1)[-1] in REMOTE_FSTYPES:
+        mount_class = MOUNT_REMOTE
+    elif fstype == 'fuse' or fstype.startswith('fuse.') or fstype == 'fuseblk':
+        mount_class = MOUNT_FUSE
+    else:
+        mount_class = MOUNT_LOCAL
+    return current, fstype, mount_class
+
+
+def set_validation_policies(policies=None):
+
+    """
+    Change the validation policies used by `validate_path()`.  Policies not
+    given fall back to `DEFAULT_VALIDATION_POLICIES`.  ``nav`` reads them from
+    the configfile's `CONFIGFILE_VALIDATION_SECTION`:
+
+        {
+            "validation": {
+                "remote": "never",
+                "fuse.sshfs": "lazy",
+                "/mnt/scratch": "eager"
+            }
+        }
+
+    Parameters
+    ----------
+    policies : dict or None, optional
+        Policies keyed by mount point, filesystem type, or one of
+        `MOUNT_CLASSES`, in that order of precedence.  Values are one of
+        `POLICIES`.
+
+    Raises
+    ------
+    ValueError
+        Invalid policy.
+
+    Returns
+    -------
+    None
+    """
+
+    policies = dict(policies or {})
+    for key, policy in list(policies.items()):
+        if policy not in POLICIES:
+            raise ValueError(
+                "Validation policy for '%s' must be one of %s: '%s'"
+                % (key, ', '.join(POLICIES), policy))
+    _validation_policies.clear()
+    _validation_policies.update(DEFAULT_VALIDATION_POLICIES)
+    _validation_policies.update(policies)
+
+
+def validation_policy(path):
+
+    """
+    Get the validation policy for a path from the mount it is on.
+
+    Parameters
+    ----------
+    path : str
+        Expanded path
+
+    Returns
+    -------
+    str
+        `POLICY_EAGER` to check the path whenever it is validated,
+        `POLICY_LAZY` to only check it when the alias is used, or
+        `POLICY_NEVER` to never touch it.
+    """
+
+    mount_point, fstype, mount_class = classify_path(path)
+    for key in (mount_point, fstype, mount_class):
+        if key is not None and key in _validation_policies:
+            return _validation_policies[key]
+    return POLICY_EAGER
+
+
+def _needs_check(path, lookup):
+
+    policy = validation_policy(path)
+    return policy == POLICY_EAGER or (lookup and policy == POLICY_LAZY)
+
+
+def split_namespace(alias):
+
+    """
+    Split a namespaced alias like ``infra:logs`` into its namespace and name
+
+    Parameters
+    ----------
+    alias : str
+        Alias with or without a namespace
+
+    Returns
+    -------
+    tuple
+        ``(namespace, name)`` or ``(name,)`` if there is no namespace.
+    """
+
+    return tuple(alias.split(NAMESPACE_SEP, 1))
+
+
+def normalize_path(path):
+
+    """
+    Normalize a path for prefix comparisons without touching the filesystem.
+    Redundant separators, trailing separators, and ``.`` components are
+    removed.
+
+    Parameters
+    ----------
+    path : str
+        Path to normalize
+
+    Returns
+    -------
+    str
+    """
+
+    return os.path.normpath(path)
+
+
+def shard_dir(configfile):
+
+    """
+    Get the directory containing the namespace shards for a configfile
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + SHARD_DIR_SUFFIX
+
+
+def shard_path(shard_dir, namespace):
+
+    """
+    Get the path to a namespace's shard file
+
+    Parameters
+    ----------
+    shard_dir : str
+        Directory containing the shards
+    namespace : str
+        Namespace
+
+    Returns
+    -------
+    str
+    """
+
+    return join(shard_dir, namespace + SHARD_EXT)
 
 
 ALIAS_REGEX = "^[\w-]+$"
+NAMESPACE_SEP = ':'
+
+# `LayeredAliases()` layers from highest to lowest precedence
+LAYER_RUNTIME = 'runtime'
+LAYER_CONFIGFILE = 'configfile'
+LAYER_DISCOVERED = 'discovered'
+LAYER_DEFAULT = 'default'
+LAYERS = (LAYER_RUNTIME, LAYER_CONFIGFILE, LAYER_DISCOVERED, LAYER_DEFAULT)
+WRITABLE_LAYERS = (LAYER_RUNTIME, LAYER_CONFIGFILE)
 NAV_UTIL = 'nav'
 
+_ALIAS_RE = re.compile(ALIAS_REGEX)
+
+# Placeholders in pattern aliases match the same characters as an alias
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+_PLACEHOLDER_VALUE = r'[\w-]+'
+_PLACEHOLDER_VALUE_RE = re.compile('^%s$' % _PLACEHOLDER_VALUE)
+
+# Python 2 does not have os.scandir()
+_HAS_SCANDIR = hasattr(os, 'scandir')
+
+# Parents with fewer paths to validate are not listed.  See `validate_paths()`.
+BATCH_MIN_PATHS = 3
+
+# Validation policies for paths on different kinds of mounts.  Listing aliases
+# or starting a shell should never wait for a network filesystem or trigger
+# an automount.  See `validation_policy()`.
+MOUNTINFO = '/proc/self/mountinfo'
+MOUNT_LOCAL = 'local'
+MOUNT_REMOTE = 'remote'
+MOUNT_FUSE = 'fuse'
+MOUNT_AUTOFS = 'autofs'
+MOUNT_CLASSES = (MOUNT_LOCAL, MOUNT_REMOTE, MOUNT_FUSE, MOUNT_AUTOFS)
+REMOTE_FSTYPES = frozenset((
+    '9p', 'afs', 'beegfs', 'ceph', 'cifs', 'coda', 'davfs', 'glusterfs', 'gpfs', 'lustre',
+    'ncpfs', 'nfs', 'nfs4', 'smb3', 'smbfs', 'sshfs'))
+POLICY_EAGER = 'eager'
+POLICY_LAZY = 'lazy'
+POLICY_NEVER = 'never'
+POLICIES = (POLICY_EAGER, POLICY_LAZY, POLICY_NEVER)
+DEFAULT_VALIDATION_POLICIES = {
+    MOUNT_LOCAL: POLICY_EAGER,
+    MOUNT_REMOTE: POLICY_LAZY,
+    MOUNT_FUSE: POLICY_LAZY,
+    MOUNT_AUTOFS: POLICY_NEVER,
+}
+_MOUNTINFO_ESCAPE_RE = re.compile(r'\\([0-7]{3})')
+_mount_table = None
+_validation_policies = DEFAULT_VALIDATION_POLICIES.copy()
+
 
 if 'darwin' in sys.platform.lower().strip():  # pragma no cover
     NORMALIZED_PLATFORM = 'mac'
@@ -235,6 +1640,17 @@ else:  # pragma no cover
 
 CONFIGFILE = join(expanduser('~'), '.fsnav')
 CONFIGFILE_ALIAS_SECTION = 'aliases'
+CONFIGFILE_REPO_ROOTS_SECTION = 'repo_roots'
+CONFIGFILE_VALIDATION_SECTION = 'validation'
+SHARD_DIR_SUFFIX = '.d'
+SHARD_EXT = '.json'
+
+# Header for `Aliases.to_bytes()`, including a format version
+_SERIAL_HEADER = b'FSNA\x01'
+# Paths are not guaranteed to be valid UTF-8
+_ENCODING_ERRORS = 'surrogateescape' if sys.version_info[0] >= 3 else 'strict'
+# JSON strings are unicode on Python 2
+_STRING_TYPES = (type(''), type(u''))
 
 
 _homedir = expanduser('~')
@@ -382,10 +1798,29 @@ elif NORMALIZED_PLATFORM == 'win':  # pragma no cover
 else:  # pragma no cover
     _DEFAULT_ALIASES = _UNKNOWN_ALIASES.copy()
 
-# Remove aliases pointing towards non-existent directories
-# Python 2.6 does not support direct dictionary comprehension
-_DEFAULT_ALIASES = dict(
-    (a, p) for a, p in list(_DEFAULT_ALIASES.copy().items())
-    if os.path.isdir(p) and os.access(p, os.X_OK)
-)
+
+def _existing_aliases(aliases):
+
+    """
+    Remove aliases pointing towards non-existent directories.  Directories
+    on mounts that shouldn't be checked when aliases are loaded are kept.
+
+    Parameters
+    ----------
+    aliases : dict
+        Candidate aliases and paths
+
+    Returns
+    -------
+    dict
+    """
+
+    # Python 2.6 does not support direct dictionary comprehension
+    return dict(
+        (a, p) for a, p in list(aliases.items())
+        if not _needs_check(p, False) or (os.path.isdir(p) and os.access(p, os.X_OK))
+    )
+
+
+_DEFAULT_ALIASES = _existing_aliases(_DEFAULT_ALIASES)
 DEFAULT_ALIASES = _DEFAULT_ALIASES.copy()
@@ -0,0 +1,252 @@
+"""
+Discover repository checkouts and generate aliases for them
+
+Directories below a set of roots are listed in parallel and the walk stops at
+any directory containing a ``.git`` or ``.hg`` entry.  The modification time
+and subdirectories of every listed directory are kept in a state file.  A
+rescan still stats every known directory, but it only lists directories whose
+modification time changed.  Adding or removing a checkout changes its parent's
+modification time, so no checkouts are missed.
+"""
+
+
+import json
+import os
+
+from . import core
+from .importers import alias_from_path
+
+# Python 2 does not have concurrent.futures unless the backport is installed
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # pragma no cover
+    ThreadPoolExecutor = None
+
+
+__all__ = ['REPO_MARKERS', 'load_state', 'repo_aliases', 'repos_path', 'save_state', 'scan',
+           'state_path']
+
+
+REPO_MARKERS = ('.git', '.hg')
+DEFAULT_MAX_DEPTH = 4
+DEFAULT_WORKERS = 8
+
+REPOS_SUFFIX = '.repos'
+STATE_SUFFIX = '.repos.state'
+
+
+def repos_path(configfile):
+
+    """
+    Get the path to the file containing discovered aliases for a configfile.
+    It has the same format as the configfile.
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + REPOS_SUFFIX
+
+
+def state_path(configfile):
+
+    """
+    Get the path to the file containing the scan state for a configfile.
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + STATE_SUFFIX
+
+
+def _scan_dir(path, cached):
+
+    """
+    List a directory unless its modification time matches the cached entry.
+
+    Parameters
+    ----------
+    path : str
+        Directory to scan
+    cached : dict or None
+        Entry from a previous scan
+
+    Returns
+    -------
+    tuple
+        ``(entry, listed)`` where `entry` is `None` if the directory no
+        longer exists and `listed` is `True` if the directory was listed.
+    """
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, False
+    mtime = core._mtime_ns(st)
+    if cached is not None and cached['mtime'] == mtime:
+        return cached, False
+
+    repo = False
+    children = []
+    try:
+        if core._HAS_SCANDIR:
+            for entry in os.scandir(path):
+                if entry.name in REPO_MARKERS:
+                    repo = True
+                elif not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                    children.append(entry.name)
+        else:  # pragma no cover
+            for name in os.listdir(path):
+                if name in REPO_MARKERS:
+                    repo = True
+                elif not name.startswith('.'):
+                    child = os.path.join(path, name)
+                    if os.path.isdir(child) and not os.path.islink(child):
+                        children.append(name)
+    except OSError:
+        return None, False
+
+    # Don't walk into repositories
+    if repo:
+        children = []
+    return {'mtime': mtime, 'repo': repo, 'children': sorted(children)}, True
+
+
+def scan(roots, state=None, max_depth=DEFAULT_MAX_DEPTH, workers=DEFAULT_WORKERS):
+
+    """
+    Find repositories below a set of roots.
+
+    Parameters
+    ----------
+    roots : list
+        Directories to search.  `~` is expanded.
+    state : dict or None, optional
+        State returned by a previous scan.  Directories that have not been
+        modified since then are not listed again.
+    max_depth : int, optional
+        Maximum depth below each root to search.
+    workers : int, optional
+        Number of directories to list in parallel.
+
+    Returns
+    -------
+    tuple
+        ``(repos, state, listed)`` where `repos` is a sorted list of
+        repository paths, `state` can be passed to the next scan, and
+        `listed` is the number of directories that had to be listed.
+    """
+
+    previous = (state or {}).get('dirs', {})
+    dirs = {}
+    listed = 0
+
+    frontier = sorted(set(os.path.expanduser(r) for r in roots))
+    depth = 0
+    executor = None if ThreadPoolExecutor is None else ThreadPoolExecutor(max_workers=workers)
+    try:
+        while frontier:
+            mapper = map if executor is None else executor.map
+            results = mapper(lambda p: _scan_dir(p, previous.get(p)), frontier)
+            next_frontier = []
+            for path, (entry, was_listed) in zip(frontier, results):
+                if entry is None:
+                    continue
+                dirs[path] = entry
+                listed += was_listed
+                if depth < max_depth:
+                    next_frontier.extend(os.path.join(path, c) for c in entry['children'])
+            frontier = next_frontier
+            depth += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    repos = sorted(p for p, entry in dirs.items() if entry['repo'])
+    return repos, {'roots': sorted(roots), 'dirs': dirs}, listed
+
+
+def repo_aliases(repos):
+
+    """
+    Generate aliases for repositories from their directory names.  If
+    several repositories have the same name they are prefixed with their
+    parent directory's name, like ``work-fsnav`` and ``personal-fsnav``.
+    Repositories that still collide are skipped.
+
+    Parameters
+    ----------
+    repos : list
+        Repository paths
+
+    Returns
+    -------
+    dict
+    """
+
+    by_name = {}
+    for path in repos:
+        by_name.setdefault(alias_from_path(path), []).append(path)
+
+    aliases = {}
+    collisions = []
+    for name, paths in by_name.items():
+        if name and len(paths) == 1:
+            aliases[name] = paths[0]
+        elif name:
+            collisions.extend(paths)
+
+    prefixed = {}
+    for path in collisions:
+        alias = '%s-%s' % (alias_from_path(os.path.dirname(path)), alias_from_path(path))
+        prefixed.setdefault(alias, []).append(path)
+    for alias, paths in prefixed.items():
+        if len(paths) == 1 and alias not in aliases and core.validate_alias(alias):
+            aliases[alias] = paths[0]
+
+    return aliases
+
+
+def load_state(path):
+
+    """
+    Load the scan state written by `save_state()`.
+
+    Returns
+    -------
+    dict or None
+        `None` if the file doesn't exist or can't be read.
+    """
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def save_state(path, state):
+
+    """
+    Write the scan state returned by `scan()`.
+
+    Returns
+    -------
+    None
+    """
+
+    with open(path, 'w') as f:
+        json.dump(state, f)
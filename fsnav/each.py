@@ -0,0 +1,136 @@
+"""
+Run a command in several aliased directories
+
+Each directory gets its own child process and a bounded number of them run
+at the same time.  Output is passed on line by line as it arrives instead of
+once a child exits, so a slow checkout doesn't hold back the output of the
+others.
+"""
+
+
+import fnmatch
+import os
+import subprocess
+import threading
+import time
+
+# Python 2 does not have concurrent.futures unless the backport is installed
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # pragma no cover
+    ThreadPoolExecutor = None
+
+
+__all__ = ['DEFAULT_WORKERS', 'run', 'select']
+
+
+DEFAULT_WORKERS = 4
+
+
+def select(aliases, names=None, pattern=None):
+
+    """
+    Pick the aliases to run a command in.
+
+    Parameters
+    ----------
+    aliases : iterable
+        ``(alias, path)`` pairs, like `fsnav.core.Aliases.iter_all()`.
+    names : list or None, optional
+        Only select these aliases, in this order.
+    pattern : str or None, optional
+        Only select aliases matching this `fnmatch` pattern, like ``gh*``.
+
+    Raises
+    ------
+    KeyError
+        An alias in `names` is not in `aliases`.
+
+    Returns
+    -------
+    list
+        ``(alias, path)`` pairs.  Aliases pointing to the same directory are
+        only selected once.
+    """
+
+    aliases = dict(aliases)
+    if names:
+        selected = [(a, aliases[a]) for a in names]
+    else:
+        selected = sorted(aliases.items())
+    if pattern is not None:
+        selected = [(a, p) for a, p in selected if fnmatch.fnmatchcase(a, pattern)]
+
+    seen = set()
+    output = []
+    for alias, path in selected:
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            output.append((alias, path))
+    return output
+
+
+def _run_one(alias, path, command, shell, on_line):
+
+    start = time.time()
+    try:
+        with open(os.devnull, 'rb') as devnull:
+            proc = subprocess.Popen(
+                command, cwd=path, shell=shell, stdin=devnull,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError as e:
+        return {'alias': alias, 'path': path, 'returncode': None,
+                'elapsed': time.time() - start, 'error': str(e)}
+    try:
+        for line in iter(proc.stdout.readline, b''):
+            on_line(alias, line.decode('utf-8', 'replace').rstrip('\r\n'))
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    return {'alias': alias, 'path': path, 'returncode': returncode,
+            'elapsed': time.time() - start, 'error': None}
+
+
+def run(targets, command, workers=DEFAULT_WORKERS, shell=False, on_line=None):
+
+    """
+    Run a command in each of a set of directories.
+
+    Parameters
+    ----------
+    targets : list
+        ``(alias, path)`` pairs from `select()`.
+    command : list or str
+        Command and arguments.  A string if `shell` is `True`.
+    workers : int, optional
+        Maximum number of commands running at the same time.  Commands run
+        one at a time without `concurrent.futures`.
+    shell : bool, optional
+        Run `command` with the shell.
+    on_line : callable or None, optional
+        Called as ``on_line(alias, line)`` for every line a command writes to
+        stdout or stderr, without the trailing newline.  Calls are never made
+        concurrently.
+
+    Returns
+    -------
+    list
+        One `dict` per target, in the same order, with the ``alias``,
+        ``path``, ``returncode`` and ``elapsed`` seconds.  ``returncode`` is
+        `None` and ``error`` is set if the command couldn't be started.
+    """
+
+    lock = threading.Lock()
+
+    def _on_line(alias, line):
+        if on_line is not None:
+            with lock:
+                on_line(alias, line)
+
+    if ThreadPoolExecutor is None:  # pragma no cover
+        return [_run_one(a, p, command, shell, _on_line) for a, p in targets]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_run_one, a, p, command, shell, _on_line)
+                   for a, p in targets]
+        return [f.result() for f in futures]
@@ -3,10 +3,57 @@ Commandline function generator tools
 """
 
 
+try:
+    from shlex import quote
+except ImportError:  # pragma no cover
+    from pipes import quote
+
 from . import core
 
 
-def _generate_nix_functions(aliases):
+CD_FUNCTION = '_fsnav_cd'
+DISPATCHER_FUNCTION = 'navcd'
+DISPATCHER_TABLE = '_FSNAV_ALIASES'
+
+
+def _generate_nix_helpers(history=True):
+
+    """
+    Generate the helper functions used by all POSIX shortcuts.  Every
+    shortcut changes directory through a single function that also records
+    the new directory in the navigation history.  Recording happens in a
+    background subshell so the shell never waits for it.  With history
+    enabled ``nav`` is also wrapped so ``nav back``, ``nav forward``, and
+    ``nav go`` change directory.  ``nav go`` output that isn't a directory,
+    like a list of matches, is printed instead.
+
+    Parameters
+    ----------
+    history : bool, optional
+        Record navigation history.
+
+    Returns
+    -------
+    list
+    """
+
+    if not history:
+        return ['function %s() { cd "$1" ; }' % CD_FUNCTION]
+
+    return [
+        'function %s() { cd "$1" && ( command %s history record "$PWD" > /dev/null 2>&1 & ) ; }'
+        % (CD_FUNCTION, core.NAV_UTIL),
+        'function %s() { local _fsnav_dir ; case "$1" in back|forward) '
+        '_fsnav_dir="$(command %s "$@")" && cd "$_fsnav_dir" ;; '
+        'go) _fsnav_dir="$(command %s "$@")" || return ; '
+        'if [ -d "$_fsnav_dir" ] ; then %s "$_fsnav_dir" ; '
+        'else printf \'%%s\\n\' "$_fsnav_dir" ; fi ;; '
+        '*) command %s "$@" ;; esac ; }'
+        % (core.NAV_UTIL, core.NAV_UTIL, core.NAV_UTIL, CD_FUNCTION, core.NAV_UTIL)
+    ]
+
+
+def _generate_nix_functions(aliases, history=True):
 
     """
     Generate commandline shortcuts for POSIX systems
@@ -15,6 +62,8 @@ def _generate_nix_functions(aliases):
     ----------
     aliases : dict or fsnav.core.Aliases
         Dictionary or ``Aliases`` instance from which to generate functions
+    history : bool, optional
+        Record navigation history.
 
     Returns
     -------
@@ -23,11 +72,68 @@ def _generate_nix_functions(aliases):
           shortcuts to specific directories.
     """
 
-    return ['function %s() { cd "$(%s get %s)" ; }'
-            % (alias, core.NAV_UTIL, alias) for alias in aliases]
+    # Only change directory if the lookup printed a path so failed lookups
+    # aren't recorded in the history
+    return _generate_nix_helpers(history=history) + [
+        'function %s() { local _fsnav_dir ; _fsnav_dir="$(%s get %s)" '
+        '&& [ -n "$_fsnav_dir" ] && %s "$_fsnav_dir" ; }'
+        % (alias, core.NAV_UTIL, alias, CD_FUNCTION) for alias in aliases]
+
+
+def _generate_nix_dispatcher(aliases, hot=None, dispatcher=DISPATCHER_FUNCTION, history=True):
+
+    """
+    Generate a single dispatcher function for POSIX systems backed by an
+    associative array mapping aliases to paths.  Evaluating one array
+    assignment is much cheaper for the shell than parsing one function per
+    alias, so this scales better for large alias tables.  Requires bash 4+
+    or zsh 5.5+.
+
+    Aliases that are not in the table, like those added after the shell
+    started, fall back to ``nav get``.
+
+        $ navcd desk
+
+    Parameters
+    ----------
+    aliases : dict or fsnav.core.Aliases
+        Dictionary or ``Aliases`` instance from which to generate the table
+    hot : iterable or None, optional
+        Aliases that should also get a thin wrapper function so they can be
+        called directly, like the functions from ``_generate_nix_functions()``
+    dispatcher : str, optional
+        Name of the dispatcher function
+    history : bool, optional
+        Record navigation history.
+
+    Returns
+    -------
+    list
+        Containing the code necessary to create the helper functions, the
+          table, the dispatcher function, and any wrapper functions.
+    """
+
+    table = ' '.join(
+        '[%s]=%s' % (alias, quote(aliases[alias])) for alias in sorted(aliases))
+    code = _generate_nix_helpers(history=history) + [
+        'typeset -gA %s' % DISPATCHER_TABLE,
+        '%s=(%s)' % (DISPATCHER_TABLE, table),
+        # An empty subscript is an error for associative arrays
+        'function %s() { local _fsnav_dir ; '
+        'if [ -z "$1" ]; then echo "Usage: %s ALIAS" >&2 ; return 2 ; '
+        'elif [ -n "${%s[$1]}" ]; then %s "${%s[$1]}" ; '
+        'else _fsnav_dir="$(%s get "$1")" && [ -n "$_fsnav_dir" ] && %s "$_fsnav_dir" ; '
+        'fi ; }'
+        % (dispatcher, dispatcher, DISPATCHER_TABLE, CD_FUNCTION, DISPATCHER_TABLE,
+           core.NAV_UTIL, CD_FUNCTION)
+    ]
+    for alias in hot or ():
+        code.append('function %s() { %s %s ; }' % (alias, dispatcher, alias))
 
+    return code
 
-def _generate_windows_functions(aliases):
+
+def _generate_windows_functions(aliases, history=True):
 
     """
     **NOT YET IMPLEMENTED**
@@ -38,6 +144,8 @@ def _generate_windows_functions(aliases):
     ----------
     aliases : dict or fsnav.core.Aliases
         Dictionary or ``Aliases`` instance from which to generate functions
+    history : bool, optional
+        Record navigation history.
 
     Returns
     -------
@@ -49,26 +157,67 @@ def _generate_windows_functions(aliases):
     raise NotImplementedError("Windows commandline functions are not currently supported")
 
 
-def _generate_nix_startup_code():
+def _generate_windows_dispatcher(aliases, hot=None, dispatcher=DISPATCHER_FUNCTION,
+                                 history=True):
+
+    """
+    **NOT YET IMPLEMENTED**
+
+    Generate a single dispatcher function for Windows
+
+    Parameters
+    ----------
+    aliases : dict or fsnav.core.Aliases
+        Dictionary or ``Aliases`` instance from which to generate the table
+    hot : iterable or None, optional
+        Aliases that should also get a thin wrapper function
+    dispatcher : str, optional
+        Name of the dispatcher function
+    history : bool, optional
+        Record navigation history.
+
+    Returns
+    -------
+    list
+    """
+
+    raise NotImplementedError("Windows commandline functions are not currently supported")
+
+
+def _generate_nix_startup_code(dispatch=False):
 
     """
     Add the returned code to your bash profile to automatically generate
     commandline shortcuts every time a new session is started.
 
+    Parameters
+    ----------
+    dispatch : bool, optional
+        Generate a single dispatcher function instead of one function per
+        alias.
+
     Returns
     -------
     str or unicode
     """
 
+    if dispatch:
+        return """
+# == Enable FS Nav shortcuts on startup == #
+if [ -x $(which %s) ]; then
+    eval "$(%s startup generate --dispatch)"
+fi
+""" % (core.NAV_UTIL, core.NAV_UTIL)
+
     return """
 # == Enable FS Nav shortcuts on startup == #
 if [ -x $(which %s) ]; then
-    eval $(%s startup generate)
+    eval "$(%s startup generate)"
 fi
 """ % (core.NAV_UTIL, core.NAV_UTIL)
 
 
-def _generate_windows_startup_code():
+def _generate_windows_startup_code(dispatch=False):
 
     """
     **NOT YET IMPLEMENTED**
@@ -76,6 +225,12 @@ def _generate_windows_startup_code():
     Add the returned code to your bash profile to automatically generate
     commandline shortcuts every time a new session is started.
 
+    Parameters
+    ----------
+    dispatch : bool, optional
+        Generate a single dispatcher function instead of one function per
+        alias.
+
     Returns
     -------
     str or unicode
@@ -86,7 +241,11 @@ def _generate_windows_startup_code():
 
 if core.NORMALIZED_PLATFORM in ('mac', 'cygwin', 'linux', 'win', 'UNKNOWN'):
     generate_functions = _generate_nix_functions
+    generate_dispatcher = _generate_nix_dispatcher
     startup_code = _generate_nix_startup_code()
+    dispatch_startup_code = _generate_nix_startup_code(dispatch=True)
 elif core.NORMALIZED_PLATFORM == 'windows':  # pragma no cover
     generate_functions = _generate_windows_functions
+    generate_dispatcher = _generate_windows_dispatcher
     startup_code = _generate_windows_startup_code()
+    dispatch_startup_code = _generate_windows_startup_code(dispatch=True)
@@ -0,0 +1,268 @@
+"""
+Fuzzy matching of aliases and paths for ``nav go``
+
+Queries match any alias or path containing the query's characters in order,
+like fzf.  Matches are scored by how tightly the characters are grouped and
+whether they start words or path segments, so ``fsn`` prefers ``FS-Nav``
+over ``filesystem-notes``.
+
+Every candidate is reduced to a bitset of the characters it contains when the
+index is built.  A candidate can only match if its bitset contains all of the
+query's bits, which rejects most candidates with a single integer operation
+before any scoring happens.
+"""
+
+
+import heapq
+
+
+__all__ = ['FuzzyIndex', 'char_mask', 'score', 'search']
+
+
+SCORE_MATCH = 16
+GAP_START = -3
+GAP_EXTENSION = -1
+
+# Bonuses for matching the character after a word boundary
+BONUS_START = 10
+BONUS_PATH_SEGMENT = 9
+BONUS_BOUNDARY = 8
+BONUS_CAMEL = 7
+BONUS_CONSECUTIVE = -(GAP_START + GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+DEFAULT_LIMIT = 10
+
+# Letters and digits get their own bit in `char_mask()`
+_BITS = dict((c, 1 << i) for i, c in enumerate('abcdefghijklmnopqrstuvwxyz0123456789'))
+_PATH_SEPARATORS = '/\\'
+_DELIMITERS = ' -_.:'
+
+
+def char_mask(text):
+
+    """
+    Get a bitset of the characters in a string, ignoring case.  Letters and
+    digits get their own bit and everything else shares the remaining bits.
+
+    Parameters
+    ----------
+    text : str
+        Text to summarize
+
+    Returns
+    -------
+    int
+    """
+
+    mask = 0
+    for c in set(text.lower()):
+        bit = _BITS.get(c)
+        if bit is None:
+            bit = 1 << (36 + ord(c) % 28)
+        mask |= bit
+    return mask
+
+
+def _lower(text):
+
+    """
+    Lowercase a string one character at a time so every index in the result
+    refers to the same character in `text`, which `str.lower()` doesn't
+    guarantee for characters like 'İ'.
+    """
+
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower()[:1] for c in text)
+
+
+def _bonus(text, idx):
+
+    """
+    Get the bonus for matching the character at `idx` based on the character
+    before it.
+    """
+
+    if idx == 0:
+        return BONUS_START
+    prev = text[idx - 1]
+    if prev in _PATH_SEPARATORS:
+        return BONUS_PATH_SEGMENT
+    if prev in _DELIMITERS:
+        return BONUS_BOUNDARY
+    current = text[idx]
+    if (prev.islower() and current.isupper()) or (prev.isalpha() and current.isdigit()):
+        return BONUS_CAMEL
+    return 0
+
+
+def score(query, text, lowered=None):
+
+    """
+    Score a text against a query.
+
+    The shortest window ending at the first complete match is found with
+    `str.find()` and `str.rfind()` and only characters inside that window are
+    scored.
+
+        >>> score('fsn', 'FS-Nav') > score('fsn', 'filesystem-notes')
+        True
+
+    Parameters
+    ----------
+    query : str
+        Lowercase query.
+    text : str
+        Text to score.
+    lowered : str or None, optional
+        Lowercase `text` if it has already been computed.  Must be the same
+        length as `text` so bonuses are computed for the matched characters.
+
+    Returns
+    -------
+    int or None
+        `None` if `text` doesn't contain the query's characters in order.
+    """
+
+    if not query:
+        return 0
+    if lowered is None or len(lowered) != len(text):
+        lowered = _lower(text)
+
+    # Find where the first complete match ends, then walk backwards to find
+    # the latest start for that end
+    idx = -1
+    for c in query:
+        idx = lowered.find(c, idx + 1)
+        if idx < 0:
+            return None
+    end = idx
+    start = end + 1
+    for c in reversed(query):
+        start = lowered.rfind(c, 0, start)
+
+    total = 0
+    qi = 0
+    consecutive = False
+    in_gap = False
+    first_bonus = 0
+    for i in range(start, end + 1):
+        if qi < len(query) and lowered[i] == query[qi]:
+            bonus = _bonus(text, i)
+            if consecutive:
+                bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+            else:
+                first_bonus = bonus
+            if qi == 0:
+                bonus *= BONUS_FIRST_CHAR_MULTIPLIER
+            total += SCORE_MATCH + bonus
+            qi += 1
+            consecutive = True
+            in_gap = False
+        else:
+            total += GAP_EXTENSION if in_gap else GAP_START
+            consecutive = False
+            in_gap = True
+    return total
+
+
+class FuzzyIndex(object):
+
+    def __init__(self, aliases):
+
+        """
+        Index aliases and their paths for repeated fuzzy searches.
+
+            >>> index = FuzzyIndex(Aliases(ghub='~/github', desk='~/Desktop'))
+            >>> index.search('gh')
+            [(76, 'ghub', '/Users/wursterk/github')]
+
+        Parameters
+        ----------
+        aliases : dict or fsnav.core.Aliases
+            Aliases to index
+        """
+
+        self._candidates = []
+        for alias, path in list(aliases.items()):
+            alias_lower = _lower(alias)
+            path_lower = _lower(path)
+            alias_mask = char_mask(alias_lower)
+            path_mask = char_mask(path_lower)
+            self._candidates.append((
+                alias_mask | path_mask, alias_mask, path_mask,
+                alias, alias_lower, path, path_lower))
+
+    def __len__(self):
+
+        return len(self._candidates)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+
+        """
+        Rank aliases by how well they or their paths match a query.
+
+        Parameters
+        ----------
+        query : str
+            Fuzzy query.  Case is ignored.
+        limit : int or None, optional
+            Maximum number of matches to return.  `None` returns all
+            matches.
+
+        Returns
+        -------
+        list
+            ``(score, alias, path)`` tuples from best to worst.  Ties are
+            broken by the shorter and then alphabetically first alias.
+        """
+
+        query = query.lower()
+        query_mask = char_mask(query)
+
+        matches = []
+        for mask, alias_mask, path_mask, alias, alias_lower, path, path_lower \
+                in self._candidates:
+            if query_mask & ~mask:
+                continue
+            best = None
+            if not query_mask & ~alias_mask:
+                best = score(query, alias, alias_lower)
+            if not query_mask & ~path_mask:
+                path_score = score(query, path, path_lower)
+                if path_score is not None and (best is None or path_score > best):
+                    best = path_score
+            if best is not None:
+                matches.append((best, alias, path))
+
+        def key(match):
+            return -match[0], len(match[1]), match[1]
+
+        if limit is None:
+            return sorted(matches, key=key)
+        return heapq.nsmallest(limit, matches, key=key)
+
+
+def search(aliases, query, limit=DEFAULT_LIMIT):
+
+    """
+    Rank aliases by how well they or their paths match a query without
+    keeping an index around.  See `FuzzyIndex.search()`.
+
+    Parameters
+    ----------
+    aliases : dict or fsnav.core.Aliases
+        Aliases to search
+    query : str
+        Fuzzy query
+    limit : int or None, optional
+        Maximum number of matches to return
+
+    Returns
+    -------
+    list
+    """
+
+    return FuzzyIndex(aliases).search(query, limit=limit)
@@ -0,0 +1,134 @@
+"""
+Incremental revalidation of configfile aliases
+
+Configfile aliases are trusted when they are loaded instead of checking every
+path on every call.  Each call checks a bounded slice of them instead, picking
+up where the previous call left off, so every alias is eventually revisited
+while the filesystem work per call stays the same regardless of how many
+aliases exist.  Aliases whose paths no longer exist are recorded in a state
+file next to the configfile until they are removed with ``nav config prune``.
+"""
+
+
+import bisect
+import json
+import os
+
+from . import core
+
+
+__all__ = ['DEFAULT_BUDGET', 'health_path', 'load_state', 'revalidate', 'save_state']
+
+
+DEFAULT_BUDGET = 16
+HEALTH_SUFFIX = '.health'
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def health_path(configfile):
+
+    """
+    Get the path to the file containing the revalidation state for a
+    configfile.
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + HEALTH_SUFFIX
+
+
+def _empty_state():
+
+    return {'cursor': None, 'dead': {}}
+
+
+def load_state(path):
+
+    """
+    Load the revalidation state written by `save_state()`.
+
+    Returns
+    -------
+    dict
+        An empty state if the file doesn't exist or can't be read.
+    """
+
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (IOError, OSError, ValueError):
+        return _empty_state()
+    if not isinstance(state, dict) or not isinstance(state.get('dead'), dict):
+        return _empty_state()
+    return state
+
+
+def save_state(path, state):
+
+    """
+    Atomically write the revalidation state returned by `revalidate()`.
+
+    Returns
+    -------
+    None
+    """
+
+    tmp = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    _replace(tmp, path)
+
+
+def revalidate(aliases, state=None, budget=DEFAULT_BUDGET):
+
+    """
+    Check the next `budget` aliases in alphabetical order, wrapping around
+    after the last one.
+
+    Parameters
+    ----------
+    aliases : dict
+        Aliases and expanded paths to check.
+    state : dict or None, optional
+        State returned by a previous call.
+    budget : int, optional
+        Maximum number of paths to check.
+
+    Returns
+    -------
+    tuple
+        ``(state, checked)`` where `state` can be passed to the next call
+        and contains the dead aliases and their paths under ``dead``, and
+        `checked` is a list of the aliases that were checked.
+    """
+
+    state = state or _empty_state()
+
+    # Forget about aliases that have been removed or now point elsewhere
+    dead = dict((a, p) for a, p in list(state['dead'].items()) if aliases.get(a) == p)
+
+    names = sorted(aliases)
+    if not names or budget <= 0:
+        return {'cursor': state.get('cursor'), 'dead': dead}, []
+
+    start = 0
+    if state.get('cursor') is not None:
+        start = bisect.bisect_right(names, state['cursor'])
+    checked = [names[(start + i) % len(names)] for i in range(min(budget, len(names)))]
+
+    valid = core.validate_paths(aliases[alias] for alias in checked)
+    for alias in checked:
+        if aliases[alias] in valid:
+            dead.pop(alias, None)
+        else:
+            dead[alias] = aliases[alias]
+
+    return {'cursor': checked[-1], 'dead': dead}, checked
@@ -0,0 +1,228 @@
+"""
+Browser-style navigation history
+
+Every navigation performed through the generated shell functions is recorded
+in a fixed-size ring buffer file.  Each update rewrites only the header and a
+single slot in place, so recording costs the same regardless of how much
+history has accumulated.  Updates are serialized with an exclusive lock so
+several shells can record at the same time.
+
+The layout is:
+
+    header      magic, format version, capacity, absolute index of the
+                oldest and one past the newest entry, and the position of the
+                current entry
+    slots       `capacity` fixed-size records, each a path length followed by
+                the UTF-8 encoded path
+"""
+
+
+import os
+from os.path import expanduser
+from os.path import join
+import struct
+
+try:
+    import fcntl
+except ImportError:  # pragma no cover
+    fcntl = None
+
+from . import core
+
+
+__all__ = ['History', 'HISTORYFILE', 'DEFAULT_CAPACITY']
+
+
+HISTORYFILE = join(expanduser('~'), '.fsnav_history')
+DEFAULT_CAPACITY = 100
+SLOT_SIZE = 1024
+
+_MAGIC = b'FSNH'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHIQQQ')
+_LENGTH = struct.Struct('<H')
+
+
+class History(object):
+
+    def __init__(self, path=HISTORYFILE, capacity=DEFAULT_CAPACITY):
+
+        """
+        Ring buffer containing the most recently visited directories and a
+        cursor pointing at the current directory.  Recording a new directory
+        after going back discards the forward history, just like a browser.
+
+            >>> history = History()
+            >>> history.record('/Users/wursterk/Desktop')
+            >>> history.record('/Users/wursterk/github')
+            >>> history.back()
+            '/Users/wursterk/Desktop'
+            >>> history.forward()
+            '/Users/wursterk/github'
+
+        Parameters
+        ----------
+        path : str, optional
+            History file.  Created if it does not exist.
+        capacity : int, optional
+            Number of entries to keep when creating a new history file.
+            Existing files keep their capacity.
+        """
+
+        self.path = path
+        self.capacity = capacity
+
+    def _open(self):
+
+        """
+        Open and exclusively lock the history file, initializing it if it is
+        empty.
+
+        Returns
+        -------
+        tuple
+            ``(fd, capacity, start, end, position)``
+        """
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            header = os.read(fd, _HEADER.size)
+            if len(header) < _HEADER.size:
+                self._write_header(fd, self.capacity, 0, 0, 0)
+                os.ftruncate(fd, _HEADER.size + self.capacity * SLOT_SIZE)
+                return fd, self.capacity, 0, 0, 0
+            magic, version, _, capacity, start, end, position = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("Not a history file: '%s'" % self.path)
+            return fd, capacity, start, end, position
+        except Exception:
+            os.close(fd)
+            raise
+
+    @staticmethod
+    def _write_header(fd, capacity, start, end, position):
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, _HEADER.pack(_MAGIC, _VERSION, 0, capacity, start, end, position))
+
+    @staticmethod
+    def _read_slot(fd, capacity, idx):
+
+        os.lseek(fd, _HEADER.size + (idx % capacity) * SLOT_SIZE, os.SEEK_SET)
+        slot = os.read(fd, SLOT_SIZE)
+        length = _LENGTH.unpack_from(slot)[0]
+        return slot[_LENGTH.size:_LENGTH.size + length].decode('utf-8', core._ENCODING_ERRORS)
+
+    def record(self, path):
+
+        """
+        Add a directory after the current entry and make it the current
+        entry.  Any forward history is discarded.  Recording the current
+        directory again does nothing.
+
+        Parameters
+        ----------
+        path : str
+            Directory to record
+
+        Raises
+        ------
+        ValueError
+            Path is too long to fit in a slot.
+
+        Returns
+        -------
+        None
+        """
+
+        encoded = path.encode('utf-8', core._ENCODING_ERRORS)
+        if _LENGTH.size + len(encoded) > SLOT_SIZE:
+            raise ValueError("Path is too long to record: '%s'" % path)
+
+        fd, capacity, start, end, position = self._open()
+        try:
+            if position > start and self._read_slot(fd, capacity, position - 1) == path:
+                return
+            os.lseek(fd, _HEADER.size + (position % capacity) * SLOT_SIZE, os.SEEK_SET)
+            os.write(fd, _LENGTH.pack(len(encoded)) + encoded)
+            end = position + 1
+            self._write_header(fd, capacity, max(start, end - capacity), end, end)
+        finally:
+            os.close(fd)
+
+    def _move(self, steps):
+
+        """
+        Move the cursor and return the new current entry.
+
+        Returns
+        -------
+        str or None
+            `None` if the cursor cannot move that far.
+        """
+
+        fd, capacity, start, end, position = self._open()
+        try:
+            new_position = position + steps
+            if new_position <= start or new_position > end:
+                return None
+            self._write_header(fd, capacity, start, end, new_position)
+            return self._read_slot(fd, capacity, new_position - 1)
+        finally:
+            os.close(fd)
+
+    def back(self, steps=1):
+
+        """
+        Move back in the history
+
+        Parameters
+        ----------
+        steps : int, optional
+            Number of entries to move
+
+        Returns
+        -------
+        str or None
+            Directory to navigate to or `None` if there isn't enough history.
+        """
+
+        return self._move(-steps)
+
+    def forward(self, steps=1):
+
+        """
+        Move forward in the history after going back
+
+        Parameters
+        ----------
+        steps : int, optional
+            Number of entries to move
+
+        Returns
+        -------
+        str or None
+            Directory to navigate to or `None` if there isn't enough history.
+        """
+
+        return self._move(steps)
+
+    def entries(self):
+
+        """
+        Get all entries from oldest to newest
+
+        Returns
+        -------
+        list
+            ``(path, is_current)`` tuples.
+        """
+
+        fd, capacity, start, end, position = self._open()
+        try:
+            return [(self._read_slot(fd, capacity, idx), idx == position - 1)
+                    for idx in range(start, end)]
+        finally:
+            os.close(fd)
@@ -0,0 +1,250 @@
+"""
+Import aliases from other navigation tools
+
+Inputs are read one record at a time and validated in batches so large
+inputs never require one `Aliases.__setitem__()` call and configfile write
+per alias.
+"""
+
+
+import csv
+import itertools
+import json
+import os
+import re
+
+from . import core
+
+
+__all__ = ['FORMATS', 'alias_from_path', 'import_aliases', 'read_autojump', 'read_csv',
+           'read_json', 'read_z']
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+_INVALID_ALIAS_CHARS = re.compile(r'[^\w-]+')
+
+
+def alias_from_path(path):
+
+    """
+    Derive an alias from a directory's name for formats that do not include
+    aliases.
+
+        >>> alias_from_path('/Users/wursterk/github/FS Nav')
+        'FS_Nav'
+
+    Parameters
+    ----------
+    path : str
+        Directory path
+
+    Returns
+    -------
+    str
+        Empty if the directory name has no usable characters.
+    """
+
+    name = os.path.basename(os.path.normpath(path))
+    return _INVALID_ALIAS_CHARS.sub('_', name).strip('_')
+
+
+def read_autojump(f):
+
+    """
+    Read an autojump database, where each line is ``weight<TAB>path``.
+
+    Parameters
+    ----------
+    f : file
+        Open file
+
+    Yields
+    ------
+    tuple
+        ``(line_number, alias, path, weight)``
+    """
+
+    for line_number, line in enumerate(f, 1):
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        weight, _, path = line.partition('\t')
+        try:
+            weight = float(weight)
+        except ValueError:
+            yield line_number, None, line, None
+            continue
+        yield line_number, alias_from_path(path), path, weight
+
+
+def read_z(f):
+
+    """
+    Read a z database, where each line is ``path|rank|timestamp``.
+
+    Parameters
+    ----------
+    f : file
+        Open file
+
+    Yields
+    ------
+    tuple
+        ``(line_number, alias, path, weight)``
+    """
+
+    for line_number, line in enumerate(f, 1):
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        path = line.rpartition('|')[0]
+        path, _, rank = path.rpartition('|')
+        try:
+            rank = float(rank)
+        except ValueError:
+            yield line_number, None, line, None
+            continue
+        yield line_number, alias_from_path(path), path, rank
+
+
+def read_csv(f):
+
+    """
+    Read ``alias,path`` rows.  A leading ``alias,path`` header is skipped.
+
+    Parameters
+    ----------
+    f : file
+        Open file
+
+    Yields
+    ------
+    tuple
+        ``(line_number, alias, path, weight)``
+    """
+
+    for line_number, row in enumerate(csv.reader(f), 1):
+        if not row:
+            continue
+        if line_number == 1 and [c.strip().lower() for c in row] == ['alias', 'path']:
+            continue
+        if len(row) != 2:
+            yield line_number, None, ','.join(row), None
+            continue
+        yield line_number, row[0].strip(), row[1].strip(), None
+
+
+def read_json(f):
+
+    """
+    Read a JSON object mapping aliases to paths, like an FS Nav configfile or
+    just the contents of its alias section.
+
+    Parameters
+    ----------
+    f : file
+        Open file
+
+    Yields
+    ------
+    tuple
+        ``(line_number, alias, path, weight)``.  Line numbers are `None`.
+    """
+
+    content = json.load(f)
+    if not isinstance(content, dict):
+        raise ValueError("Expected a JSON object mapping aliases to paths")
+    if isinstance(content.get(core.CONFIGFILE_ALIAS_SECTION), dict):
+        content = content[core.CONFIGFILE_ALIAS_SECTION]
+    for alias, path in list(content.items()):
+        yield None, alias, path, None
+
+
+FORMATS = {
+    'autojump': read_autojump,
+    'csv': read_csv,
+    'json': read_json,
+    'z': read_z
+}
+
+
+def import_aliases(records, existing=(), replace=False, namespace=None,
+                   batch_size=DEFAULT_BATCH_SIZE):
+
+    """
+    Validate records produced by one of the readers in `FORMATS`.
+
+    Records are validated `batch_size` at a time and each distinct path is
+    only checked once.  When several records produce the same alias the one
+    with the highest weight wins, or the last one if the format does not
+    have weights.
+
+    Parameters
+    ----------
+    records : iterable
+        ``(line_number, alias, path, weight)`` tuples.
+    existing : container, optional
+        Aliases that already exist.
+    replace : bool, optional
+        Replace `existing` aliases instead of rejecting them.
+    namespace : str or None, optional
+        Add all aliases to this namespace.
+    batch_size : int, optional
+        Number of records to validate at once.
+
+    Returns
+    -------
+    tuple
+        ``(accepted, rejected)`` where `accepted` is a dictionary of valid
+        aliases and expanded paths that can be passed to
+        `Aliases._update_validated()` and `rejected` is a list of
+        ``(line_number, alias, path, reason)`` tuples.
+    """
+
+    accepted = {}
+    sources = {}
+    rejected = []
+    checked = {}
+    records = iter(records)
+
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            break
+
+        candidates = []
+        for line_number, alias, path, weight in batch:
+            if not alias:
+                rejected.append((line_number, alias, path, "unparseable record"))
+                continue
+            if namespace is not None:
+                alias = namespace + core.NAMESPACE_SEP + alias
+            if not core.validate_alias(alias):
+                rejected.append((line_number, alias, path, "invalid alias"))
+            elif not isinstance(path, core._STRING_TYPES) or not path:
+                rejected.append((line_number, alias, path, "invalid path"))
+            elif not replace and alias in existing:
+                rejected.append((line_number, alias, path, "alias exists"))
+            else:
+                candidates.append((line_number, alias, os.path.expanduser(path), weight))
+
+        unchecked = set(p for _, _, p, _ in candidates if p not in checked)
+        valid = core.validate_paths(unchecked)
+        checked.update((p, p in valid) for p in unchecked)
+
+        for line_number, alias, path, weight in candidates:
+            if not checked[path]:
+                rejected.append((line_number, alias, path, "can't access path"))
+                continue
+            if alias in accepted:
+                previous_line, previous_weight = sources[alias]
+                if weight is not None and previous_weight is not None \
+                        and weight <= previous_weight:
+                    rejected.append((line_number, alias, path, "duplicate alias"))
+                    continue
+                rejected.append((previous_line, alias, accepted[alias], "duplicate alias"))
+            accepted[alias] = path
+            sources[alias] = (line_number, weight)
+
+    return accepted, rejected
@@ -0,0 +1,204 @@
+"""
+IPython and Jupyter extension
+
+Navigating from a notebook with ``!nav get`` starts a shell and a Python
+interpreter per call and can't change the kernel's working directory anyway.
+This extension keeps the aliases loaded in the kernel and changes directory
+in-process:
+
+    In [1]: %load_ext fsnav.ipython
+    In [2]: %nav ghub/FS-Nav
+    /Users/wursterk/github/FS-Nav
+    In [3]: %nav_aliases
+
+The aliases are only loaded again when the configfile, its namespace shards,
+or the discovered repository aliases change.
+"""
+
+
+import os
+import pprint
+
+from . import core
+from . import discover
+from . import history
+from . import resolver
+from . import store
+
+
+__all__ = ['NavSession', 'load_ipython_extension', 'unload_ipython_extension']
+
+
+class NavSession(object):
+
+    def __init__(self, configfile=core.CONFIGFILE, historyfile=history.HISTORYFILE):
+
+        """
+        Aliases loaded like ``nav`` loads them and cached until the
+        configfile changes.
+
+            >>> session = NavSession()
+            >>> session.chdir('ghub/FS-Nav')
+            '/Users/wursterk/github/FS-Nav'
+
+        Parameters
+        ----------
+        configfile : str, optional
+            Path to the configfile
+        historyfile : str or None, optional
+            Record directories changed to in this navigation history file so
+            ``nav back`` works like it does in the shell.  `None` disables
+            recording.
+        """
+
+        self.configfile = configfile
+        self.historyfile = historyfile
+        self.loads = 0
+        self._signature = None
+        self._resolver = None
+
+    def _current_signature(self):
+
+        # Namespace shards can change without the configfile changing, and
+        # adding or removing one changes the list of paths
+        paths = [self.configfile, discover.repos_path(self.configfile)]
+        shard_dir = core.shard_dir(self.configfile)
+        try:
+            names = sorted(os.listdir(shard_dir))
+        except OSError:
+            names = []
+        paths.extend(os.path.join(shard_dir, n) for n in names if n.endswith(core.SHARD_EXT))
+        return tuple((p, store._source_signature(p)) for p in paths)
+
+    @property
+    def aliases(self):
+
+        """
+        The loaded aliases.  Reloaded if the configfile changed since they
+        were loaded.
+
+        Returns
+        -------
+        fsnav.core.LayeredAliases
+        """
+
+        return self._get_resolver().aliases
+
+    def _get_resolver(self):
+
+        signature = self._current_signature()
+        if self._resolver is None or signature != self._signature:
+            self._resolver = resolver.Resolver(resolver.load_aliases(self.configfile))
+            self._signature = signature
+            self.loads += 1
+        return self._resolver
+
+    def resolve(self, expr):
+
+        """
+        Resolve an expression rooted at an alias like ``ghub/FS-Nav``.  See
+        `fsnav.resolver.Resolver()`.
+
+        Raises
+        ------
+        KeyError
+            The expression doesn't start with an alias.
+
+        Returns
+        -------
+        str
+        """
+
+        return self._get_resolver().resolve('@' + expr.lstrip('@'))
+
+    def chdir(self, expr):
+
+        """
+        Change the working directory to an expression rooted at an alias.
+
+        Raises
+        ------
+        KeyError
+            The expression doesn't start with an alias.
+        OSError
+            The directory can't be entered.
+
+        Returns
+        -------
+        str
+            The new working directory.
+        """
+
+        path = self.resolve(expr)
+        os.chdir(path)
+        if self.historyfile is not None:
+            try:
+                history.History(self.historyfile).record(path)
+            except (IOError, OSError, ValueError):
+                pass
+        return path
+
+
+_session = None
+
+
+def _get_session():
+
+    global _session
+    if _session is None:
+        _session = NavSession()
+    return _session
+
+
+def nav(line):
+
+    """
+    Change the working directory to an alias, optionally followed by a
+    relative path like ``ghub/FS-Nav``.
+    """
+
+    from IPython.core.error import UsageError
+
+    expr = line.strip()
+    if not expr:
+        raise UsageError("Usage: %nav alias[/path]")
+    try:
+        path = _get_session().chdir(expr)
+    except KeyError:
+        raise UsageError("Unrecognized alias: '%s'" % expr.lstrip('@').split('/', 1)[0])
+    except OSError as e:
+        raise UsageError("Can't change directory: %s" % e)
+    print(path)
+
+
+def nav_aliases(line):
+
+    """
+    Print recognized aliases, optionally only those starting with a prefix.
+    """
+
+    prefix = line.strip()
+    aliases = dict(
+        (a, p) for a, p in _get_session().aliases.iter_all() if a.startswith(prefix))
+    print(pprint.pformat(aliases))
+
+
+def load_ipython_extension(ipython):
+
+    """
+    Register the ``%nav`` and ``%nav_aliases`` magics.  Called by
+    ``%load_ext fsnav.ipython``.
+    """
+
+    ipython.register_magic_function(nav, 'line', 'nav')
+    ipython.register_magic_function(nav_aliases, 'line', 'nav_aliases')
+
+
+def unload_ipython_extension(ipython):
+
+    """
+    Forget the loaded aliases.  Called by ``%unload_ext fsnav.ipython``.
+    """
+
+    global _session
+    _session = None
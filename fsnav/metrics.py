@@ -0,0 +1,348 @@
+"""
+Opt-in local usage metrics
+
+Counters, per-alias lookup counts and per-command latency histograms are
+accumulated in memory while ``nav`` runs and added to a fixed-size file when
+it exits.  Every value lives at a fixed offset, so an update only touches the
+values that changed and never rewrites the file.  Updates are serialized with
+an exclusive lock so several shells can record at the same time.
+
+The layout is:
+
+    header      magic, format version, number of command slots, and number
+                of alias slots
+    counters    one unsigned 64-bit integer per name in `COUNTERS`
+    commands    fixed-size slots containing a command name, observation
+                count, sum of durations, and one count per bucket in
+                `BUCKETS`
+    aliases     fixed-size slots containing an alias and its lookup count,
+                addressed by hashing the alias
+"""
+
+
+import mmap
+import os
+import struct
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # pragma no cover
+    fcntl = None
+
+
+__all__ = ['BUCKETS', 'COUNTERS', 'Metrics', 'to_prometheus']
+
+
+COUNTERS = ('lookups', 'misses', 'validations', 'cache_hits')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+COMMAND_SLOTS = 32
+ALIAS_SLOTS = 256
+
+_MAGIC = b'FSNM'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHII')
+_COUNTER = struct.Struct('<Q')
+_COMMAND_NAME = 32
+_COMMAND = struct.Struct('<%ssQd%sQ' % (_COMMAND_NAME, len(BUCKETS)))
+_ALIAS_NAME = 64
+_ALIAS = struct.Struct('<%ssQ' % _ALIAS_NAME)
+
+_COUNTERS_OFFSET = _HEADER.size
+
+
+class Metrics(object):
+
+    def __init__(self, path):
+
+        """
+        Accumulate metrics for a single process and add them to a metrics
+        file with `flush()`.
+
+            >>> metrics = Metrics('~/.fsnav_metrics')
+            >>> metrics.increment('lookups')
+            >>> metrics.alias('home')
+            >>> metrics.observe('get', 0.012)
+            >>> metrics.flush()
+            >>> metrics.read()['counters']['lookups']
+            1
+
+        Parameters
+        ----------
+        path : str
+            Metrics file.  Created if it does not exist.
+        """
+
+        self.path = path
+        self._counters = {}
+        self._aliases = {}
+        self._observations = []
+
+    def increment(self, counter, n=1):
+
+        """
+        Increment one of the `COUNTERS`
+
+        Returns
+        -------
+        None
+        """
+
+        if counter not in COUNTERS:
+            raise ValueError("Unknown counter: '%s'" % counter)
+        self._counters[counter] = self._counters.get(counter, 0) + n
+
+    def alias(self, alias):
+
+        """
+        Count a lookup of an alias that resolved
+
+        Returns
+        -------
+        None
+        """
+
+        self._aliases[alias] = self._aliases.get(alias, 0) + 1
+
+    def observe(self, command, seconds):
+
+        """
+        Record how long a command took
+
+        Returns
+        -------
+        None
+        """
+
+        self._observations.append((command, seconds))
+
+    def _open(self):
+
+        """
+        Open, exclusively lock and map the metrics file, initializing it if
+        it is empty.
+
+        Raises
+        ------
+        ValueError
+            The file isn't a metrics file or is truncated.
+
+        Returns
+        -------
+        tuple
+            ``(fd, mmap, n_commands, n_aliases)``
+        """
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            header = os.read(fd, _HEADER.size)
+            if len(header) < _HEADER.size:
+                n_commands, n_aliases = COMMAND_SLOTS, ALIAS_SLOTS
+                os.ftruncate(fd, _size(n_commands, n_aliases))
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, _HEADER.pack(_MAGIC, _VERSION, 0, n_commands, n_aliases))
+            else:
+                magic, version, _, n_commands, n_aliases = _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError("Not a metrics file: '%s'" % self.path)
+                # Truncated files can't be mapped
+                if os.fstat(fd).st_size < _size(n_commands, n_aliases):
+                    raise ValueError("Corrupt metrics file: '%s'" % self.path)
+            return fd, mmap.mmap(fd, _size(n_commands, n_aliases)), n_commands, n_aliases
+        except Exception:
+            os.close(fd)
+            raise
+
+    def flush(self):
+
+        """
+        Add everything accumulated since the last flush to the metrics file.
+
+        Returns
+        -------
+        None
+        """
+
+        if not (self._counters or self._aliases or self._observations):
+            return
+
+        fd, buf, n_commands, n_aliases = self._open()
+        try:
+            for counter, n in list(self._counters.items()):
+                offset = _COUNTERS_OFFSET + COUNTERS.index(counter) * _COUNTER.size
+                _COUNTER.pack_into(buf, offset, _COUNTER.unpack_from(buf, offset)[0] + n)
+
+            commands_offset = _COUNTERS_OFFSET + len(COUNTERS) * _COUNTER.size
+            for command, seconds in self._observations:
+                offset = _find_slot(buf, commands_offset, _COMMAND.size, n_commands,
+                                    _COMMAND_NAME, command.encode('utf-8'))
+                if offset is None:
+                    continue
+                values = list(_COMMAND.unpack_from(buf, offset))
+                values[0] = command.encode('utf-8')
+                values[1] += 1
+                values[2] += seconds
+                for idx, bound in enumerate(BUCKETS):
+                    if seconds <= bound:
+                        values[3 + idx] += 1
+                        break
+                _COMMAND.pack_into(buf, offset, *values)
+
+            aliases_offset = commands_offset + n_commands * _COMMAND.size
+            for alias, n in list(self._aliases.items()):
+                offset = _find_slot(buf, aliases_offset, _ALIAS.size, n_aliases,
+                                    _ALIAS_NAME, alias.encode('utf-8'))
+                if offset is None:
+                    continue
+                _, count = _ALIAS.unpack_from(buf, offset)
+                _ALIAS.pack_into(buf, offset, alias.encode('utf-8'), count + n)
+        finally:
+            buf.close()
+            os.close(fd)
+
+        self._counters = {}
+        self._aliases = {}
+        self._observations = []
+
+    def read(self):
+
+        """
+        Read the metrics file.  Metrics that have not been flushed are not
+        included.
+
+        Returns
+        -------
+        dict
+            ``{'counters': {name: count}, 'commands': {command: {'count': int,
+            'sum': float, 'buckets': [int, ...]}}, 'aliases': {alias: count}}``
+            where bucket counts are not cumulative.
+        """
+
+        fd, buf, n_commands, n_aliases = self._open()
+        try:
+            counters = {}
+            for idx, counter in enumerate(COUNTERS):
+                counters[counter] = _COUNTER.unpack_from(
+                    buf, _COUNTERS_OFFSET + idx * _COUNTER.size)[0]
+
+            commands = {}
+            offset = _COUNTERS_OFFSET + len(COUNTERS) * _COUNTER.size
+            for _ in range(n_commands):
+                values = _COMMAND.unpack_from(buf, offset)
+                offset += _COMMAND.size
+                if values[1]:
+                    commands[_decode_name(values[0])] = {
+                        'count': values[1], 'sum': values[2], 'buckets': list(values[3:])}
+
+            aliases = {}
+            for _ in range(n_aliases):
+                name, count = _ALIAS.unpack_from(buf, offset)
+                offset += _ALIAS.size
+                if count:
+                    aliases[_decode_name(name)] = count
+        finally:
+            buf.close()
+            os.close(fd)
+
+        return {'counters': counters, 'commands': commands, 'aliases': aliases}
+
+
+def _size(n_commands, n_aliases):
+
+    return (_COUNTERS_OFFSET + len(COUNTERS) * _COUNTER.size + n_commands * _COMMAND.size +
+            n_aliases * _ALIAS.size)
+
+
+def _decode_name(name):
+
+    return name.rstrip(b'\0').decode('utf-8')
+
+
+def _find_slot(buf, table_offset, slot_size, n_slots, width, name):
+
+    """
+    Find the slot for a name with linear probing, starting at a slot chosen
+    by hashing the name.
+
+    Returns
+    -------
+    int or None
+        Offset of the slot containing `name` or of the first empty slot.
+        `None` if the name is too long or the table is full.
+    """
+
+    if len(name) > width:
+        return None
+    padded = name.ljust(width, b'\0')
+    start = zlib.crc32(name) % n_slots
+    for i in range(n_slots):
+        offset = table_offset + ((start + i) % n_slots) * slot_size
+        slot = buf[offset:offset + width]
+        if slot == padded or slot == b'\0' * width:
+            return offset
+    return None
+
+
+def _escape(value):
+
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound):
+
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def to_prometheus(data, prefix='fsnav'):
+
+    """
+    Format metrics returned by `Metrics.read()` for the Prometheus text
+    exposition format, as read by the node exporter's textfile collector.
+
+    Parameters
+    ----------
+    data : dict
+        Output from `Metrics.read()`.
+    prefix : str, optional
+        Prefix for every metric name.
+
+    Returns
+    -------
+    str
+    """
+
+    lines = []
+    descriptions = {
+        'lookups': "Alias lookups.",
+        'misses': "Lookups of aliases that don't exist.",
+        'validations': "Paths checked on the filesystem.",
+        'cache_hits': "Lookups answered from the binary store.",
+    }
+    for counter in COUNTERS:
+        name = '%s_%s_total' % (prefix, counter)
+        lines.append('# HELP %s %s' % (name, descriptions[counter]))
+        lines.append('# TYPE %s counter' % name)
+        lines.append('%s %s' % (name, data['counters'].get(counter, 0)))
+
+    name = '%s_alias_lookups_total' % prefix
+    lines.append('# HELP %s Lookups per alias.' % name)
+    lines.append('# TYPE %s counter' % name)
+    for alias, count in sorted(data['aliases'].items()):
+        lines.append('%s{alias="%s"} %s' % (name, _escape(alias), count))
+
+    name = '%s_command_duration_seconds' % prefix
+    lines.append('# HELP %s Time taken by nav subcommands.' % name)
+    lines.append('# TYPE %s histogram' % name)
+    for command, values in sorted(data['commands'].items()):
+        label = _escape(command)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, values['buckets']):
+            cumulative += count
+            lines.append('%s_bucket{command="%s",le="%s"} %s' % (
+                name, label, _format_bound(bound), cumulative))
+        lines.append('%s_sum{command="%s"} %s' % (name, label, repr(values['sum'])))
+        lines.append('%s_count{command="%s"} %s' % (name, label, values['count']))
+
+    return '\n'.join(lines) + '\n'
@@ -3,15 +3,28 @@ FS-Nav commandline utility
 """
 
 
+import itertools
 import json
 import os
 import pprint
+import sys
+import time
 
 import click
 
 import fsnav
 import fsnav.core
+import fsnav.discover
+import fsnav.each
 import fsnav.fg_tools
+import fsnav.fuzzy
+import fsnav.health
+import fsnav.history
+import fsnav.importers
+import fsnav.metrics
+import fsnav.prompt
+import fsnav.snapshot
+import fsnav.store
 
 
 def _cb_key_val(ctx, param, value):
@@ -44,6 +57,427 @@ def _cb_key_val(ctx, param, value):
         raise click.BadParameter('Invalid syntax for `key=val` pair.')
 
 
+def _open_store(configfile):
+
+    """
+    Open the binary store generated from a configfile if it exists and is
+    still in sync with the configfile.
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile.
+
+    Returns
+    -------
+    fsnav.store.AliasStore or None
+    """
+
+    try:
+        store = fsnav.store.AliasStore(fsnav.store.store_path(configfile))
+    except (IOError, OSError, ValueError):
+        return None
+    if not store.is_fresh(configfile):
+        store.close()
+        return None
+    return store
+
+
+def _count(ctx, counter, n=1):
+
+    """
+    Increment a metrics counter if metrics are enabled.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        Context from the invoked subcommand.
+    counter : str
+        One of `fsnav.metrics.COUNTERS`.
+    n : int, optional
+        Amount to increment by.
+
+    Returns
+    -------
+    None
+    """
+
+    if ctx.obj['metrics'] is not None:
+        ctx.obj['metrics'].increment(counter, n)
+
+
+def _flush_metrics(ctx, start):
+
+    """
+    Record how long the invoked subcommand took and write all metrics
+    collected during this call.  Metrics are best effort and never cause
+    ``nav`` to fail.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        Context from `main()`.
+    start : float
+        Time `main()` was invoked.
+
+    Returns
+    -------
+    None
+    """
+
+    metrics = ctx.obj['metrics']
+    metrics.observe(ctx.obj['command'] or 'nav', time.time() - start)
+    try:
+        metrics.flush()
+    except (IOError, OSError, ValueError):
+        pass
+
+
+def _store_aliases(cfg_content):
+
+    """
+    Get the configfile aliases that belong in the binary store.  Paths are
+    trusted like any other configfile alias.
+
+    Parameters
+    ----------
+    cfg_content : dict or None
+        Parsed configfile.
+
+    Returns
+    -------
+    dict
+    """
+
+    aliases_ = fsnav.Aliases()
+    if cfg_content is not None:
+        aliases_._update_validated(dict(
+            (a, os.path.expanduser(p)) for a, p in
+            list(cfg_content.get(fsnav.core.CONFIGFILE_ALIAS_SECTION, {}).items())
+            if p is not None and not fsnav.core.is_pattern(a) and fsnav.core.validate_alias(a)))
+    return aliases_.user_defined().as_dict()
+
+
+def _write_configfile(ctx, aliases_=None):
+
+    """
+    Write user-defined aliases to the configfile and the shards of any loaded
+    namespaces, and regenerate the binary store if one is in use.  Shards
+    left without any aliases are removed.  Every change to the configfile
+    goes through here so the store stays in sync.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        Context from the invoked subcommand.
+    aliases_ : fsnav.LayeredAliases or None, optional
+        Aliases to write.  Only the user-defined aliases are written.  `None`
+        keeps the configfile's aliases and only writes the other sections
+        of ``ctx.obj['cfg_content']``.
+
+    Returns
+    -------
+    None
+    """
+
+    if aliases_ is None:
+        cfg_content = dict(ctx.obj['cfg_content'] or {fsnav.core.CONFIGFILE_ALIAS_SECTION: {}})
+        with open(ctx.obj['cfg_path'], 'w') as f:
+            json.dump(cfg_content, f)
+        ctx.obj['cfg_content'] = cfg_content
+        store = fsnav.store.store_path(ctx.obj['cfg_path'])
+        if os.path.exists(store):
+            fsnav.store.write_store(
+                store, _store_aliases(cfg_content), configfile=ctx.obj['cfg_path'])
+        return
+
+    # Namespaced aliases are written to their shard instead of the configfile
+    user_defined = {}
+    shards = {ns: {} for ns in aliases_.loaded_namespaces()}
+    user_defined_aliases = aliases_.user_defined()
+    for a, p in list(user_defined_aliases.items()) + list(user_defined_aliases.patterns().items()):
+        if fsnav.core.NAMESPACE_SEP in a:
+            namespace, name = fsnav.core.split_namespace(a)
+            shards.setdefault(namespace, {})[name] = p
+        else:
+            user_defined[a] = p
+
+    # Preserve any other configfile sections
+    cfg_content = dict(ctx.obj['cfg_content'] or {})
+    cfg_content[fsnav.core.CONFIGFILE_ALIAS_SECTION] = user_defined
+    with open(ctx.obj['cfg_path'], 'w') as f:
+        json.dump(cfg_content, f)
+    ctx.obj['cfg_content'] = cfg_content
+
+    shard_dir = fsnav.core.shard_dir(ctx.obj['cfg_path'])
+    for namespace, shard in list(shards.items()):
+        shard_path = fsnav.core.shard_path(shard_dir, namespace)
+        if shard:
+            if not os.path.isdir(shard_dir):
+                os.makedirs(shard_dir)
+            with open(shard_path, 'w') as f:
+                json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: shard}, f)
+        elif os.path.exists(shard_path):
+            os.remove(shard_path)
+
+    store = fsnav.store.store_path(ctx.obj['cfg_path'])
+    if os.path.exists(store):
+        fsnav.store.write_store(
+            store, {a: p for a, p in list(user_defined.items()) if not fsnav.core.is_pattern(a)},
+            configfile=ctx.obj['cfg_path'])
+
+
+# What a subcommand needs from the configfile and aliases.  See `_needs()`.
+NEEDS_NOTHING = 'nothing'
+NEEDS_DEFAULTS = 'defaults'
+NEEDS_CONFIGFILE = 'configfile'
+NEEDS_ALL = 'all'
+
+
+def _needs(level, store=False, snapshot=False, validate=True):
+
+    """
+    Declare which aliases a subcommand needs.  `_LazyContext()` only loads
+    what the invoked subcommand declared, and only when it is first
+    accessed.  Subcommands without a declaration get everything.
+
+    Parameters
+    ----------
+    level : str
+        `NEEDS_NOTHING`, `NEEDS_DEFAULTS` for only the default aliases,
+        `NEEDS_CONFIGFILE` for only the configfile's aliases, or `NEEDS_ALL`
+        for the default, discovered repository, and configfile aliases.
+    store : bool, optional
+        The subcommand can be answered from the binary store, in which case
+        the configfile is not parsed if the store is fresh.
+    snapshot : bool, optional
+        The subcommand can be answered from a possibly stale snapshot of the
+        validated aliases with ``nav --serve-stale``.
+    validate : bool, optional
+        A few configfile aliases are revalidated while loading them.  Turn this off for
+        subcommands that run on every prompt or keystroke.
+
+    Returns
+    -------
+    callable
+        Decorator for a `click.Command()`.
+    """
+
+    def decorator(command):
+        command.fsnav_needs = (level, store, snapshot, validate)
+        return command
+
+    return decorator
+
+
+class _LazyContext(dict):
+
+    def __init__(self, ctx, revalidate, *args, **kwargs):
+
+        """
+        The ``ctx.obj`` dictionary shared by all subcommands.  The configfile
+        content, binary store, and aliases are loaded the first time a
+        subcommand accesses them, according to what the subcommand declared
+        with `_needs()`, so commands like ``nav config path`` do no work.
+
+        Parameters
+        ----------
+        ctx : click.Context
+            Context from `main()`.
+        revalidate : int
+            Number of configfile aliases to revalidate when they are loaded.
+        """
+
+        dict.__init__(self, *args, **kwargs)
+        self._ctx = ctx
+        self._revalidate = revalidate
+
+    def __missing__(self, key):
+
+        loader = getattr(self, '_load_' + key, None)
+        if loader is None:
+            raise KeyError(key)
+        self[key] = loader()
+        return dict.__getitem__(self, key)
+
+    @staticmethod
+    def _requirements():
+
+        """
+        Get the `_needs()` declaration of the innermost invoked subcommand.
+
+        Returns
+        -------
+        tuple
+            ``(level, store, snapshot, validate)``
+        """
+
+        current = click.get_current_context(silent=True)
+        command = None if current is None else current.command
+        return getattr(command, 'fsnav_needs', (NEEDS_ALL, False, False, True))
+
+    def _load_store(self):
+
+        # Store hits skip parsing the configfile.  Default aliases are still
+        # loaded as a fallback.
+        if self['no_load_configfile'] or not self._requirements()[1] or \
+                self['snapshot'] is not None:
+            return None
+        store = _open_store(self['cfg_path'])
+        if store is not None:
+            self._ctx.call_on_close(store.close)
+        return store
+
+    def _load_cfg_content(self):
+
+        # MAY NEED TO ADD A MORE VERBOSE WARNING HERE
+        # Try-except handles configfiles that are completely empty
+        content = None
+        try:
+            if os.access(self['cfg_path'], os.R_OK):
+                with open(self['cfg_path']) as f:
+                    content = json.loads(f.read())
+        except ValueError:
+            pass
+
+        # Applies to every path validated from now on
+        try:
+            fsnav.core.set_validation_policies(
+                (content or {}).get(fsnav.core.CONFIGFILE_VALIDATION_SECTION))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        return content
+
+    def _load_repo_aliases(self):
+
+        # Like the configfile's aliases, paths are trusted instead of checking
+        # every repository on every call.  Lookups still validate the path and
+        # rescanning drops repositories that have been deleted.
+        if self['no_load_configfile'] or self._requirements()[0] != NEEDS_ALL:
+            return {}
+        try:
+            with open(fsnav.discover.repos_path(self['cfg_path'])) as f:
+                discovered = json.load(f)[fsnav.core.CONFIGFILE_ALIAS_SECTION]
+        except (IOError, OSError, ValueError, KeyError):
+            discovered = {}
+        repo_aliases = fsnav.Aliases()
+        repo_aliases._update_validated(dict(
+            (a, p) for a, p in list(discovered.items()) if p and fsnav.core.validate_alias(a)))
+        return repo_aliases.as_dict()
+
+    def _load_dead_aliases(self):
+
+        # Set while loading the configfile's aliases
+        self['loaded_aliases']
+        return dict.get(self, 'dead_aliases', {})
+
+    def _load_cfg_patterns(self):
+
+        # Pattern aliases aren't in the store, so lookups the store can't
+        # answer try the configfile's patterns
+        patterns = fsnav.Aliases()
+        if self['cfg_content'] is not None:
+            for a, p in list(self['cfg_content'][fsnav.core.CONFIGFILE_ALIAS_SECTION].items()):
+                if fsnav.core.is_pattern(a):
+                    patterns[a] = p
+        return patterns
+
+    def _load_snapshot(self):
+
+        """
+        Load the snapshot of validated aliases for ``nav --serve-stale`` and
+        start refreshing it in the background if it is getting old.
+
+        Returns
+        -------
+        fsnav.ShardedAliases or None
+            `None` if the snapshot can't be used and the aliases must be
+            loaded and validated normally.
+        """
+
+        if not self['serve_stale'] or self['no_load_configfile'] or \
+                not self._requirements()[2]:
+            return None
+
+        flags = fsnav.snapshot.FLAG_NO_LOAD_DEFAULT if self['no_load_default'] else 0
+        loaded = fsnav.snapshot.load_snapshot(
+            fsnav.snapshot.snapshot_path(self['cfg_path']), self['cfg_path'], flags=flags)
+        age = None if loaded is None else time.time() - loaded[0]
+        if age is None or age > min(fsnav.snapshot.REFRESH_INTERVAL, self['max_staleness']):
+            args = [sys.executable, '-m', 'fsnav.nav', '--configfile', self['cfg_path'],
+                    '--revalidate', str(self._revalidate)]
+            if self['no_load_default']:
+                args.append('--no-load-default')
+            fsnav.snapshot.spawn_refresh(
+                args + ['config', 'snapshot'], fsnav.snapshot.lock_path(self['cfg_path']))
+        if age is None or age > self['max_staleness']:
+            return None
+        return loaded[1]
+
+    def _load_loaded_aliases(self):
+
+        # The snapshot's aliases have already been validated
+        if self['snapshot'] is not None:
+            return fsnav.LayeredAliases(configfile=self['snapshot'])
+
+        # Each source is kept in its own layer instead of being merged
+        level, store = self._requirements()[:2]
+        no_load_configfile = self['no_load_configfile'] or level in (
+            NEEDS_NOTHING, NEEDS_DEFAULTS)
+
+        # Default aliases were validated when fsnav.core was imported and the
+        # layer is never written to, so it doesn't need to be copied
+        default = {}
+        if not self['no_load_default'] and level in (NEEDS_DEFAULTS, NEEDS_ALL):
+            default = fsnav.core.DEFAULT_ALIASES
+        discovered = fsnav.Aliases()
+        discovered._update_validated(self['repo_aliases'])
+        configfile = fsnav.ShardedAliases(
+            None if no_load_configfile else fsnav.core.shard_dir(self['cfg_path']))
+
+        # The configfile isn't needed if the store can answer
+        if store and self['store'] is not None:
+            no_load_configfile = True
+        if not no_load_configfile and self['cfg_content'] is not None:
+            self._load_configfile_aliases(configfile)
+
+        return fsnav.LayeredAliases(default=default, discovered=discovered, configfile=configfile)
+
+    def _load_configfile_aliases(self, configfile):
+
+        """
+        Add the configfile's aliases to its layer.  Their paths are trusted and
+        revalidated a few at a time instead of checking all of them on every
+        call, except by subcommands declared with ``_needs(validate=False)``.
+        """
+
+        cfg_aliases = {}
+        for a, p in list(self['cfg_content'][fsnav.core.CONFIGFILE_ALIAS_SECTION].items()):
+            if fsnav.core.is_pattern(a):
+                # Validated when they are looked up instead
+                configfile[a] = p
+                continue
+            if p is None or not fsnav.core.validate_alias(a):
+                # Raises the same errors as any other invalid alias
+                configfile[a] = p
+            cfg_aliases[a] = os.path.expanduser(p)
+        configfile._update_validated(cfg_aliases)
+        if not self._requirements()[3]:
+            return
+
+        health_path = fsnav.health.health_path(self['cfg_path'])
+        previous = fsnav.health.load_state(health_path)
+        state, checked = fsnav.health.revalidate(cfg_aliases, previous, budget=self._revalidate)
+        # Nothing to write if every alias fits in one slice and none changed
+        if checked and state != previous:
+            try:
+                fsnav.health.save_state(health_path, state)
+            except (IOError, OSError):
+                pass
+        self['dead_aliases'] = state['dead']
+        _count(self._ctx, 'validations', len(checked))
+
+
 @click.group()
 @click.version_option(version=fsnav.__version__)
 @click.option(
@@ -59,53 +493,327 @@ def _cb_key_val(ctx, param, value):
 @click.option(
     '--no-load-configfile', is_flag=True, help="Don't load the configfile"
 )
+@click.option(
+    '--historyfile', type=click.Path(), default=fsnav.history.HISTORYFILE,
+    help="Specify navigation history file"
+)
+@click.option(
+    '--revalidate', type=click.INT, default=fsnav.health.DEFAULT_BUDGET,
+    help="Number of configfile aliases to revalidate per call"
+)
+@click.option(
+    '--metricsfile', type=click.Path(), envvar='FSNAV_METRICS_FILE',
+    help="Record usage metrics in this file.  Disabled by default"
+)
+@click.option(
+    '--serve-stale', is_flag=True, envvar='FSNAV_SERVE_STALE',
+    help="Answer get and startup generate from the last validated aliases and "
+         "revalidate in the background"
+)
+@click.option(
+    '--max-staleness', type=click.INT, default=fsnav.snapshot.DEFAULT_MAX_STALENESS,
+    envvar='FSNAV_MAX_STALENESS',
+    help="Validate before answering if the last validated aliases are older than this "
+         "many seconds"
+)
 @click.pass_context
-def main(ctx, configfile, no_load_default, no_load_configfile, no_pretty):
+def main(ctx, configfile, no_load_default, no_load_configfile, no_pretty, historyfile,
+         revalidate, metricsfile, serve_stale, max_staleness):
 
     """
     FS Nav commandline utility.
     """
 
-    # Store variables needed elsewhere
-    ctx.obj = {
+    start = time.time()
+
+    # Everything else is loaded on first access by the invoked subcommand
+    ctx.obj = _LazyContext(ctx, revalidate, {
         'no_load_default': no_load_default,
         'no_load_configfile': no_load_configfile,
         'cfg_path': configfile,
-        'loaded_aliases': fsnav.Aliases({}),
-        'cfg_content': None,
-        'no_pretty': no_pretty
-    }
-
-    # MAY NEED TO ADD A MORE VERBOSE WARNING HERE
-    # Cache all the configfile content
-    # Try-except handles configfiles that are completely empty
-    try:
-        if os.access(configfile, os.R_OK):
-            with open(configfile) as f:
-                ctx.obj['cfg_content'] = json.loads(f.read())
-    except ValueError:
-        pass
+        'history_path': historyfile,
+        'metrics': None if metricsfile is None else fsnav.metrics.Metrics(metricsfile),
+        'command': ctx.invoked_subcommand,
+        'no_pretty': no_pretty,
+        'serve_stale': serve_stale,
+        'max_staleness': max_staleness
+    })
+    if ctx.obj['metrics'] is not None:
+        ctx.call_on_close(lambda: _flush_metrics(ctx, start))
+
+
+def _lookup(ctx, alias):
+
+    """
+    Get the path for an alias from the store or the loaded aliases.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        Context from the invoked subcommand.
+    alias : str
+        Alias to look up.
+
+    Raises
+    ------
+    click.ClickException
+        The alias doesn't exist or its path no longer exists.
+
+    Returns
+    -------
+    str
+    """
+
+    _count(ctx, 'lookups')
+
+    store = ctx.obj['store']
+    if store is not None and alias in store:
+        path_ = store[alias]
+        _count(ctx, 'cache_hits')
+    else:
+        try:
+            path_ = ctx.obj['loaded_aliases'][alias]
+        except KeyError:
+            path_ = None if store is None else ctx.obj['cfg_patterns'].get(alias)
+            if path_ is None:
+                _count(ctx, 'misses')
+                raise click.ClickException("Unrecognized alias: '%s'" % alias)
+
+    # Configfile aliases are not validated when they are loaded, but the
+    # snapshot's aliases were validated by the process that wrote it
+    if ctx.obj['snapshot'] is None:
+        _validate_lookup(ctx, alias, path_)
+
+    # Only aliases that resolved are counted so unknown aliases can't use
+    # up the fixed number of slots
+    if ctx.obj['metrics'] is not None:
+        ctx.obj['metrics'].alias(alias)
+    return path_
+
+
+def _validate_lookup(ctx, alias, path_):
+
+    """
+    Validate the path an alias was looked up to.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        Context from the invoked subcommand.
+    alias : str
+        Alias that was looked up.
+    path_ : str
+        The alias's path.
+
+    Raises
+    ------
+    click.ClickException
+        The path no longer exists.
+
+    Returns
+    -------
+    None
+    """
+
+    # Answering from the store skips the configfile, but its validation
+    # policies are needed before touching a path that may be on a slow mount
+    if fsnav.core.classify_path(path_)[2] != fsnav.core.MOUNT_LOCAL:
+        ctx.obj['cfg_content']
+    _count(ctx, 'validations')
+    if not fsnav.core.validate_path(path_, lookup=True):
+        raise click.ClickException(
+            "Alias '%s' points to a path that no longer exists: %s\n"
+            "Run `nav config prune` to remove it." % (alias, path_))
+
+
+def _read_records(stream, sep):
+
+    """
+    Read `sep` delimited records from a stream as they arrive.
+
+    Parameters
+    ----------
+    stream : file
+        Text stream to read.  NUL separated records are read from its
+        binary buffer.
+    sep : str
+        Record separator.  A trailing separator is optional.
+
+    Yields
+    ------
+    str
+    """
+
+    if sep == '\n':
+        for line in stream:
+            yield line.rstrip('\r\n')
+        return
+
+    # Reading a text stream blocks until the whole chunk arrives, so read
+    # whatever bytes are available and decode complete records.  Multibyte
+    # characters never contain the separator.
+    buffer = getattr(stream, 'buffer', stream)
+    read = getattr(buffer, 'read1', buffer.read)
+    if not hasattr(buffer, 'read1'):
+        # Python 2's stdin doesn't have a buffer
+        try:
+            fd = buffer.fileno()
+        except (AttributeError, IOError, OSError, ValueError):
+            fd = None
+        if fd is not None:
+            def read(size):
+                return os.read(fd, size)
+    bsep = sep.encode('utf-8')
 
-    # Load the default and configfile aliases according to the above settings
-    if not no_load_default:
-        for a, p in list(fsnav.core.DEFAULT_ALIASES.items()):
-            ctx.obj['loaded_aliases'][a] = p
-    if ctx.obj['cfg_content'] is not None and not \
-            no_load_configfile and os.access(configfile, os.R_OK):
-        for a, p in list(ctx.obj['cfg_content'][fsnav.core.CONFIGFILE_ALIAS_SECTION].items()):
-            ctx.obj['loaded_aliases'][a] = p
+    pending = b''
+    while True:
+        chunk = read(4096)
+        if not chunk:
+            break
+        records = (pending + chunk).split(bsep)
+        pending = records.pop()
+        for record in records:
+            yield record.decode('utf-8', fsnav.core._ENCODING_ERRORS)
+    if pending:
+        yield pending.decode('utf-8', fsnav.core._ENCODING_ERRORS)
 
 
+@_needs(NEEDS_ALL, store=True, snapshot=True)
 @main.command()
-@click.argument('alias', required=True)
+@click.argument('alias', nargs=-1)
+@click.option(
+    '--stdin', 'from_stdin', is_flag=True,
+    help="Also read aliases from stdin, one per line"
+)
+@click.option(
+    '-0', '--null', is_flag=True,
+    help="Separate aliases read from stdin and printed paths with NUL instead of newlines"
+)
 @click.pass_context
-def get(ctx, alias):
+def get(ctx, alias, from_stdin, null):
 
     """
     Print out the path assigned to an alias.
+
+    Several aliases can be given at once and --stdin reads more aliases from
+    stdin, so scripts can resolve a whole batch with one call.  One path is
+    printed per alias as soon as it is resolved.  Aliases that can't be
+    resolved print an empty record and an error on stderr, and the exit code
+    is non-zero if any failed.
+    """
+
+    if not alias and not from_stdin:
+        raise click.UsageError("Missing argument 'ALIAS...'")
+
+    # Keep the original error handling for a single alias
+    if len(alias) == 1 and not from_stdin:
+        path_ = _lookup(ctx, alias[0])
+        click.echo(path_ + '\0' if null else path_, nl=not null)
+        return
+
+    sep = '\0' if null else '\n'
+    records = alias
+    if from_stdin:
+        records = itertools.chain(alias, _read_records(sys.stdin, sep))
+
+    stdout = sys.stdout
+    failed = 0
+    for a in records:
+        try:
+            path_ = _lookup(ctx, a)
+        except click.ClickException as e:
+            click.echo('Error: %s' % e.format_message(), err=True)
+            path_ = ''
+            failed += 1
+        stdout.write(path_ + sep)
+        if from_stdin:
+            stdout.flush()
+
+    if failed:
+        ctx.exit(1)
+
+
+@_needs(NEEDS_ALL, store=True, validate=False)
+@main.command()
+@click.argument('path', required=False)
+@click.pass_context
+def prompt(ctx, path):
+
+    """
+    Print a path shortened to @alias/rest.
+
+    Uses the alias with the longest path containing PATH, which defaults to
+    the current directory.  Meant to be called from PS1, so no paths are
+    checked.  Only the configfile and discovered repositories are read, or
+    the store if one exists.
+    """
+
+    if path is None:
+        path = os.environ.get('PWD') or os.getcwd()
+
+    _count(ctx, 'lookups')
+    store = ctx.obj['store']
+    loaded_aliases = ctx.obj['loaded_aliases']
+    if store is not None:
+        loaded_aliases = {a: p for a, p in list(loaded_aliases.items()) if a not in store}
+
+    # Aliases from the store override loaded aliases unless a loaded alias
+    # is more specific
+    match = fsnav.prompt.PathIndex(loaded_aliases).longest_prefix(path)
+    if store is not None:
+        store_match = store.longest_prefix(path)
+        if store_match is not None and (match is None or len(store_match[1]) <= len(match[1])):
+            match = store_match
+            _count(ctx, 'cache_hits')
+    if match is None:
+        _count(ctx, 'misses')
+
+    click.echo(path if match is None else fsnav.prompt.format_prompt(*match))
+
+
+@main.command()
+@click.argument('query', required=True)
+@click.option(
+    '-k', '--top', type=click.INT,
+    help="Print the best K matches as alias<TAB>path instead of navigating"
+)
+@click.option(
+    '--scores', is_flag=True, help="With --top, also print each match's score"
+)
+@click.pass_context
+def go(ctx, query, top, scores):
+
     """
+    Print the path of the alias best matching QUERY.
+
+    Aliases and their paths are matched fuzzily, so QUERY only needs to
+    contain some of their characters in order.  Matches at the start of words
+    and path segments rank higher.  The shell functions from
+    `nav startup generate` wrap `nav go` so it changes directory.
+    """
+
+    _count(ctx, 'lookups')
+    index = fsnav.fuzzy.FuzzyIndex(dict(ctx.obj['loaded_aliases'].iter_all()))
 
-    click.echo(ctx.obj['loaded_aliases'][alias])
+    if top is not None:
+        for score, alias, path_ in index.search(query, limit=top):
+            if scores:
+                click.echo('%s\t%s\t%s' % (score, alias, path_))
+            else:
+                click.echo('%s\t%s' % (alias, path_))
+        return
+
+    # Configfile aliases are not validated when they are loaded, so skip
+    # matches that no longer exist
+    for _, alias, path_ in index.search(query):
+        _count(ctx, 'validations')
+        if fsnav.core.validate_path(path_, lookup=True):
+            if ctx.obj['metrics'] is not None:
+                ctx.obj['metrics'].alias(alias)
+            click.echo(path_)
+            return
+    _count(ctx, 'misses')
+    raise click.ClickException("No alias matches '%s'" % query)
 
 
 @main.command()
@@ -116,7 +824,8 @@ def aliases(ctx):
     Print recognized aliases.
     """
 
-    aliases_ = {str(a): str(p) for a, p in list(ctx.obj['loaded_aliases'].as_dict().items())}
+    aliases_ = {str(a): str(p) for a, p in ctx.obj['loaded_aliases'].iter_all()}
+    aliases_.update(ctx.obj['loaded_aliases'].patterns())
     if ctx.obj['no_pretty']:
         text = json.dumps(aliases_)
     else:
@@ -124,47 +833,290 @@ def aliases(ctx):
     click.echo(text)
 
 
+@_needs(NEEDS_ALL, validate=False)
+@main.command()
+@click.argument('prefix', default='')
+@click.pass_context
+def complete(ctx, prefix):
+
+    """
+    Print aliases starting with PREFIX for shell completion.
+
+    Pattern aliases are expanded by listing the directories they point to,
+    and only for patterns that can match PREFIX.
+    """
+
+    loaded_aliases = ctx.obj['loaded_aliases']
+    names = set(a for a, _ in loaded_aliases.iter_all() if a.startswith(prefix))
+    names.update(a for a, _ in loaded_aliases.enumerate_patterns(prefix))
+    for name in sorted(names):
+        click.echo(name)
+
+
+@main.command()
+@click.argument('command', nargs=-1, required=True)
+@click.option(
+    '-a', '--alias', 'alias_names', metavar='A,B',
+    help="Comma separated aliases to run COMMAND in"
+)
+@click.option(
+    '-m', '--match', metavar='PATTERN', help="Only aliases matching a glob like 'gh*'"
+)
+@click.option(
+    '-j', '--jobs', type=click.INT, default=fsnav.each.DEFAULT_WORKERS, show_default=True,
+    help="Maximum number of commands running at the same time"
+)
+@click.option(
+    '--shell', is_flag=True, help="Run COMMAND with the shell"
+)
+@click.pass_context
+def each(ctx, command, alias_names, match, jobs, shell):
+
+    """
+    Run COMMAND in every aliased directory.
+
+    Separate COMMAND from nav's options with --, like
+    `nav each --match 'gh*' -- git pull`.  Aliases must be selected with
+    --alias or --match, and default aliases like `home` are only selected if
+    they are named with --alias.  Output is prefixed with the alias it came
+    from and printed as it arrives.  The exit code and time taken in
+    each directory are printed to stderr once every command has finished,
+    and nav exits with 1 if any of them failed.
+    """
+
+    if not alias_names and match is None:
+        raise click.UsageError("Select aliases with --alias or --match")
+    names = None
+    if alias_names:
+        names = [a.strip() for a in alias_names.split(',') if a.strip()]
+
+    # Never run a command in directories like / or ~ by accident
+    loaded_aliases = ctx.obj['loaded_aliases']
+    candidates = [
+        (a, p) for a, p in loaded_aliases.iter_all()
+        if (names and a in names) or loaded_aliases.layer_of(a) != fsnav.core.LAYER_DEFAULT]
+    try:
+        targets = fsnav.each.select(candidates, names=names, pattern=match)
+    except KeyError as e:
+        raise click.ClickException("Unrecognized alias: '%s'" % e.args[0])
+    if not targets:
+        raise click.ClickException("No aliases selected")
+
+    width = max(len(a) for a, _ in targets)
+
+    def _on_line(alias, line):
+        click.echo('%s | %s' % (alias.ljust(width), line))
+
+    results = fsnav.each.run(
+        targets, ' '.join(command) if shell else list(command), workers=jobs, shell=shell,
+        on_line=_on_line)
+
+    failed = False
+    for result in results:
+        if result['error'] is not None:
+            status = 'error: %s' % result['error']
+        else:
+            status = 'exit %s' % result['returncode']
+        failed = failed or result['returncode'] != 0
+        click.echo('%s  %.2fs  %s' % (
+            result['alias'].ljust(width), result['elapsed'], status), err=True)
+    if failed:
+        ctx.exit(1)
+
+
+@_needs(NEEDS_NOTHING)
+@main.command()
+@click.option(
+    '-n', '--steps', type=click.INT, default=1, help="Number of entries to move"
+)
+@click.pass_context
+def back(ctx, steps):
+
+    """
+    Move back in the navigation history.
+
+    Prints the directory to navigate to.  The shell functions from
+    `nav startup generate` wrap `nav back` so it changes directory.
+    """
+
+    path_ = fsnav.history.History(ctx.obj['history_path']).back(steps)
+    if path_ is None:
+        raise click.ClickException("No history to go back to")
+    click.echo(path_)
+
+
+@_needs(NEEDS_NOTHING)
+@main.command()
+@click.option(
+    '-n', '--steps', type=click.INT, default=1, help="Number of entries to move"
+)
+@click.pass_context
+def forward(ctx, steps):
+
+    """
+    Move forward in the navigation history.
+
+    Prints the directory to navigate to.  The shell functions from
+    `nav startup generate` wrap `nav forward` so it changes directory.
+    """
+
+    path_ = fsnav.history.History(ctx.obj['history_path']).forward(steps)
+    if path_ is None:
+        raise click.ClickException("No history to go forward to")
+    click.echo(path_)
+
+
+@_needs(NEEDS_NOTHING)
+@main.group(invoke_without_command=True)
+@click.pass_context
+def history(ctx):
+
+    """
+    Print the navigation history.
+
+    The current directory is marked with '*'.
+    """
+
+    if ctx.invoked_subcommand is None:
+        for path_, current in fsnav.history.History(ctx.obj['history_path']).entries():
+            click.echo('%s %s' % ('*' if current else ' ', path_))
+
+
+@_needs(NEEDS_NOTHING)
+@history.command(hidden=True)
+@click.argument('directory', required=True)
+@click.pass_context
+def record(ctx, directory):
+
+    """
+    Record a directory in the navigation history.
+    """
+
+    try:
+        fsnav.history.History(ctx.obj['history_path']).record(directory)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@_needs(NEEDS_NOTHING)
+@main.command()
+@click.option(
+    '--format', 'format_', type=click.Choice(['json', 'prometheus']), default='prometheus',
+    help="Output format"
+)
+@click.option(
+    '--output', type=click.Path(),
+    help="Atomically write to this file instead of stdout, like a textfile collector expects"
+)
+@click.pass_context
+def metrics(ctx, format_, output):
+
+    """
+    Print usage metrics.
+
+    Metrics are only recorded when --metricsfile or $FSNAV_METRICS_FILE is
+    set.  They include lookups, misses, paths validated, lookups answered
+    from the store, lookups per alias, and how long each subcommand takes.
+    """
+
+    if ctx.obj['metrics'] is None:
+        raise click.ClickException(
+            "Metrics are disabled.  Set --metricsfile or $FSNAV_METRICS_FILE.")
+    try:
+        data = ctx.obj['metrics'].read()
+    except ValueError:
+        raise click.ClickException(
+            "Corrupt metrics file: %s\nRemove it to start over." % ctx.obj['metrics'].path)
+    except (IOError, OSError) as e:
+        raise click.ClickException("Can't read metrics file: %s" % e)
+    if format_ == 'json':
+        text = json.dumps(data, sort_keys=True)
+    else:
+        text = fsnav.metrics.to_prometheus(data).rstrip('\n')
+
+    if output is None:
+        click.echo(text)
+    else:
+        tmp = '%s.%s.tmp' % (output, os.getpid())
+        with open(tmp, 'w') as f:
+            f.write(text + '\n')
+        getattr(os, 'replace', os.rename)(tmp, output)
+
+
 @main.group()
-def startup():
+@click.pass_context
+def startup(ctx):
 
     """
     Code needed to enable shortcuts on startup.
     """
 
-    pass
+    ctx.obj['command'] = 'startup %s' % ctx.invoked_subcommand
 
 
+@_needs(NEEDS_ALL, snapshot=True)
 @startup.command()
+@click.option(
+    '--dispatch', is_flag=True,
+    help="Generate a single dispatcher function backed by an associative array"
+)
+@click.option(
+    '--hot', multiple=True,
+    help="With --dispatch, also generate a function for this alias.  May be used multiple times"
+)
+@click.option(
+    '--no-history', is_flag=True, help="Don't record navigation history"
+)
 @click.pass_context
-def generate(ctx):
+def generate(ctx, dispatch, hot, no_history):
 
     """
     Shell function shortcuts.
     """
 
-    click.echo(' ; '.join(fsnav.fg_tools.generate_functions(ctx.obj['loaded_aliases'])))
+    loaded_aliases = dict(ctx.obj['loaded_aliases'].iter_all())
+    if dispatch:
+        missing = [a for a in hot if a not in loaded_aliases]
+        if missing:
+            raise click.BadParameter(
+                "Unrecognized alias(es): %s" % ', '.join(missing), param_hint='--hot')
+        code = fsnav.fg_tools.generate_dispatcher(
+            loaded_aliases, hot=hot, history=not no_history)
+    else:
+        code = fsnav.fg_tools.generate_functions(loaded_aliases, history=not no_history)
+    click.echo(' ; '.join(code))
 
 
+@_needs(NEEDS_NOTHING)
 @startup.command()
-def profile():
+@click.option(
+    '--dispatch', is_flag=True,
+    help="Use a single dispatcher function instead of one function per alias"
+)
+def profile(dispatch):
 
     """
     Code to activate shortcuts on startup.
     """
 
-    click.echo(fsnav.fg_tools.startup_code)
+    if dispatch:
+        click.echo(fsnav.fg_tools.dispatch_startup_code)
+    else:
+        click.echo(fsnav.fg_tools.startup_code)
 
 
 @main.group()
-def config():
+@click.pass_context
+def config(ctx):
 
     """
     Configure FS Nav.
     """
 
-    pass
+    ctx.obj['command'] = 'config %s' % ctx.invoked_subcommand
 
 
+@_needs(NEEDS_DEFAULTS)
 @config.command()
 @click.pass_context
 def default(ctx):
@@ -183,6 +1135,7 @@ def default(ctx):
     click.echo(text)
 
 
+@_needs(NEEDS_CONFIGFILE)
 @config.command()
 @click.pass_context
 def userdefined(ctx):
@@ -191,9 +1144,10 @@ def userdefined(ctx):
     Print user-defined aliases.
     """
 
+    user_defined = ctx.obj['loaded_aliases'].user_defined()
     nd_aliases = {
         str(a): str(p) for a, p in
-        list(ctx.obj['loaded_aliases'].user_defined().as_dict().items())}
+        list(user_defined.items()) + list(user_defined.patterns().items())}
     if ctx.obj['no_pretty']:
         text = json.dumps(nd_aliases)
     else:
@@ -222,10 +1176,10 @@ def addalias(ctx, alias_path, no_overwrite):
 
     aliases_ = ctx.obj['loaded_aliases'].copy()
     aliases_.update(**alias_path)
-    with open(ctx.obj['cfg_path'], 'w') as f:
-        json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: aliases_.user_defined()}, f)
+    _write_configfile(ctx, aliases_)
 
 
+@_needs(NEEDS_NOTHING)
 @config.command()
 @click.pass_context
 def path(ctx):
@@ -257,7 +1211,320 @@ def deletealias(ctx, alias, no_overwrite):
             "ERROR: No overwrite is {no_overwrite} and configfile exists: {configfile}".format(
                 no_overwrite=no_overwrite, configfile=ctx.obj['cfg_path']))
 
-    aliases_ = fsnav.Aliases(
-        {a: p for a, p in list(ctx.obj['loaded_aliases'].items()) if a not in alias})
-    with open(ctx.obj['cfg_path'], 'w') as f:
-        json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: aliases_.user_defined()}, f)
+    aliases_ = ctx.obj['loaded_aliases'].copy()
+    for a in alias:
+        # Default and discovered aliases can't be deleted
+        try:
+            del aliases_[a]
+        except KeyError:
+            pass
+    _write_configfile(ctx, aliases_)
+
+
+@_needs(NEEDS_CONFIGFILE)
+@config.command()
+@click.argument('root', nargs=-1)
+@click.option(
+    '--remove', is_flag=True, help="Remove the roots instead of adding them"
+)
+@click.pass_context
+def reporoots(ctx, root, remove):
+
+    """
+    Configure where to discover repositories.
+
+    Prints the configured roots if none are given.  Run `nav config rescan`
+    after changing the roots.
+    """
+
+    roots = list((ctx.obj['cfg_content'] or {}).get(fsnav.core.CONFIGFILE_REPO_ROOTS_SECTION, []))
+    if not root:
+        for r in roots:
+            click.echo(r)
+        return
+
+    for r in root:
+        r = os.path.abspath(os.path.expanduser(r))
+        if remove and r in roots:
+            roots.remove(r)
+        elif not remove and r not in roots:
+            roots.append(r)
+
+    cfg_content = dict(ctx.obj['cfg_content'] or {fsnav.core.CONFIGFILE_ALIAS_SECTION: {}})
+    cfg_content[fsnav.core.CONFIGFILE_REPO_ROOTS_SECTION] = roots
+    ctx.obj['cfg_content'] = cfg_content
+    _write_configfile(ctx)
+
+
+@_needs(NEEDS_CONFIGFILE)
+@config.command()
+@click.argument('policy', nargs=-1)
+@click.option(
+    '--remove', is_flag=True, help="Remove the policies for the given keys instead"
+)
+@click.option(
+    '--aliases', 'show_aliases', is_flag=True,
+    help="Print the mount and policy of every configfile alias's path"
+)
+@click.pass_context
+def validation(ctx, policy, remove, show_aliases):
+
+    """
+    Configure when paths on different mounts are validated.
+
+    POLICY is KEY=eager, KEY=lazy, or KEY=never where KEY is a mount point,
+    a filesystem type like nfs4, or one of local, remote, fuse, or autofs.
+    Paths on eager mounts are checked whenever aliases are loaded, paths on
+    lazy mounts only when an alias is used, and paths on never mounts are not
+    touched at all.  Prints the configured policies if none are given.
+    """
+
+    cfg_content = dict(ctx.obj['cfg_content'] or {fsnav.core.CONFIGFILE_ALIAS_SECTION: {}})
+    policies = dict(cfg_content.get(fsnav.core.CONFIGFILE_VALIDATION_SECTION) or {})
+
+    if show_aliases:
+        for a, p in sorted(ctx.obj['loaded_aliases'].iter_all()):
+            mount_point, fstype, _ = fsnav.core.classify_path(p)
+            click.echo('%s\t%s\t%s\t%s' % (
+                a, mount_point, fstype, fsnav.core.validation_policy(p)))
+        return
+
+    if not policy:
+        effective = dict(fsnav.core.DEFAULT_VALIDATION_POLICIES, **policies)
+        for key in sorted(effective):
+            click.echo('%s=%s' % (key, effective[key]))
+        return
+
+    for item in policy:
+        key, _, value = item.partition('=')
+        if remove:
+            policies.pop(key, None)
+        else:
+            policies[key] = value
+    try:
+        fsnav.core.set_validation_policies(policies)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    cfg_content[fsnav.core.CONFIGFILE_VALIDATION_SECTION] = policies
+    ctx.obj['cfg_content'] = cfg_content
+    _write_configfile(ctx)
+
+
+@_needs(NEEDS_CONFIGFILE)
+@config.command()
+@click.option(
+    '--full', is_flag=True, help="List every directory instead of only modified directories"
+)
+@click.option(
+    '--max-depth', type=click.INT, default=fsnav.discover.DEFAULT_MAX_DEPTH,
+    help="Maximum depth to search below each root"
+)
+@click.pass_context
+def rescan(ctx, full, max_depth):
+
+    """
+    Discover repositories and generate aliases for them.
+
+    Directories below the roots configured with `nav config reporoots` that
+    contain a .git or .hg directory get an alias named after the directory.
+    Aliases in the configfile take precedence.  Only directories modified
+    since the last rescan are listed again unless --full is given.
+    """
+
+    roots = (ctx.obj['cfg_content'] or {}).get(fsnav.core.CONFIGFILE_REPO_ROOTS_SECTION, [])
+    state_path = fsnav.discover.state_path(ctx.obj['cfg_path'])
+    state = None if full else fsnav.discover.load_state(state_path)
+
+    repos, state, listed = fsnav.discover.scan(roots, state=state, max_depth=max_depth)
+    repo_aliases = fsnav.discover.repo_aliases(repos)
+
+    fsnav.discover.save_state(state_path, state)
+    with open(fsnav.discover.repos_path(ctx.obj['cfg_path']), 'w') as f:
+        json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: repo_aliases}, f)
+    click.echo("Generated %s aliases for %s repositories, listed %s of %s directories" % (
+        len(repo_aliases), len(repos), listed, len(state['dirs'])), err=True)
+
+
+@config.command()
+@click.pass_context
+def repos(ctx):
+
+    """
+    Print aliases for discovered repositories.
+    """
+
+    repo_aliases = {str(a): str(p) for a, p in list(ctx.obj['repo_aliases'].items())}
+    if ctx.obj['no_pretty']:
+        text = json.dumps(repo_aliases)
+    else:
+        text = pprint.pformat(repo_aliases)
+    click.echo(text)
+
+
+@config.command(name='import')
+@click.argument('infile', type=click.File())
+@click.option(
+    '--format', 'format_', type=click.Choice(sorted(fsnav.importers.FORMATS)),
+    required=True, help="Input format"
+)
+@click.option(
+    '--namespace', help="Add all imported aliases to this namespace"
+)
+@click.option(
+    '--replace', is_flag=True, help="Replace existing aliases"
+)
+@click.option(
+    '--dry-run', is_flag=True, help="Validate and report without writing the configfile"
+)
+@click.pass_context
+def import_(ctx, infile, format_, namespace, replace, dry_run):
+
+    """
+    Import aliases from another tool.
+
+    Directories from autojump and z databases are aliased by their name.
+    CSV files contain alias,path rows and JSON files map aliases to paths.
+    Rejected records are reported and everything else is written to the
+    configfile at once.
+    """
+
+    if namespace is not None and not fsnav.core.validate_alias(namespace):
+        raise click.BadParameter("Invalid namespace: %s" % namespace, param_hint='--namespace')
+
+    aliases_ = ctx.obj['loaded_aliases'].copy()
+    if namespace is not None:
+        aliases_.load_namespace(namespace)
+
+    try:
+        accepted, rejected = fsnav.importers.import_aliases(
+            fsnav.importers.FORMATS[format_](infile), existing=aliases_,
+            replace=replace, namespace=namespace)
+    except ValueError as e:
+        raise click.ClickException("Can't read %s: %s" % (infile.name, e))
+
+    for line_number, alias, path_, reason in rejected:
+        click.echo("Rejected%s: %s: %s=%s" % (
+            '' if line_number is None else ' line %s' % line_number, reason, alias, path_),
+            err=True)
+    click.echo("Imported %s aliases, rejected %s" % (len(accepted), len(rejected)), err=True)
+
+    if not dry_run and accepted:
+        aliases_._update_validated(accepted)
+        _write_configfile(ctx, aliases_)
+
+
+@_needs(NEEDS_CONFIGFILE)
+@config.command()
+@click.option(
+    '--remove', is_flag=True, help="Delete the store instead of generating it"
+)
+@click.pass_context
+def store(ctx, remove):
+
+    """
+    Generate a binary store for fast lookups.
+
+    Once generated the store is kept in sync by the other config commands.
+    `nav get` uses it as long as it matches the configfile.
+    """
+
+    store_path = fsnav.store.store_path(ctx.obj['cfg_path'])
+    if remove:
+        if os.path.exists(store_path):
+            os.remove(store_path)
+    else:
+        # Dead paths end up in the store and are caught when they are used
+        fsnav.store.write_store(
+            store_path, _store_aliases(ctx.obj['cfg_content']), configfile=ctx.obj['cfg_path'])
+
+
+@config.command()
+@click.option(
+    '--remove', is_flag=True, help="Delete the snapshot instead of generating it"
+)
+@click.pass_context
+def snapshot(ctx, remove):
+
+    """
+    Validate every alias and save the ones that exist.
+
+    `nav --serve-stale` answers from this snapshot without touching the
+    filesystem and runs this command in the background to refresh it.
+    """
+
+    snapshot_path = fsnav.snapshot.snapshot_path(ctx.obj['cfg_path'])
+    try:
+        if remove:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            return
+        aliases_ = dict(ctx.obj['loaded_aliases'].iter_all())
+        paths = fsnav.core.validate_paths(list(aliases_.values()), lookup=True)
+        valid = dict((a, p) for a, p in list(aliases_.items()) if p in paths)
+        _count(ctx, 'validations', len(aliases_))
+        valid.update(ctx.obj['loaded_aliases'].patterns())
+        fsnav.snapshot.write_snapshot(
+            snapshot_path, valid, configfile=ctx.obj['cfg_path'],
+            flags=fsnav.snapshot.FLAG_NO_LOAD_DEFAULT if ctx.obj['no_load_default'] else 0)
+    finally:
+        # Held by the process that started a background refresh
+        try:
+            os.remove(fsnav.snapshot.lock_path(ctx.obj['cfg_path']))
+        except OSError:
+            pass
+
+
+@config.command()
+@click.option(
+    '--full', is_flag=True,
+    help="Check every alias, including namespaces, instead of only aliases marked as dead"
+)
+@click.option(
+    '--dry-run', is_flag=True, help="Report without writing the configfile"
+)
+@click.pass_context
+def prune(ctx, full, dry_run):
+
+    """
+    Remove aliases pointing at paths that no longer exist.
+
+    Every call to nav revalidates a few configfile aliases and remembers the
+    ones that are dead.  Those are checked again and removed.  Use --full to
+    check every alias now.
+    """
+
+    aliases_ = ctx.obj['loaded_aliases'].copy()
+    if full:
+        for namespace in aliases_.namespaces():
+            aliases_.load_namespace(namespace)
+        candidates = aliases_.user_defined()
+    else:
+        candidates = dict(
+            (a, p) for a, p in list(ctx.obj['dead_aliases'].items()) if aliases_.get(a) == p)
+
+    valid = fsnav.core.validate_paths(list(candidates.values()), lookup=True)
+    dead = sorted(a for a, p in list(candidates.items()) if p not in valid)
+    _count(ctx, 'validations', len(candidates))
+    for a in dead:
+        click.echo("Pruned: %s=%s" % (a, candidates[a]), err=True)
+    click.echo("Pruned %s aliases" % len(dead), err=True)
+
+    if dry_run or not dead:
+        return
+    for a in dead:
+        del aliases_[a]
+    _write_configfile(ctx, aliases_)
+
+    health_path = fsnav.health.health_path(ctx.obj['cfg_path'])
+    state = fsnav.health.load_state(health_path)
+    for a in dead:
+        state['dead'].pop(a, None)
+    try:
+        fsnav.health.save_state(health_path, state)
+    except (IOError, OSError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Shorten paths to ``@alias/rest`` for shell prompts
+"""
+
+
+import os
+
+from . import core
+
+
+__all__ = ['PathIndex', 'format_prompt', 'shorten_path']
+
+
+def _components(path):
+
+    """
+    Split a normalized path into its components.  The root directory is
+    represented by an empty leading component.
+    """
+
+    if path == os.sep:
+        return ['']
+    return path.split(os.sep)
+
+
+def _preferred(a, b):
+
+    """
+    Pick which of two aliases pointing to the same path to display.  Shorter
+    aliases win and ties are broken alphabetically.
+    """
+
+    return min(a, b, key=lambda alias: (len(alias), alias))
+
+
+def format_prompt(alias, rest):
+
+    """
+    Format an alias and the remainder of a path for display
+
+        >>> format_prompt('ghub', 'FS-Nav/fsnav')
+        '@ghub/FS-Nav/fsnav'
+
+    Parameters
+    ----------
+    alias : str
+        Alias
+    rest : str
+        Path relative to the alias's path.  Empty if the path is the alias's
+        path.
+
+    Returns
+    -------
+    str
+    """
+
+    if rest:
+        return '@%s%s%s' % (alias, os.sep, rest)
+    return '@%s' % alias
+
+
+class PathIndex(object):
+
+    def __init__(self, aliases):
+
+        """
+        Path component trie built from the paths of an `Aliases()` instance
+        for finding the alias with the longest path that contains another
+        path.  Lookups walk one node per path component and never touch the
+        filesystem.
+
+            >>> index = PathIndex(Aliases(ghub='~/github'))
+            >>> index.shorten('/Users/wursterk/github/FS-Nav')
+            '@ghub/FS-Nav'
+
+        Parameters
+        ----------
+        aliases : dict or fsnav.core.Aliases
+            Aliases to index
+        """
+
+        # Each node is a dictionary mapping path components to child nodes.
+        # The alias for the node's path, if any, is stored under `None`.
+        self._root = {}
+        for alias, path in list(aliases.items()):
+            node = self._root
+            for component in _components(core.normalize_path(path)):
+                node = node.setdefault(component, {})
+            node[None] = _preferred(node[None], alias) if None in node else alias
+
+    def longest_prefix(self, path):
+
+        """
+        Find the alias with the longest path containing `path`
+
+        Parameters
+        ----------
+        path : str
+            Path to look up
+
+        Returns
+        -------
+        tuple or None
+            ``(alias, rest)`` where `rest` is `path` relative to the alias's
+            path, or `None` if no alias contains `path`.
+        """
+
+        components = _components(core.normalize_path(path))
+        node = self._root
+        best = None
+        for depth, component in enumerate(components):
+            node = node.get(component)
+            if node is None:
+                break
+            if None in node:
+                best = (node[None], depth + 1)
+        if best is None:
+            return None
+        alias, depth = best
+        return alias, os.sep.join(components[depth:])
+
+    def shorten(self, path):
+
+        """
+        Rewrite a path as ``@alias/rest`` using the alias with the longest
+        path containing it.
+
+        Parameters
+        ----------
+        path : str
+            Path to shorten
+
+        Returns
+        -------
+        str
+            Shortened path or `path` unchanged if no alias contains it.
+        """
+
+        match = self.longest_prefix(path)
+        if match is None:
+            return path
+        return format_prompt(*match)
+
+
+def shorten_path(path, aliases):
+
+    """
+    Rewrite a path as ``@alias/rest``.  Build a `PathIndex()` instead when
+    shortening more than one path.
+
+    Parameters
+    ----------
+    path : str
+        Path to shorten
+    aliases : dict or fsnav.core.Aliases
+        Aliases to choose from
+
+    Returns
+    -------
+    str
+    """
+
+    return PathIndex(aliases).shorten(path)
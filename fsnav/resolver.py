@@ -0,0 +1,332 @@
+"""
+Resolve alias-rooted path expressions in-process
+
+Tools that need many paths can resolve expressions like ``ghub/FS-Nav/docs``
+against a loaded `Aliases()` instance instead of calling ``nav get`` once per
+path.  Results are cached so repeated expressions are nearly free.
+"""
+
+
+from collections import namedtuple
+from collections import OrderedDict
+import json
+import os
+import threading
+
+from . import core
+
+# Python 2 does not have functools.lru_cache()
+try:
+    from functools import lru_cache
+except ImportError:  # pragma no cover
+    lru_cache = None
+
+
+__all__ = ['Resolver', 'invalidate', 'load_aliases', 'resolve', 'resolve_many']
+
+
+DEFAULT_CACHE_SIZE = 4096
+
+_CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def _fallback_lru_cache(maxsize):
+
+    """
+    Minimal `functools.lru_cache()` for Python 2 supporting a single
+    hashable argument, `cache_info()`, and `cache_clear()`.
+    """
+
+    def decorator(func):
+
+        cache = OrderedDict()
+        stats = [0, 0]
+        lock = threading.Lock()
+
+        def wrapper(arg):
+            with lock:
+                if arg in cache:
+                    stats[0] += 1
+                    value = cache.pop(arg)
+                    cache[arg] = value
+                    return value
+                stats[1] += 1
+            value = func(arg)
+            with lock:
+                cache[arg] = value
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats[:] = [0, 0]
+
+        wrapper.cache_info = lambda: _CacheInfo(stats[0], stats[1], maxsize, len(cache))
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+def load_aliases(configfile=core.CONFIGFILE):
+
+    """
+    Load the same aliases ``nav`` uses in the same layers: the default
+    aliases, aliases for discovered repositories, and the configfile's
+    aliases, including namespaces, which are loaded on demand.  Like
+    ``nav get``, aliases whose paths no longer exist are skipped.  Their
+    paths are validated in one batch according to the configfile's
+    validation policies, but namespaces are trusted like they are by
+    ``nav``.  Invalid entries are skipped instead of raising an exception.
+
+    Parameters
+    ----------
+    configfile : str, optional
+        Path to the configfile
+
+    Returns
+    -------
+    fsnav.core.LayeredAliases
+    """
+
+    from .discover import repos_path
+
+    content = {}
+    for path in (repos_path(configfile), configfile):
+        try:
+            with open(path) as f:
+                content[path] = json.load(f)
+        except (IOError, OSError, ValueError):
+            pass
+
+    # Invalid policies are ignored like invalid aliases
+    try:
+        core.set_validation_policies(
+            content.get(configfile, {}).get(core.CONFIGFILE_VALIDATION_SECTION))
+    except (AttributeError, ValueError):
+        pass
+
+    layers = {}
+    for path in (repos_path(configfile), configfile):
+        try:
+            loaded = content[path][core.CONFIGFILE_ALIAS_SECTION]
+        except (KeyError, TypeError, AttributeError):
+            loaded = {}
+        layers[path] = {}
+        for a, p in list(loaded.items()):
+            if not isinstance(p, core._STRING_TYPES) or not p:
+                continue
+            if core.is_pattern(a):
+                try:
+                    core.AliasPattern(a, os.path.expanduser(p))
+                except (KeyError, ValueError):
+                    continue
+            elif not core.validate_alias(a):
+                continue
+            layers[path][a] = os.path.expanduser(p)
+
+    # Pattern aliases are validated when they are looked up instead
+    valid = core.validate_paths(set(
+        p for path in layers for a, p in layers[path].items() if not core.is_pattern(a)))
+    for path in layers:
+        layers[path] = dict(
+            (a, p) for a, p in layers[path].items() if core.is_pattern(a) or p in valid)
+
+    discovered = core.Aliases()
+    discovered._update_validated(layers[repos_path(configfile)])
+    configfile_aliases = core.ShardedAliases(core.shard_dir(configfile))
+    configfile_aliases._update_validated(layers[configfile])
+    return core.LayeredAliases(
+        default=core.DEFAULT_ALIASES, discovered=discovered, configfile=configfile_aliases)
+
+
+class Resolver(object):
+
+    def __init__(self, aliases, maxsize=DEFAULT_CACHE_SIZE):
+
+        """
+        Expand path expressions rooted at an alias.
+
+            >>> resolver = Resolver(Aliases(ghub='~/github'))
+            >>> resolver.resolve('ghub/FS-Nav')
+            '/Users/wursterk/github/FS-Nav'
+            >>> resolver.resolve('@ghub/$PROJECT')
+            '/Users/wursterk/github/FS-Nav'
+            >>> resolver.resolve('~/Desktop')
+            '/Users/wursterk/Desktop'
+
+        The first component of an expression is replaced with its alias's
+        path if it is an alias.  A leading ``@``, like the output from
+        ``nav prompt``, requires the first component to be an alias.  `~`
+        and environment variables are expanded everywhere else.
+
+        Results are cached.  Call `invalidate()` after changing `aliases` or
+        any environment variables used in expressions.
+
+        Parameters
+        ----------
+        aliases : dict or fsnav.core.Aliases
+            Aliases to resolve against
+        maxsize : int or None, optional
+            Maximum number of cached expressions.  `None` means unbounded.
+        """
+
+        self.aliases = aliases
+        cache = _fallback_lru_cache if lru_cache is None else lru_cache
+        self._cached = cache(maxsize=maxsize)(self._resolve)
+
+    def _resolve(self, expr):
+
+        alias, sep, rest = expr.partition('/')
+        explicit = alias.startswith('@')
+        if explicit:
+            alias = alias[1:]
+
+        try:
+            path = self.aliases[alias]
+        except KeyError:
+            if explicit:
+                raise
+            return os.path.expanduser(os.path.expandvars(expr))
+
+        if not sep:
+            return path
+        return os.path.join(path, os.path.expandvars(rest))
+
+    def resolve(self, expr):
+
+        """
+        Resolve a single expression
+
+        Parameters
+        ----------
+        expr : str
+            Expression to resolve
+
+        Raises
+        ------
+        KeyError
+            Expression starts with ``@`` but the alias doesn't exist.
+
+        Returns
+        -------
+        str
+        """
+
+        return self._cached(expr)
+
+    def resolve_many(self, exprs):
+
+        """
+        Resolve several expressions
+
+        Parameters
+        ----------
+        exprs : iterable
+            Expressions to resolve
+
+        Returns
+        -------
+        list
+        """
+
+        cached = self._cached
+        return [cached(e) for e in exprs]
+
+    def invalidate(self, aliases=None):
+
+        """
+        Clear the cache
+
+        Parameters
+        ----------
+        aliases : dict or fsnav.core.Aliases, optional
+            Resolve against these aliases from now on.
+
+        Returns
+        -------
+        None
+        """
+
+        if aliases is not None:
+            self.aliases = aliases
+        self._cached.cache_clear()
+
+    def cache_info(self):
+
+        """
+        Get cache statistics
+
+        Returns
+        -------
+        namedtuple
+            ``(hits, misses, maxsize, currsize)``
+        """
+
+        return self._cached.cache_info()
+
+
+_default_resolver = None
+
+
+def _get_default_resolver():
+
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = Resolver(load_aliases())
+    return _default_resolver
+
+
+def resolve(expr):
+
+    """
+    Resolve an expression against the aliases ``nav`` uses.  The aliases
+    are loaded on first use.  See `Resolver()`.
+
+    Parameters
+    ----------
+    expr : str
+        Expression to resolve
+
+    Returns
+    -------
+    str
+    """
+
+    return _get_default_resolver().resolve(expr)
+
+
+def resolve_many(exprs):
+
+    """
+    Resolve several expressions against the aliases ``nav`` uses.  See
+    `Resolver()`.
+
+    Parameters
+    ----------
+    exprs : iterable
+        Expressions to resolve
+
+    Returns
+    -------
+    list
+    """
+
+    return _get_default_resolver().resolve_many(exprs)
+
+
+def invalidate():
+
+    """
+    Reload the aliases used by `resolve()` and `resolve_many()` and clear
+    their cache.
+
+    Returns
+    -------
+    None
+    """
+
+    if _default_resolver is not None:
+        _default_resolver.invalidate(load_aliases())
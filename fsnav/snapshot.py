@@ -0,0 +1,205 @@
+"""
+Last-known-good alias snapshots for stale-while-revalidate lookups
+
+Validating aliases means touching every path on the filesystem, which can
+hang for a long time on network mounts that are slow or unreachable.  A
+snapshot is a copy of the fully validated alias table that ``nav`` can answer
+from immediately while a detached child process validates everything again
+and replaces the snapshot for the next call.  Snapshots older than a maximum
+staleness are not used, and neither are snapshots generated from a different
+version of the configfile.
+
+The layout is:
+
+    header      magic, format version, flags, creation time, and the size and
+                mtime of the configfile the snapshot was generated from
+    body        output from `fsnav.core.Aliases.to_bytes()`
+"""
+
+
+import os
+import struct
+import subprocess
+import sys
+import time
+
+from . import core
+from . import store
+
+
+__all__ = ['DEFAULT_MAX_STALENESS', 'REFRESH_INTERVAL', 'load_snapshot', 'lock_path',
+           'snapshot_path', 'spawn_refresh', 'write_snapshot']
+
+
+SNAPSHOT_SUFFIX = '.snapshot'
+LOCK_SUFFIX = '.lock'
+
+# Seconds
+DEFAULT_MAX_STALENESS = 24 * 60 * 60
+REFRESH_INTERVAL = 60
+LOCK_TIMEOUT = 10 * 60
+
+FLAG_NO_LOAD_DEFAULT = 1
+
+_MAGIC = b'FSNP'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHdQQ')
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def snapshot_path(configfile):
+
+    """
+    Get the path to the snapshot of a configfile's aliases
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + SNAPSHOT_SUFFIX
+
+
+def lock_path(configfile):
+
+    """
+    Get the path to the lock held while a configfile's snapshot is refreshed
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return snapshot_path(configfile) + LOCK_SUFFIX
+
+
+def write_snapshot(path, aliases, configfile=None, flags=0):
+
+    """
+    Atomically write a snapshot of validated aliases.
+
+    Parameters
+    ----------
+    path : str
+        Output snapshot path
+    aliases : dict or fsnav.core.Aliases
+        Validated aliases and expanded paths, including namespaced aliases.
+    configfile : str or None, optional
+        Configfile the aliases were read from.  A snapshot is only used while
+        the configfile's size and modification time are unchanged.
+    flags : int, optional
+        Options the aliases were loaded with, like `FLAG_NO_LOAD_DEFAULT`.
+        A snapshot is only used by calls with the same options.
+
+    Returns
+    -------
+    None
+    """
+
+    size, mtime = (0, 0) if configfile is None else store._source_signature(configfile)
+    snapshot = core.Aliases()
+    snapshot._update_validated(aliases)
+    body = snapshot.to_bytes()
+    tmp = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, flags, time.time(), size, mtime))
+        f.write(body)
+    _replace(tmp, path)
+
+
+def load_snapshot(path, configfile=None, flags=0):
+
+    """
+    Load a snapshot written by `write_snapshot()`.
+
+    Parameters
+    ----------
+    path : str
+        Snapshot path
+    configfile : str or None, optional
+        Configfile the snapshot must have been generated from.
+    flags : int, optional
+        Options the snapshot must have been generated with.
+
+    Returns
+    -------
+    tuple or None
+        ``(created, aliases)`` where `aliases` is a `ShardedAliases()`
+        without a shard directory, or `None` if the snapshot doesn't exist,
+        can't be read, or doesn't match `configfile` and `flags`.
+    """
+
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, snapshot_flags, created, size, mtime = _HEADER.unpack_from(data)
+    except (IOError, OSError, struct.error):
+        return None
+    if magic != _MAGIC or version != _VERSION or snapshot_flags != flags:
+        return None
+    if configfile is not None and store._source_signature(configfile) != (size, mtime):
+        return None
+    try:
+        return created, core.ShardedAliases.from_bytes(data[_HEADER.size:])
+    except ValueError:
+        return None
+
+
+def spawn_refresh(args, lock_path):
+
+    """
+    Start a detached child process that regenerates the snapshot, unless one
+    is already running.  The child is responsible for removing `lock_path`
+    when it exits.  Locks older than `LOCK_TIMEOUT` are assumed to belong to
+    a child that died and are taken over.
+
+    Parameters
+    ----------
+    args : list
+        Command to run.
+    lock_path : str
+        Lock file preventing concurrent refreshes.
+
+    Returns
+    -------
+    bool
+        `True` if a child was started.
+    """
+
+    try:
+        if time.time() - os.stat(lock_path).st_mtime > LOCK_TIMEOUT:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+    except OSError:
+        return False
+
+    # The child must outlive the shell function that called nav and must not
+    # hold on to its terminal or pipes
+    kwargs = {'close_fds': True}
+    if sys.platform.startswith('win'):  # pragma no cover
+        kwargs['creationflags'] = 0x00000008  # DETACHED_PROCESS
+    elif sys.version_info >= (3, 2):
+        kwargs['start_new_session'] = True
+    else:  # pragma no cover
+        kwargs['preexec_fn'] = os.setsid
+    try:
+        with open(os.devnull, 'r+b') as devnull:
+            subprocess.Popen(args, stdin=devnull, stdout=devnull, stderr=devnull, **kwargs)
+    except OSError:
+        os.remove(lock_path)
+        return False
+    return True
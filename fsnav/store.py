@@ -0,0 +1,398 @@
+"""
+Memory-mapped binary alias store
+
+Large configfiles have to be fully parsed before a single alias can be looked
+up.  The store is a sorted binary copy of the configfile's aliases that can be
+memory-mapped and binary searched, so a single lookup only touches a handful
+of pages regardless of how many aliases exist.  A second table sorted by path
+answers longest-prefix queries for ``nav prompt``.
+
+The layout is:
+
+    header      magic, format version, alias count, and the size and mtime
+                of the configfile the store was generated from
+    table       one (key offset, key length, path offset, path length) record
+                per alias, sorted by key
+    reverse     one index into `table` per alias, sorted by normalized path
+                and then by preferred alias
+    blob        UTF-8 encoded keys and paths referenced by the table
+"""
+
+
+import mmap
+import os
+import struct
+
+from . import core
+
+
+__all__ = ['AliasStore', 'STORE_SUFFIX', 'store_path', 'write_store']
+
+
+STORE_SUFFIX = '.store'
+
+_MAGIC = b'FSNS'
+_VERSION = 2
+_HEADER = struct.Struct('<4sHHIQQ')
+_RECORD = struct.Struct('<IIII')
+_REVERSE = struct.Struct('<I')
+
+# Python 2 does not have an atomic os.replace()
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _encode(text):
+
+    # Paths are not guaranteed to be valid UTF-8, like in `fsnav.core`
+    return text.encode('utf-8', core._ENCODING_ERRORS)
+
+
+def _decode(data):
+
+    return data.decode('utf-8', core._ENCODING_ERRORS)
+
+
+def _normalize(path):
+
+    """
+    Normalize an encoded path for the reverse table
+
+    Parameters
+    ----------
+    path : bytes
+        UTF-8 encoded path
+
+    Returns
+    -------
+    bytes
+    """
+
+    return _encode(core.normalize_path(_decode(path)))
+
+
+def store_path(configfile):
+
+    """
+    Get the path to the store generated from a configfile
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the JSON configfile
+
+    Returns
+    -------
+    str
+    """
+
+    return configfile + STORE_SUFFIX
+
+
+def _source_signature(configfile):
+
+    """
+    Get the values used to decide if a store is out of date
+
+    Parameters
+    ----------
+    configfile : str
+        Path to the JSON configfile
+
+    Returns
+    -------
+    tuple
+        ``(size, mtime_ns)`` or ``(0, 0)`` if the configfile does not exist.
+    """
+
+    try:
+        st = os.stat(configfile)
+    except OSError:
+        return 0, 0
+    return st.st_size, core._mtime_ns(st)
+
+
+def write_store(path, aliases, configfile=None):
+
+    """
+    Write aliases to a binary store.  The file is written to a temporary
+    location and then moved into place so readers never see a partial store.
+
+    Parameters
+    ----------
+    path : str
+        Output store path
+    aliases : dict or fsnav.core.Aliases
+        Aliases to write.  Paths are not validated.
+    configfile : str or None, optional
+        Configfile the aliases were read from.  Its size and modification time
+        are recorded so ``AliasStore.is_fresh()`` can detect changes.
+
+    Returns
+    -------
+    None
+    """
+
+    items = sorted((_encode(a), _encode(p)) for a, p in aliases.items())
+
+    size, mtime_ns = _source_signature(configfile) if configfile else (0, 0)
+    header = _HEADER.pack(_MAGIC, _VERSION, 0, len(items), size, mtime_ns)
+
+    table = []
+    blob = []
+    offset = 0
+    for key, value in items:
+        table.append(_RECORD.pack(offset, len(key), offset + len(key), len(value)))
+        blob.append(key)
+        blob.append(value)
+        offset += len(key) + len(value)
+
+    # Same order as `fsnav.prompt.PathIndex()` uses to pick between aliases
+    # with the same path
+    reverse = sorted(
+        range(len(items)),
+        key=lambda i: (_normalize(items[i][1]), len(items[i][0]), items[i][0]))
+
+    tmp_path = path + '.tmp%s' % os.getpid()
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(table))
+        f.write(b''.join(_REVERSE.pack(i) for i in reverse))
+        f.write(b''.join(blob))
+    _replace(tmp_path, path)
+
+
+class AliasStore(object):
+
+    def __init__(self, path):
+
+        """
+        Read-only view of a binary alias store generated by `write_store()`.
+
+            >>> with AliasStore(store_path(CONFIGFILE)) as store:
+            ...     store['home']
+            '/Users/wursterk'
+
+        Parameters
+        ----------
+        path : str
+            Path to the store
+
+        Raises
+        ------
+        ValueError
+            File is not a store or was written by an incompatible version.
+        """
+
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError("Not an alias store: '%s'" % path)
+        magic, version, _, count, size, mtime_ns = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError("Not an alias store or unsupported version: '%s'" % path)
+
+        self._count = count
+        self._signature = (size, mtime_ns)
+        self._reverse_offset = _HEADER.size + count * _RECORD.size
+        self._blob_offset = self._reverse_offset + count * _REVERSE.size
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        self.close()
+
+    def __len__(self):
+
+        return self._count
+
+    def __contains__(self, alias):
+
+        return self._find(alias) is not None
+
+    def __getitem__(self, alias):
+
+        path = self._find(alias)
+        if path is None:
+            raise KeyError(alias)
+        return path
+
+    def __iter__(self):
+
+        for idx in range(self._count):
+            yield _decode(self._key(idx))
+
+    def _record(self, idx):
+
+        return _RECORD.unpack_from(self._mmap, _HEADER.size + idx * _RECORD.size)
+
+    def _key(self, idx):
+
+        key_offset, key_length, _, _ = self._record(idx)
+        start = self._blob_offset + key_offset
+        return self._mmap[start:start + key_length]
+
+    def _path(self, idx):
+
+        _, _, path_offset, path_length = self._record(idx)
+        start = self._blob_offset + path_offset
+        return self._mmap[start:start + path_length]
+
+    def _reverse(self, idx):
+
+        return _REVERSE.unpack_from(self._mmap, self._reverse_offset + idx * _REVERSE.size)[0]
+
+    def _find_path(self, path):
+
+        """
+        Binary search the reverse table for an alias assigned to a normalized
+        path.
+
+        Parameters
+        ----------
+        path : bytes
+            Normalized and encoded path
+
+        Returns
+        -------
+        str or None
+            Preferred alias for the path or `None`.
+        """
+
+        lo = 0
+        hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _normalize(self._path(self._reverse(mid))) < path:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            idx = self._reverse(lo)
+            if _normalize(self._path(idx)) == path:
+                return _decode(self._key(idx))
+        return None
+
+    def longest_prefix(self, path):
+
+        """
+        Find the alias with the longest path containing `path`.  Each parent
+        of `path` is looked up in the reverse table, starting with `path`
+        itself, so the cost depends on the depth of `path` rather than the
+        number of aliases.
+
+        Parameters
+        ----------
+        path : str
+            Path to look up
+
+        Returns
+        -------
+        tuple or None
+            ``(alias, rest)`` where `rest` is `path` relative to the alias's
+            path, or `None` if no alias contains `path`.
+        """
+
+        path = core.normalize_path(path)
+        rest = []
+        while True:
+            alias = self._find_path(_encode(path))
+            if alias is not None:
+                return alias, os.sep.join(reversed(rest))
+            parent, name = os.path.split(path)
+            if parent == path:
+                return None
+            if name:
+                rest.append(name)
+            path = parent
+
+    def _find(self, alias):
+
+        """
+        Binary search for an alias
+
+        Returns
+        -------
+        str or None
+            Path assigned to the alias or `None` if it isn't in the store.
+        """
+
+        key = _encode(alias)
+        lo = 0
+        hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._key(lo) == key:
+            _, _, path_offset, path_length = self._record(lo)
+            start = self._blob_offset + path_offset
+            return _decode(self._mmap[start:start + path_length])
+        return None
+
+    def get(self, alias, default=None):
+
+        """
+        Get the path assigned to an alias
+
+        Returns
+        -------
+        str
+        """
+
+        path = self._find(alias)
+        return default if path is None else path
+
+    def items(self):
+
+        """
+        Iterate over all aliases and paths in sorted order
+
+        Returns
+        -------
+        generator
+        """
+
+        for idx in range(self._count):
+            key_offset, key_length, path_offset, path_length = self._record(idx)
+            key_start = self._blob_offset + key_offset
+            path_start = self._blob_offset + path_offset
+            yield (_decode(self._mmap[key_start:key_start + key_length]),
+                   _decode(self._mmap[path_start:path_start + path_length]))
+
+    def is_fresh(self, configfile):
+
+        """
+        Check if the store still reflects a configfile
+
+        Parameters
+        ----------
+        configfile : str
+            Path to the JSON configfile the store was generated from
+
+        Returns
+        -------
+        bool
+        """
+
+        return self._signature == _source_signature(configfile)
+
+    def close(self):
+
+        """
+        Release the memory map
+
+        Returns
+        -------
+        None
+        """
+
+        self._mmap.close()
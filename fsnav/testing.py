@@ -0,0 +1,255 @@
+"""
+Simulate slow, hanging and failing filesystems
+
+Validation performance depends almost entirely on how long the filesystem
+takes to answer ``os.path.isdir()`` and ``os.access()``, which is hard to
+reproduce on a development machine or in CI.  `SlowFilesystem()` temporarily
+replaces those functions with wrappers that add latency, block until released
+or fail for paths matching a set of rules, and records every call so tests and
+benchmarks can make deterministic assertions about how many filesystem calls
+were made, how long they would have taken and how many ran in parallel.
+"""
+
+
+import errno
+import fnmatch
+import os
+import threading
+import time
+
+
+__all__ = ['SlowFilesystem']
+
+
+# Name -> (module, attribute) of the functions that can be intercepted
+_TARGETS = {
+    'isdir': (os.path, 'isdir'),
+    'access': (os, 'access'),
+    'stat': (os, 'stat'),
+    'scandir': (os, 'scandir'),
+}
+
+_FAILED = {
+    'isdir': False,
+    'access': False,
+}
+
+
+class _Rule(object):
+
+    def __init__(self, pattern, latency, hang, fail, error):
+
+        self.pattern = pattern
+        self.latency = latency
+        self.hang = hang
+        self.fail = fail
+        self.error = error
+
+    def matches(self, path):
+
+        return fnmatch.fnmatchcase(path, self.pattern)
+
+
+class SlowFilesystem(object):
+
+    def __init__(self, latency=0.0, sleep=True, functions=('isdir', 'access'),
+                 hang_timeout=None):
+
+        """
+        Inject latency, hangs and failures into the filesystem calls made by
+        FS Nav.  Use as a context manager:
+
+            >>> fs = SlowFilesystem(latency=0.01)
+            >>> fs.add_rule('/mnt/nfs/*', hang=True)
+            >>> fs.add_rule('/gone/*', fail=True)
+            >>> with fs:
+            ...     aliases = Aliases(home='~/')
+            >>> len(fs.calls), fs.elapsed
+            (1, 0.01)
+
+        Every call is recorded in `calls` as a ``(function, path, latency)``
+        tuple.  Calls made by an intercepted function while it runs, like the
+        ``os.stat()`` inside ``os.path.isdir()``, are neither recorded nor
+        delayed a second time.
+
+        Parameters
+        ----------
+        latency : float, optional
+            Seconds added to every call that does not match a rule with its
+            own latency.
+        sleep : bool, optional
+            Actually sleep for the latency.  If `False` latency is only added
+            to `elapsed`, which keeps tests fast and deterministic.
+        functions : iterable, optional
+            Functions to intercept.  Any of ``isdir``, ``access``, ``stat``,
+            and ``scandir``.
+        hang_timeout : float or None, optional
+            Maximum number of seconds a hanging call blocks before failing.
+            `None` blocks until `release()` is called.
+        """
+
+        unknown = set(functions) - set(_TARGETS)
+        if unknown:
+            raise ValueError("Can't intercept: %s" % ', '.join(sorted(unknown)))
+
+        self.latency = latency
+        self.sleep = sleep
+        self.functions = tuple(functions)
+        self.hang_timeout = hang_timeout
+        self.rules = []
+        self.calls = []
+        self.elapsed = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self._originals = {}
+        self._lock = threading.Lock()
+        self._released = threading.Event()
+        self._local = threading.local()
+
+    def add_rule(self, pattern, latency=None, hang=False, fail=False, error=None):
+
+        """
+        Change the behavior for paths matching a shell-style pattern.  The
+        first matching rule wins.
+
+        Parameters
+        ----------
+        pattern : str
+            Pattern passed to `fnmatch.fnmatchcase()`.
+        latency : float or None, optional
+            Seconds added to each call.  Defaults to the instance's latency.
+        hang : bool, optional
+            Block until `release()` is called or `hang_timeout` expires, then
+            fail.
+        fail : bool, optional
+            Behave as though the path does not exist.
+        error : int or None, optional
+            Raise an `OSError` with this errno instead, like a broken mount.
+
+        Returns
+        -------
+        None
+        """
+
+        self.rules.append(_Rule(pattern, latency, hang, fail, error))
+
+    def release(self):
+
+        """
+        Unblock all hanging calls, including future ones.
+
+        Returns
+        -------
+        None
+        """
+
+        self._released.set()
+
+    def reset(self):
+
+        """
+        Clear recorded calls and counters but keep the rules.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self.calls = []
+            self.elapsed = 0.0
+            self.max_in_flight = self.in_flight
+
+    def paths(self, function=None):
+
+        """
+        Get the paths passed to intercepted calls in the order they were made.
+
+        Parameters
+        ----------
+        function : str or None, optional
+            Only include calls to this function.
+
+        Returns
+        -------
+        list
+        """
+
+        return [p for f, p, _ in self.calls if function is None or f == function]
+
+    def _rule(self, path):
+
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    def _wrap(self, name, original):
+
+        def wrapper(path, *args, **kwargs):
+
+            # Calls made by an intercepted function are passed through
+            if getattr(self._local, 'active', False):
+                return original(path, *args, **kwargs)
+
+            path_str = path if isinstance(path, str) else str(path)
+            rule = self._rule(path_str)
+            latency = self.latency
+            if rule is not None and rule.latency is not None:
+                latency = rule.latency
+
+            with self._lock:
+                self.calls.append((name, path_str, latency))
+                self.elapsed += latency
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+            self._local.active = True
+            try:
+                if self.sleep and latency:
+                    time.sleep(latency)
+                failed = False
+                if rule is not None and rule.hang:
+                    self._released.wait(self.hang_timeout)
+                    failed = True
+                if rule is not None and rule.error is not None:
+                    raise OSError(rule.error, os.strerror(rule.error), path_str)
+                if failed or (rule is not None and rule.fail):
+                    if name in _FAILED:
+                        return _FAILED[name]
+                    raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), path_str)
+                return original(path, *args, **kwargs)
+            finally:
+                self._local.active = False
+                with self._lock:
+                    self.in_flight -= 1
+
+        wrapper.__wrapped__ = original
+        return wrapper
+
+    def __enter__(self):
+
+        """
+        Start intercepting filesystem calls
+        """
+
+        if self._originals:
+            raise RuntimeError("SlowFilesystem() is already active")
+        for name in self.functions:
+            module, attr = _TARGETS[name]
+            self._originals[name] = getattr(module, attr)
+            setattr(module, attr, self._wrap(name, self._originals[name]))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        """
+        Restore the original functions and unblock any hanging calls
+        """
+
+        for name, original in self._originals.items():
+            module, attr = _TARGETS[name]
+            setattr(module, attr, original)
+        self._originals = {}
+        self.release()
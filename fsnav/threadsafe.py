@@ -0,0 +1,326 @@
+"""
+Thread-safe aliases for long-running multi-threaded programs
+
+`ConcurrentAliases()` publishes an immutable snapshot of its aliases and
+replaces the whole snapshot on every mutation.  Readers only ever dereference
+the current snapshot, so they never take a lock and never observe a
+half-applied `update()`.  Writers are serialized with a lock and pay for a
+copy of the table, which is the right trade-off when reads vastly outnumber
+writes.
+"""
+
+
+import threading
+
+try:
+    from collections.abc import Mapping
+    from collections.abc import MutableMapping
+except ImportError:  # pragma no cover
+    from collections import Mapping
+    from collections import MutableMapping
+
+try:
+    from types import MappingProxyType
+except ImportError:  # pragma no cover
+    class MappingProxyType(Mapping):
+
+        """
+        Read-only view of a dictionary for Python 2
+        """
+
+        def __init__(self, mapping):
+            self._mapping = mapping
+
+        def __getitem__(self, key):
+            return self._mapping[key]
+
+        def __iter__(self):
+            return iter(self._mapping)
+
+        def __len__(self):
+            return len(self._mapping)
+
+from . import core
+
+
+__all__ = ['ConcurrentAliases']
+
+
+class ConcurrentAliases(MutableMapping):
+
+    def __init__(self, *args, **kwargs):
+
+        """
+        A copy-on-write alternative to `Aliases()` that can be shared between
+        threads without any locking by the caller.  Aliases and paths are
+        validated exactly like `Aliases()`.
+
+            >>> aliases = ConcurrentAliases(fsnav.DEFAULT_ALIASES)
+            >>> aliases.update(desk='~/Desktop', ghub='~/github')
+            >>> snapshot = aliases.snapshot()
+            >>> del aliases['desk']
+            >>> 'desk' in snapshot
+            True
+
+        Every mutation, including a multi-key `update()`, is applied
+        atomically: either all aliases are validated and published together,
+        or an exception is raised and nothing changes.  Use `snapshot()` to
+        perform several reads against a consistent view.
+        """
+
+        self._lock = threading.Lock()
+        self._published = (MappingProxyType({}), None)
+        self._version = 0
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    def __repr__(self):
+
+        return "%s(%s)" % (self.__class__.__name__, dict(self._snapshot))
+
+    __str__ = __repr__
+
+    def __enter__(self):
+
+        """
+        Included to enable contextmanager syntax - doesn't do any setup
+        """
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+
+        """
+        Included to enable contextmanager syntax - doesn't do any teardown
+        """
+
+        pass
+
+    @property
+    def _snapshot(self):
+
+        return self._published[0]
+
+    @property
+    def _patterns(self):
+
+        return self._published[1]
+
+    def __getitem__(self, alias):
+
+        # The snapshot and its pattern aliases are published together
+        snapshot, patterns = self._published
+        try:
+            return snapshot[alias]
+        except KeyError:
+            if patterns is None:
+                raise
+            return patterns[alias]
+
+    def __contains__(self, alias):
+
+        snapshot, patterns = self._published
+        return alias in snapshot or (patterns is not None and alias in patterns)
+
+    def __iter__(self):
+
+        # Iterate over a snapshot so concurrent writes can't change its size
+        return iter(self._snapshot)
+
+    def __len__(self):
+
+        return len(self._snapshot)
+
+    def get(self, alias, default=None):
+
+        try:
+            return self[alias]
+        except KeyError:
+            return default
+
+    def _publish(self, new, templates=None):
+
+        """
+        Replace the snapshot and pattern aliases.  Must be called while
+        holding the lock.  Like `Aliases()`, pattern aliases are kept out of
+        the snapshot and matched by a separate `Aliases()` instance.
+        """
+
+        patterns = None
+        if templates:
+            patterns = core.Aliases()
+            patterns._update_validated(templates)
+        self._published = (MappingProxyType(new), patterns)
+        self._version += 1
+
+    def patterns(self):
+
+        """
+        Get the pattern aliases and their path templates
+
+        Returns
+        -------
+        dict
+        """
+
+        patterns = self._patterns
+        return {} if patterns is None else patterns.patterns()
+
+    @property
+    def version(self):
+
+        """
+        Incremented every time a new snapshot is published.
+
+        Returns
+        -------
+        int
+        """
+
+        return self._version
+
+    def snapshot(self):
+
+        """
+        Get a read-only view of the aliases that will never change.  Like
+        `Aliases.as_dict()`, pattern aliases aren't included.
+
+        Returns
+        -------
+        mapping
+        """
+
+        return self._snapshot
+
+    def __setitem__(self, alias, path):
+
+        """
+        Add or replace an alias.  See `Aliases.__setitem__()` for validation.
+
+        Raises
+        ------
+        KeyError
+            Invalid alias.
+        ValueError
+            Invalid path.
+
+        Returns
+        -------
+        None
+        """
+
+        self.update(((alias, path),))
+
+    def __delitem__(self, alias):
+
+        with self._lock:
+            new = dict(self._snapshot)
+            templates = self.patterns()
+            if core.is_pattern(alias):
+                del templates[alias]
+            else:
+                del new[alias]
+            self._publish(new, templates)
+
+    def update(self, alias_iterable=None, **alias_path):
+
+        """
+        Atomically add or replace several aliases.  All aliases are validated
+        before any of them are published.
+
+        Returns
+        -------
+        None
+        """
+
+        # Validate outside the lock so slow filesystems don't block other writers
+        staged = core.Aliases(alias_iterable, **alias_path)
+        with self._lock:
+            new = dict(self._snapshot)
+            new.update(staged.as_dict())
+            templates = self.patterns()
+            templates.update(staged.patterns())
+            self._publish(new, templates)
+
+    def clear(self):
+
+        """
+        Atomically remove all aliases
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._publish({})
+
+    def as_dict(self):
+
+        """
+        Return the current aliases and paths as an actual dictionary
+
+        Returns
+        -------
+        dict
+        """
+
+        return dict(self._snapshot)
+
+    def to_aliases(self):
+
+        """
+        Copy the current aliases into a regular `Aliases()` instance without
+        validating them again.
+
+        Returns
+        -------
+        Aliases
+        """
+
+        snapshot, patterns = self._published
+        aliases = core.Aliases()
+        aliases._update_validated(snapshot)
+        if patterns is not None:
+            aliases._update_validated(patterns.patterns())
+        return aliases
+
+    def copy(self):
+
+        """
+        Creates a copy of `ConcurrentAliases()` and all contained aliases and
+        paths
+
+        Returns
+        -------
+        ConcurrentAliases
+        """
+
+        snapshot, patterns = self._published
+        other = ConcurrentAliases()
+        other._publish(dict(snapshot), None if patterns is None else patterns.patterns())
+        return other
+
+    def user_defined(self):
+
+        """
+        Extract user-defined aliases from the current snapshot
+
+        Returns
+        -------
+        Aliases
+        """
+
+        return self.to_aliases().user_defined()
+
+    def default(self):
+
+        """
+        Extract aliases defined by FS Nav on import from the current snapshot
+
+        Returns
+        -------
+        Aliases
+        """
+
+        return self.to_aliases().default()
@@ -3,11 +3,16 @@ Unittests for: fsnav.core
 """
 
 
+import json
 import os
+import pickle
 import re
+import shutil
+import tempfile
 import unittest
 
 from fsnav import core
+from fsnav.testing import SlowFilesystem
 
 
 class TestAliases(unittest.TestCase):
@@ -156,6 +161,31 @@ class TestAliases(unittest.TestCase):
             self.assertEqual(aliases['home'], self.homedir)
             self.assertEqual(aliases['desk'], self.deskdir)
 
+    def test_pickle(self):
+        aliases = core.Aliases({'home': self.homedir, 'desk': self.deskdir})
+        data = pickle.dumps(aliases, pickle.HIGHEST_PROTOCOL)
+
+        # Unpickling doesn't validate anything
+        with SlowFilesystem(sleep=False) as fs:
+            other = pickle.loads(data)
+        self.assertEqual([], fs.calls)
+        self.assertIsInstance(other, core.Aliases)
+        self.assertDictEqual(aliases, other)
+
+    def test_to_bytes(self):
+        aliases = core.Aliases({'home': self.homedir, 'desk': self.deskdir, 'd2': self.deskdir})
+        data = aliases.to_bytes()
+        self.assertLess(len(data), len(json.dumps(aliases)))
+        with SlowFilesystem(sleep=False) as fs:
+            other = core.Aliases.from_bytes(data)
+        self.assertEqual([], fs.calls)
+        self.assertIsInstance(other, core.Aliases)
+        self.assertDictEqual(aliases, other)
+
+        self.assertEqual({}, core.Aliases.from_bytes(core.Aliases().to_bytes()))
+        self.assertRaises(ValueError, core.Aliases.from_bytes, b'garbage')
+        self.assertRaises(ValueError, core.Aliases.from_bytes, data[:-len(self.homedir) - 3])
+
 
 class TestDefaultAliases(unittest.TestCase):
 
@@ -179,3 +209,366 @@ class TestDefaultAliases(unittest.TestCase):
                 re.match(core.ALIAS_REGEX, alias), msg="Alias='{}'".format(alias))
             self.assertTrue(
                 os.path.isdir(path) and os.access(path, os.X_OK), msg="Path='{}'".format(path))
+
+
+class TestShardedAliases(unittest.TestCase):
+
+    def setUp(self):
+        self.homedir = os.path.expanduser('~')
+        self.shard_dir = tempfile.mkdtemp()
+        for namespace in ('infra', 'web'):
+            with open(core.shard_path(self.shard_dir, namespace), 'w') as f:
+                json.dump({core.CONFIGFILE_ALIAS_SECTION: {'logs': self.homedir}}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.shard_dir)
+
+    def test_namespaced_alias(self):
+        aliases = core.Aliases()
+        aliases['infra:logs'] = self.homedir
+        self.assertEqual(self.homedir, aliases['infra:logs'])
+        for invalid in ('infra:', ':logs', 'in fra:logs', 'infra:logs:x'):
+            self.assertRaises(KeyError, aliases.__setitem__, invalid, self.homedir)
+
+    def test_load_trusted(self):
+        missing = os.path.join(self.shard_dir, 'missing')
+        with open(core.shard_path(self.shard_dir, 'dead'), 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {
+                'gone': missing, 'ok': '~', 'bad name': self.homedir, 'none': None}}, f)
+        aliases = core.ShardedAliases(self.shard_dir)
+        with SlowFilesystem(sleep=False, functions=('isdir', 'access')) as fs:
+            self.assertEqual(self.homedir, aliases['dead:ok'])
+        self.assertEqual([], fs.calls)
+        self.assertEqual(missing, aliases['dead:gone'])
+        self.assertNotIn('dead:bad name', aliases)
+        self.assertNotIn('dead:none', aliases)
+
+    def test_load_on_demand(self):
+        aliases = core.ShardedAliases(self.shard_dir, home=self.homedir)
+        self.assertEqual(['infra', 'web'], aliases.namespaces())
+        self.assertEqual([], aliases.loaded_namespaces())
+        self.assertEqual(self.homedir, aliases['infra:logs'])
+        self.assertEqual(['infra'], aliases.loaded_namespaces())
+        self.assertIn('web:logs', aliases)
+        self.assertIsNone(aliases.get('web:nope'))
+        self.assertNotIn('nope:logs', aliases)
+        self.assertRaises(KeyError, aliases.__getitem__, 'nope:logs')
+
+    def test_iter_all(self):
+        aliases = core.ShardedAliases(self.shard_dir, home=self.homedir)
+        expected = {'home': self.homedir, 'infra:logs': self.homedir, 'web:logs': self.homedir}
+        self.assertDictEqual(expected, dict(aliases.iter_all()))
+        self.assertEqual(['infra', 'web'], aliases.loaded_namespaces())
+
+    def test_copy(self):
+        aliases = core.ShardedAliases(self.shard_dir)
+        aliases['infra:other'] = self.homedir
+        other = aliases.copy()
+        self.assertIsInstance(other, core.ShardedAliases)
+        self.assertDictEqual(aliases, other)
+        self.assertEqual(['infra'], other.loaded_namespaces())
+
+    def test_pickle(self):
+        aliases = core.ShardedAliases(self.shard_dir, home=self.homedir)
+        aliases.load_namespace('infra')
+        other = pickle.loads(pickle.dumps(aliases))
+        self.assertIsInstance(other, core.ShardedAliases)
+        self.assertDictEqual(aliases, other)
+        self.assertEqual(self.shard_dir, other.shard_dir)
+        self.assertEqual(['infra'], other.loaded_namespaces())
+        self.assertEqual(self.homedir, other['web:logs'])
+
+    def test_from_bytes(self):
+        aliases = core.ShardedAliases(self.shard_dir, home=self.homedir)
+        aliases.load_namespace('infra')
+        other = core.ShardedAliases.from_bytes(aliases.to_bytes(), self.shard_dir)
+        self.assertDictEqual(aliases, other)
+        self.assertEqual(['infra'], other.loaded_namespaces())
+
+    def test_no_shard_dir(self):
+        aliases = core.ShardedAliases(None)
+        self.assertEqual([], aliases.namespaces())
+        self.assertNotIn('infra:logs', aliases)
+
+
+class TestLayeredAliases(unittest.TestCase):
+
+    def setUp(self):
+        self.homedir = os.path.expanduser('~')
+        self.tempdir = tempfile.mkdtemp()
+        self.shard_dir = os.path.join(self.tempdir, 'shards')
+        os.mkdir(self.shard_dir)
+        with open(core.shard_path(self.shard_dir, 'infra'), 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {'logs': self.homedir}}, f)
+        self.default = core.Aliases(core.DEFAULT_ALIASES)
+        self.configfile = core.ShardedAliases(
+            self.shard_dir, home=self.tempdir, __cfg__=self.homedir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_precedence(self):
+        aliases = core.LayeredAliases(
+            default=self.default, discovered={'repo': self.tempdir}, configfile=self.configfile)
+        self.assertEqual(self.tempdir, aliases['home'])
+        self.assertEqual(core.LAYER_CONFIGFILE, aliases.layer_of('home'))
+        self.assertEqual(core.LAYER_DISCOVERED, aliases.layer_of('repo'))
+        self.assertIsNone(aliases.layer_of('__nope__'))
+        self.assertNotIn('__nope__', aliases)
+        self.assertRaises(KeyError, aliases.__getitem__, '__nope__')
+        self.assertEqual(self.homedir, aliases['infra:logs'])
+
+        # Layers are used directly instead of being copied
+        self.assertIs(self.default, aliases.layer(core.LAYER_DEFAULT))
+        expected = dict(core.DEFAULT_ALIASES, home=self.tempdir, __cfg__=self.homedir,
+                        repo=self.tempdir, **{'infra:logs': self.homedir})
+        self.assertDictEqual(expected, dict(aliases))
+        self.assertEqual(len(expected), len(aliases))
+
+    def test_setitem_delitem(self):
+        aliases = core.LayeredAliases(default=self.default, configfile=self.configfile)
+        aliases['__runtime__'] = self.homedir
+        self.assertEqual(core.LAYER_RUNTIME, aliases.layer_of('__runtime__'))
+        self.assertRaises(ValueError, aliases.__setitem__, '__bad__', '/__nope__')
+
+        # Deleting removes the alias from the runtime and configfile layers
+        aliases['home'] = self.homedir
+        del aliases['home']
+        self.assertEqual(self.default['home'], aliases['home'])
+        self.assertNotIn('home', self.configfile)
+        self.assertRaises(KeyError, aliases.__delitem__, 'home')
+
+        # Namespaces are loaded before writing so the shard isn't truncated
+        aliases['infra:other'] = self.homedir
+        self.assertEqual(['infra'], aliases.loaded_namespaces())
+        self.assertIn('infra:logs', aliases.user_defined())
+
+    def test_update_validated(self):
+        aliases = core.LayeredAliases(configfile=self.configfile)
+        aliases._update_validated({'infra:other': self.homedir, 'svc-{n}': '/srv/{n}'})
+        self.assertEqual(['infra'], aliases.loaded_namespaces())
+        self.assertIn('infra:logs', aliases.user_defined())
+        self.assertEqual({'svc-{n}': '/srv/{n}'}, aliases.patterns())
+
+    def test_user_defined_default(self):
+        self.configfile['desk'] = core.DEFAULT_ALIASES.get('desk', self.homedir)
+        aliases = core.LayeredAliases(
+            default=self.default, discovered={'repo': self.tempdir}, configfile=self.configfile)
+        with SlowFilesystem() as fs:
+            user_defined = aliases.user_defined()
+            default = aliases.default()
+        self.assertEqual([], fs.calls)
+        self.assertIsInstance(user_defined, core.Aliases)
+        self.assertDictEqual({'home': self.tempdir, '__cfg__': self.homedir}, user_defined)
+        expected = dict(core.DEFAULT_ALIASES)
+        expected.pop('home', None)
+        self.assertDictEqual(expected, default)
+
+    def test_copy(self):
+        aliases = core.LayeredAliases(default=self.default, configfile=self.configfile)
+        aliases['__runtime__'] = self.homedir
+        other = aliases.copy()
+        del other['__cfg__']
+        del other['__runtime__']
+        self.assertIn('__cfg__', aliases)
+        self.assertIn('__runtime__', aliases)
+        self.assertIs(self.default, other.layer(core.LAYER_DEFAULT))
+        self.assertIsInstance(other.layer(core.LAYER_CONFIGFILE), core.ShardedAliases)
+
+    def test_iter_all(self):
+        aliases = core.LayeredAliases(default=self.default, configfile=self.configfile)
+        expected = dict(core.DEFAULT_ALIASES, home=self.tempdir, __cfg__=self.homedir,
+                        **{'infra:logs': self.homedir})
+        self.assertDictEqual(expected, dict(aliases.iter_all()))
+        self.assertEqual(['infra'], aliases.namespaces())
+
+
+class TestAliasPatterns(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        for name in ('api', 'auth', 'web'):
+            os.mkdir(os.path.join(self.tempdir, name))
+        open(os.path.join(self.tempdir, 'notes'), 'w').close()
+        self.template = os.path.join(self.tempdir, '{name}')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_pattern(self):
+        pattern = core.AliasPattern('svc-{name}', self.template)
+        self.assertEqual(os.path.join(self.tempdir, 'x'), pattern.match('svc-x'))
+        self.assertIsNone(pattern.match('svc-'))
+        self.assertIsNone(pattern.match('svc-a/b'))
+        self.assertEqual(
+            [('svc-api', os.path.join(self.tempdir, 'api')),
+             ('svc-auth', os.path.join(self.tempdir, 'auth'))],
+            list(pattern.enumerate('svc-a')))
+        self.assertEqual(3, len(list(pattern.enumerate())))
+        for invalid in ('svc', 'svc-{a}-{b}', 'svc {name}', 'svc-{name'):
+            self.assertRaises(KeyError, core.AliasPattern, invalid, self.template)
+        self.assertRaises(ValueError, core.AliasPattern, 'svc-{name}', self.tempdir)
+
+    def test_lazy_validation(self):
+        aliases = core.Aliases()
+        with SlowFilesystem() as fs:
+            aliases['svc-{name}'] = self.template
+        self.assertEqual([], fs.calls)
+        self.assertEqual([], list(aliases))
+        self.assertDictEqual({'svc-{name}': self.template}, aliases.patterns())
+
+        with SlowFilesystem() as fs:
+            self.assertEqual(os.path.join(self.tempdir, 'web'), aliases['svc-web'])
+        self.assertEqual([os.path.join(self.tempdir, 'web')], fs.paths('isdir'))
+        self.assertIsNone(aliases.get('svc-nope'))
+
+        # Membership doesn't validate paths
+        with SlowFilesystem() as fs:
+            self.assertIn('svc-api', aliases)
+            self.assertIn('svc-nope', aliases)
+            self.assertIn('svc-{name}', aliases)
+            self.assertNotIn('other', aliases)
+        self.assertEqual([], fs.calls)
+
+        # Concrete aliases take precedence
+        aliases['svc-web'] = self.tempdir
+        self.assertEqual(self.tempdir, aliases['svc-web'])
+        self.assertEqual(['svc-api', 'svc-auth'],
+                         [a for a, _ in aliases.enumerate_patterns('svc-')])
+
+        del aliases['svc-{name}']
+        self.assertNotIn('svc-api', aliases)
+
+    def test_round_trip(self):
+        aliases = core.Aliases(home=self.tempdir)
+        aliases['svc-{name}'] = self.template
+        for other in (aliases.copy(), aliases.user_defined(), pickle.loads(pickle.dumps(aliases)),
+                      core.Aliases.from_bytes(aliases.to_bytes())):
+            self.assertDictEqual(aliases.patterns(), other.patterns())
+            self.assertEqual(os.path.join(self.tempdir, 'api'), other['svc-api'])
+
+    def test_layered(self):
+        configfile = core.ShardedAliases(None)
+        configfile['svc-{name}'] = self.template
+        aliases = core.LayeredAliases(configfile=configfile)
+        self.assertEqual(os.path.join(self.tempdir, 'api'), aliases['svc-api'])
+        self.assertEqual(core.LAYER_CONFIGFILE, aliases.layer_of('svc-api'))
+        self.assertDictEqual({'svc-{name}': self.template}, aliases.user_defined().patterns())
+        self.assertEqual(3, len(list(aliases.enumerate_patterns())))
+        other = aliases.copy()
+        del other['svc-{name}']
+        self.assertNotIn('svc-api', other)
+        self.assertIn('svc-api', aliases)
+
+
+class TestValidatePaths(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dirs = []
+        for name in ('a', 'b', 'c', 'd'):
+            self.dirs.append(os.path.join(self.tempdir, name))
+            os.mkdir(self.dirs[-1])
+        self.executable = os.path.join(self.tempdir, 'run')
+        with open(self.executable, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(self.executable, 0o755)
+        self.missing = os.path.join(self.tempdir, 'missing')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_batch(self):
+        paths = self.dirs + [self.executable, self.missing, self.tempdir]
+        with SlowFilesystem(sleep=False, functions=('isdir', 'access', 'scandir')) as fs:
+            valid = core.validate_paths(paths)
+        self.assertEqual(set(p for p in paths if core.validate_path(p)), valid)
+        self.assertEqual(set(self.dirs + [self.executable, self.tempdir]), valid)
+
+        # One listing for the shared parent and individual checks for
+        # everything that isn't a directory in the listing
+        self.assertEqual([self.tempdir], fs.paths('scandir'))
+        self.assertEqual(
+            sorted([self.executable, self.missing, self.tempdir]), sorted(fs.paths('isdir')))
+
+    def test_small_groups(self):
+        with SlowFilesystem(sleep=False, functions=('isdir', 'access', 'scandir')) as fs:
+            self.assertEqual(set(self.dirs[:2]), core.validate_paths(self.dirs[:2]))
+        self.assertEqual([], fs.paths('scandir'))
+
+    def test_update(self):
+        aliases = core.Aliases()
+        with SlowFilesystem(sleep=False, functions=('isdir', 'access', 'scandir')) as fs:
+            aliases.update(dict(('alias%s' % i, p) for i, p in enumerate(self.dirs)))
+        self.assertEqual(len(self.dirs), len(aliases))
+        self.assertEqual([], fs.paths('isdir'))
+
+        # Aliases before the first invalid path are still added
+        aliases = core.Aliases()
+        pairs = [('a', self.dirs[0]), ('b', self.missing), ('c', self.dirs[1])]
+        self.assertRaises(ValueError, aliases.update, pairs)
+        self.assertEqual(['a'], list(aliases))
+
+
+class TestValidationPolicies(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.mounts = dict(
+            (name, os.path.join(self.tempdir, name)) for name in ('nfs', 'sshfs', 'auto', 'my disk'))
+        for path in self.mounts.values():
+            os.mkdir(path)
+        mountinfo = os.path.join(self.tempdir, 'mountinfo')
+        with open(mountinfo, 'w') as f:
+            f.write('22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw\n')
+            for i, (name, fstype) in enumerate(
+                    [('nfs', 'nfs4'), ('sshfs', 'fuse.sshfs'), ('auto', 'autofs'),
+                     ('my disk', 'xfs')]):
+                f.write('%s 22 0:%s / %s rw - %s server:/export rw\n' % (
+                    30 + i, 50 + i, self.mounts[name].replace(' ', '\\040'), fstype))
+
+        original = core._mount_table
+        self.addCleanup(setattr, core, '_mount_table', original)
+        self.addCleanup(core.set_validation_policies)
+        core._mount_table = core.read_mountinfo(mountinfo)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_read_mountinfo(self):
+        self.assertEqual('nfs4', core._mount_table[self.mounts['nfs']])
+        self.assertEqual('xfs', core._mount_table[self.mounts['my disk']])
+        self.assertEqual({}, core.read_mountinfo(os.path.join(self.tempdir, 'missing')))
+
+    def test_classify_path(self):
+        for name, expected in (('nfs', core.MOUNT_REMOTE), ('sshfs', core.MOUNT_REMOTE),
+                               ('auto', core.MOUNT_AUTOFS), ('my disk', core.MOUNT_LOCAL)):
+            mount_point, _, mount_class = core.classify_path(
+                os.path.join(self.mounts[name], 'sub', 'dir'))
+            self.assertEqual(self.mounts[name], mount_point)
+            self.assertEqual(expected, mount_class)
+        self.assertEqual(('/', 'ext4', core.MOUNT_LOCAL), core.classify_path(self.tempdir))
+
+    def test_policies(self):
+        missing = dict((name, os.path.join(p, 'missing')) for name, p in self.mounts.items())
+        with SlowFilesystem(sleep=False, functions=('isdir', 'access', 'scandir')) as fs:
+            self.assertTrue(core.validate_path(missing['nfs']))
+            self.assertTrue(core.validate_path(missing['auto'], lookup=True))
+            self.assertEqual(set([missing['nfs'], missing['auto']]),
+                             core.validate_paths([missing['nfs'], missing['auto']]))
+        self.assertEqual([], fs.paths('isdir'))
+
+        # Lazy paths are checked when an alias is used
+        self.assertFalse(core.validate_path(missing['nfs'], lookup=True))
+        self.assertEqual(set(), core.validate_paths([missing['nfs']], lookup=True))
+        self.assertFalse(core.validate_path(missing['my disk']))
+
+        # Mount points take precedence over filesystem types and classes
+        core.set_validation_policies({'remote': 'eager', 'fuse.sshfs': 'never',
+                                      self.mounts['my disk']: 'lazy'})
+        self.assertFalse(core.validate_path(missing['nfs']))
+        self.assertTrue(core.validate_path(missing['sshfs'], lookup=True))
+        self.assertTrue(core.validate_path(missing['my disk']))
+        self.assertEqual(core.POLICY_EAGER, core.validation_policy(self.tempdir))
+
+        self.assertRaises(ValueError, core.set_validation_policies, {'remote': 'sometimes'})
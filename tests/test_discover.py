@@ -0,0 +1,65 @@
+"""
+Unittests for: fsnav.discover
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from fsnav import discover
+
+
+class TestDiscover(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ('work/fsnav/.git', 'personal/fsnav/.hg', 'other/.git',
+                     'other/nested/.git', 'deep/a/b/c/d/e/.git', '.hidden/x/.git'):
+            os.makedirs(os.path.join(self.root, path))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_scan(self):
+        repos, state, listed = discover.scan([self.root], max_depth=4)
+        self.assertEqual(
+            [os.path.join(self.root, p) for p in ('other', 'personal/fsnav', 'work/fsnav')],
+            repos)
+        self.assertEqual(len(state['dirs']), listed)
+
+    def test_incremental(self):
+        _, state, _ = discover.scan([self.root])
+
+        # Nothing changed so nothing is listed
+        repos, state, listed = discover.scan([self.root], state=state)
+        self.assertEqual(0, listed)
+        self.assertEqual(3, len(repos))
+
+        # Only the modified directory is listed
+        time.sleep(0.01)
+        os.makedirs(os.path.join(self.root, 'work', 'new', '.git'))
+        repos, state, listed = discover.scan([self.root], state=state)
+        self.assertEqual(2, listed)
+        self.assertIn(os.path.join(self.root, 'work', 'new'), repos)
+
+        # Deleted repositories disappear
+        shutil.rmtree(os.path.join(self.root, 'other'))
+        repos, state, _ = discover.scan([self.root], state=state)
+        self.assertNotIn(os.path.join(self.root, 'other'), repos)
+        self.assertNotIn(os.path.join(self.root, 'other'), state['dirs'])
+
+    def test_repo_aliases(self):
+        repos = ['/src/work/fsnav', '/src/personal/fsnav', '/src/other', '/x/work/fsnav']
+        self.assertEqual(
+            {'other': '/src/other', 'personal-fsnav': '/src/personal/fsnav'},
+            discover.repo_aliases(repos))
+
+    def test_state(self):
+        path = os.path.join(self.root, 'state')
+        self.assertIsNone(discover.load_state(path))
+        _, state, _ = discover.scan([self.root])
+        discover.save_state(path, state)
+        self.assertEqual(state, discover.load_state(path))
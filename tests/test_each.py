@@ -0,0 +1,56 @@
+"""
+Unittests for: fsnav.each
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from fsnav import each
+
+
+class TestEach(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.paths = {}
+        for name in ('a', 'b', 'c'):
+            self.paths[name] = os.path.join(self.tempdir, name)
+            os.mkdir(self.paths[name])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_select(self):
+        aliases = {'ga': self.paths['a'], 'gb': self.paths['b'], 'c': self.paths['c'],
+                   'zdup': self.paths['a'] + os.sep}
+        self.assertEqual(
+            [('c', self.paths['c']), ('ga', self.paths['a']), ('gb', self.paths['b'])],
+            each.select(aliases.items()))
+        self.assertEqual([('gb', self.paths['b']), ('c', self.paths['c'])],
+                         each.select(aliases.items(), names=['gb', 'c']))
+        self.assertEqual(['ga', 'gb'], [a for a, _ in each.select(aliases.items(), pattern='g*')])
+        self.assertRaises(KeyError, each.select, aliases.items(), names=['nope'])
+
+    def test_run(self):
+        targets = sorted(self.paths.items()) + [('missing', os.path.join(self.tempdir, 'x'))]
+        lines = []
+        command = [sys.executable, '-c', 'import os; print(os.getcwd()); print("done")']
+        results = each.run(targets, command, workers=2,
+                           on_line=lambda a, l: lines.append((a, l)))
+
+        self.assertEqual(['a', 'b', 'c', 'missing'], [r['alias'] for r in results])
+        self.assertEqual([0, 0, 0, None], [r['returncode'] for r in results])
+        self.assertIsNotNone(results[-1]['error'])
+        self.assertTrue(all(r['elapsed'] >= 0 for r in results))
+        for name, path in self.paths.items():
+            self.assertEqual(
+                [os.path.realpath(path), 'done'],
+                [os.path.realpath(l) if l != 'done' else l for a, l in lines if a == name])
+
+    def test_run_shell(self):
+        results = each.run([('a', self.paths['a'])], 'exit 2', shell=True)
+        self.assertEqual(2, results[0]['returncode'])
@@ -12,8 +12,22 @@ from fsnav import fg_tools
 class TestFunctions(unittest.TestCase):
 
     def test_generate_nix_functions(self):
-        self.assertIsInstance(
-            fg_tools._generate_nix_functions(fsnav.Aliases({'home': '~/'})), list)
+        code = fg_tools._generate_nix_functions(fsnav.Aliases({'home': '~/'}))
+        self.assertIsInstance(code, list)
+
+        # Failed lookups don't change directory
+        self.assertIn('&& [ -n "$_fsnav_dir" ] && %s "$_fsnav_dir"' % fg_tools.CD_FUNCTION,
+                      code[-1])
+
+    def test_generate_nix_helpers(self):
+        code = fg_tools._generate_nix_helpers()
+        self.assertTrue(code[0].startswith('function %s()' % fg_tools.CD_FUNCTION))
+        self.assertIn('history record', code[0])
+        self.assertIn('back|forward', code[1])
+        self.assertIn('go)', code[1])
+        code = fg_tools._generate_nix_helpers(history=False)
+        self.assertEqual(1, len(code))
+        self.assertNotIn('history', code[0])
 
     def test_generate_windows_functions(self):
         self.assertRaises(NotImplementedError, fg_tools._generate_windows_functions, None)
@@ -22,4 +36,30 @@ class TestFunctions(unittest.TestCase):
         self.assertRaises(NotImplementedError, fg_tools._generate_windows_startup_code)
 
     def test_generate_nix_startup_code(self):
-        self.assertIsInstance(fg_tools._generate_nix_startup_code(), str)
+        code = fg_tools._generate_nix_startup_code()
+        self.assertIsInstance(code, str)
+        self.assertIn('eval "$(', code)
+
+    def test_generate_nix_dispatcher(self):
+        aliases = fsnav.Aliases({'home': '~/'})
+        code = fg_tools._generate_nix_dispatcher(aliases, history=False)
+        self.assertIsInstance(code, list)
+        self.assertEqual(fg_tools._generate_nix_helpers(history=False), code[:1])
+        self.assertEqual(4, len(code))
+        self.assertTrue(code[2].startswith(fg_tools.DISPATCHER_TABLE))
+        self.assertIn('[home]=', code[2])
+
+        # The table is only indexed with a non-empty alias
+        self.assertLess(code[3].index('[ -z "$1" ]'), code[3].index('[$1]'))
+
+        # Hot aliases get a thin wrapper around the dispatcher
+        code = fg_tools._generate_nix_dispatcher(aliases, hot=['home'], dispatcher='go')
+        self.assertEqual('function home() { go home ; }', code[-1])
+
+    def test_generate_windows_dispatcher(self):
+        self.assertRaises(NotImplementedError, fg_tools._generate_windows_dispatcher, None)
+
+    def test_generate_nix_dispatch_startup_code(self):
+        code = fg_tools._generate_nix_startup_code(dispatch=True)
+        self.assertIsInstance(code, str)
+        self.assertIn('--dispatch', code)
@@ -0,0 +1,91 @@
+"""
+Unittests for: fsnav.fuzzy
+"""
+
+
+import unittest
+
+from fsnav import fuzzy
+
+
+class TestScore(unittest.TestCase):
+
+    def test_no_match(self):
+        self.assertIsNone(fuzzy.score('xyz', 'FS-Nav'))
+        self.assertIsNone(fuzzy.score('vanfs', 'FS-Nav'))
+        self.assertEqual(0, fuzzy.score('', 'FS-Nav'))
+
+    def test_word_boundaries(self):
+        self.assertGreater(fuzzy.score('fsn', 'FS-Nav'), fuzzy.score('fsn', 'filesystem-notes'))
+        self.assertGreater(fuzzy.score('fn', 'fooNav'), fuzzy.score('fn', 'foonav'))
+        self.assertGreater(
+            fuzzy.score('nav', '/src/nav'), fuzzy.score('nav', '/src/canavan'))
+
+    def test_consecutive(self):
+        self.assertGreater(fuzzy.score('abc', 'xabcx'), fuzzy.score('abc', 'xaxbxcx'))
+
+    def test_shortest_window(self):
+        # Only the shortest window ending at the first match is scored
+        self.assertEqual(fuzzy.score('ab', 'xab'), fuzzy.score('ab', 'a-----xab'))
+
+    def test_lowercase_changes_length(self):
+        # 'İ'.lower() is two characters, which must not shift the bonuses
+        self.assertEqual(fuzzy.score('b', u'Ia-b'), fuzzy.score('b', u'\u0130a-b'))
+        self.assertEqual(fuzzy.score('ab', u'Ia-b'), fuzzy.score('ab', u'\u0130a-b'))
+        self.assertEqual(
+            fuzzy.score('b', u'Ia-b'), fuzzy.score('b', u'\u0130a-b', u'\u0130a-b'.lower()))
+
+
+class TestCharMask(unittest.TestCase):
+
+    def test_case_insensitive(self):
+        self.assertEqual(fuzzy.char_mask('FS-Nav'), fuzzy.char_mask('fs-nav'))
+
+    def test_subset(self):
+        self.assertEqual(0, fuzzy.char_mask('nav') & ~fuzzy.char_mask('FS-Nav'))
+        self.assertNotEqual(0, fuzzy.char_mask('navz') & ~fuzzy.char_mask('FS-Nav'))
+
+    def test_no_shared_state(self):
+        bits = dict(fuzzy._BITS)
+        self.assertEqual(fuzzy.char_mask(u'\xe9-/'), fuzzy.char_mask(u'\xe9-/'))
+        self.assertEqual(bits, fuzzy._BITS)
+
+
+class TestFuzzyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.aliases = {
+            'ghub': '/Users/wursterk/github',
+            'fsnav': '/Users/wursterk/github/FS-Nav',
+            'desk': '/Users/wursterk/Desktop',
+            'dl': '/Users/wursterk/Downloads',
+        }
+        self.index = fuzzy.FuzzyIndex(self.aliases)
+
+    def test_search(self):
+        self.assertEqual(4, len(self.index))
+        matches = self.index.search('gh')
+        self.assertEqual('ghub', matches[0][1])
+        self.assertEqual(self.aliases['ghub'], matches[0][2])
+        self.assertEqual('fsnav', self.index.search('FSN')[0][1])
+
+    def test_path_matches(self):
+        # 'load' only matches the path
+        self.assertEqual([('dl', self.aliases['dl'])],
+                         [(a, p) for _, a, p in self.index.search('load')])
+
+    def test_limit(self):
+        self.assertEqual(1, len(self.index.search('u', limit=1)))
+        self.assertEqual(4, len(self.index.search('u', limit=None)))
+        self.assertEqual([], self.index.search('qqq'))
+
+    def test_ties(self):
+        index = fuzzy.FuzzyIndex({'abc': '/x', 'ab': '/y', 'aab': '/z'})
+        self.assertEqual(['ab', 'abc'], [a for _, a, _ in index.search('ab', limit=2)])
+
+    def test_search_function(self):
+        self.assertEqual(self.index.search('desk'), fuzzy.search(self.aliases, 'desk'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unittests for: fsnav.health
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fsnav import health
+from fsnav.testing import SlowFilesystem
+
+
+class TestRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.aliases = {}
+        for name in ('a', 'b', 'c', 'd', 'e'):
+            self.aliases[name] = os.path.join(self.tempdir, name)
+            os.mkdir(self.aliases[name])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_bounded_slices(self):
+        state = None
+        seen = []
+        for _ in range(3):
+            with SlowFilesystem(sleep=False) as fs:
+                state, checked = health.revalidate(self.aliases, state, budget=2)
+            self.assertEqual(2, len(fs.calls))
+            seen.extend(checked)
+        # Wraps around after the last alias
+        self.assertEqual(['a', 'b', 'c', 'd', 'e', 'a'], seen)
+        self.assertEqual({}, state['dead'])
+
+    def test_marks_dead(self):
+        os.rmdir(self.aliases['b'])
+        state, _ = health.revalidate(self.aliases, budget=3)
+        self.assertEqual({'b': self.aliases['b']}, state['dead'])
+
+        # Dead entries are kept until the alias is checked again, removed, or changed
+        state, _ = health.revalidate(self.aliases, state, budget=1)
+        self.assertEqual({'b': self.aliases['b']}, state['dead'])
+        os.mkdir(self.aliases['b'])
+        state, _ = health.revalidate(self.aliases, state, budget=5)
+        self.assertEqual({}, state['dead'])
+
+        state['dead']['c'] = self.aliases['c']
+        del self.aliases['c']
+        state, _ = health.revalidate(self.aliases, state, budget=0)
+        self.assertEqual({}, state['dead'])
+
+    def test_cursor_survives_removed_alias(self):
+        state, checked = health.revalidate(self.aliases, budget=2)
+        self.assertEqual(['a', 'b'], checked)
+        del self.aliases['b']
+        state, checked = health.revalidate(self.aliases, state, budget=2)
+        self.assertEqual(['c', 'd'], checked)
+
+    def test_state_file(self):
+        path = os.path.join(self.tempdir, 'health')
+        self.assertEqual({'cursor': None, 'dead': {}}, health.load_state(path))
+        state, _ = health.revalidate(self.aliases, budget=1)
+        health.save_state(path, state)
+        self.assertEqual(state, health.load_state(path))
+        with open(path, 'w') as f:
+            f.write('not json')
+        self.assertEqual({'cursor': None, 'dead': {}}, health.load_state(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
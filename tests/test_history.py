@@ -0,0 +1,91 @@
+"""
+Unittests for: fsnav.history
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from fsnav import history
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'history')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_back_forward(self):
+        h = history.History(self.path)
+        self.assertIsNone(h.back())
+        for d in ('/a', '/b', '/c'):
+            h.record(d)
+        self.assertIsNone(h.forward())
+        self.assertEqual('/b', h.back())
+        self.assertEqual('/a', h.back())
+        self.assertIsNone(h.back())
+        self.assertEqual('/c', h.forward(2))
+        self.assertEqual([('/a', False), ('/b', False), ('/c', True)], h.entries())
+
+    def test_record_discards_forward(self):
+        h = history.History(self.path)
+        for d in ('/a', '/b', '/c'):
+            h.record(d)
+        h.back(2)
+        h.record('/d')
+        self.assertEqual([('/a', False), ('/d', True)], h.entries())
+        self.assertIsNone(h.forward())
+
+        # Recording the current directory again does nothing
+        h.record('/d')
+        self.assertEqual(2, len(h.entries()))
+
+    def test_ring_buffer(self):
+        h = history.History(self.path, capacity=3)
+        for i in range(10):
+            h.record('/%s' % i)
+        self.assertEqual(['/7', '/8', '/9'], [p for p, _ in h.entries()])
+        self.assertEqual('/7', h.back(2))
+        self.assertIsNone(h.back())
+
+        # Going back and recording must not resurrect overwritten slots
+        h.record('/x')
+        self.assertEqual(['/7', '/x'], [p for p, _ in h.entries()])
+
+        # The file never grows
+        size = os.path.getsize(self.path)
+        for i in range(10):
+            h.record('/%s' % i)
+        self.assertEqual(size, os.path.getsize(self.path))
+
+    @unittest.skipIf(sys.version_info[0] < 3, "surrogateescape requires Python 3")
+    def test_undecodable_path(self):
+        h = history.History(self.path)
+        path = os.fsdecode(b'/tmp/caf\xe9')
+        h.record(path)
+        h.record('/a')
+        self.assertEqual(path, h.back())
+
+    def test_too_long(self):
+        h = history.History(self.path)
+        self.assertRaises(ValueError, h.record, '/' + 'a' * history.SLOT_SIZE)
+
+    def test_concurrent(self):
+        def worker(n):
+            h = history.History(self.path, capacity=1000)
+            for i in range(50):
+                h.record('/%s/%s' % (n, i))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(200, len(history.History(self.path).entries()))
@@ -0,0 +1,86 @@
+"""
+Unittests for: fsnav.importers
+"""
+
+
+import io
+import json
+import os
+import unittest
+
+from fsnav import importers
+
+
+class TestReaders(unittest.TestCase):
+
+    def test_alias_from_path(self):
+        self.assertEqual('FS_Nav', importers.alias_from_path('/a/FS Nav/'))
+        self.assertEqual('', importers.alias_from_path('/a/...'))
+
+    def test_read_autojump(self):
+        f = io.StringIO(u'10.5\t/a/proj\n\ngarbage\n')
+        self.assertEqual(
+            [(1, 'proj', '/a/proj', 10.5), (3, None, 'garbage', None)],
+            list(importers.read_autojump(f)))
+
+    def test_read_z(self):
+        f = io.StringIO(u'/a/my|dir|12|1400000000\nbad\n')
+        self.assertEqual(
+            [(1, 'my_dir', '/a/my|dir', 12.0), (2, None, 'bad', None)],
+            list(importers.read_z(f)))
+
+    def test_read_csv(self):
+        f = io.StringIO(u'alias,path\nhome,/a\n\nbad\n')
+        self.assertEqual(
+            [(2, 'home', '/a', None), (4, None, 'bad', None)], list(importers.read_csv(f)))
+
+    def test_read_json(self):
+        for content in ({'home': '/a'}, {'aliases': {'home': '/a'}}):
+            f = io.StringIO(json.dumps(content))
+            self.assertEqual([(None, 'home', '/a', None)], list(importers.read_json(f)))
+        self.assertRaises(ValueError, list, importers.read_json(io.StringIO(u'[]')))
+
+
+class TestImportAliases(unittest.TestCase):
+
+    def setUp(self):
+        self.homedir = os.path.expanduser('~')
+
+    def test_import_aliases(self):
+        records = [
+            (1, 'h', '~', None),
+            (2, 'bad alias', self.homedir, None),
+            (3, 'missing', '/.----III_DO_NOT-EX-X-IST', None),
+            (4, 'exists', self.homedir, None),
+            (5, None, 'garbage', None),
+            (6, 'null', None, None),
+            (7, 'number', 1, None),
+            (8, 'list', [self.homedir], None),
+            (9, 'empty', '', None),
+        ]
+        accepted, rejected = importers.import_aliases(records, existing={'exists'}, batch_size=2)
+        self.assertEqual({'h': self.homedir}, accepted)
+        self.assertEqual(
+            [(2, 'invalid alias'), (3, "can't access path"), (4, 'alias exists'),
+             (5, 'unparseable record'), (6, 'invalid path'), (7, 'invalid path'),
+             (8, 'invalid path'), (9, 'invalid path')],
+            sorted((r[0], r[3]) for r in rejected))
+
+        accepted, _ = importers.import_aliases(records, existing={'exists'}, replace=True)
+        self.assertIn('exists', accepted)
+
+    def test_weights(self):
+        tmp = os.path.dirname(os.path.abspath(__file__))
+        records = [(1, 'd', tmp, 1.0), (2, 'd', self.homedir, 5.0), (3, 'd', tmp, 2.0)]
+        accepted, rejected = importers.import_aliases(records)
+        self.assertEqual({'d': self.homedir}, accepted)
+        self.assertEqual([1, 3], sorted(r[0] for r in rejected))
+
+        # Without weights the last record wins
+        records = [(1, 'd', tmp, None), (2, 'd', self.homedir, None)]
+        accepted, rejected = importers.import_aliases(records)
+        self.assertEqual({'d': self.homedir}, accepted)
+
+    def test_namespace(self):
+        accepted, _ = importers.import_aliases([(1, 'h', self.homedir, None)], namespace='ns')
+        self.assertEqual({'ns:h': self.homedir}, accepted)
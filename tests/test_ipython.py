@@ -0,0 +1,94 @@
+"""
+Unittests for: fsnav.ipython
+"""
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from fsnav import core
+from fsnav import history
+from fsnav import ipython
+
+try:
+    from IPython.core.error import UsageError
+except ImportError:  # pragma no cover
+    UsageError = None
+
+
+class _Shell(object):
+
+    def __init__(self):
+        self.magics = {}
+
+    def register_magic_function(self, func, magic_kind, magic_name):
+        self.magics[magic_name] = func
+
+
+class TestNavSession(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tempdir = tempfile.mkdtemp()
+        self.target = os.path.join(self.tempdir, 'target')
+        os.makedirs(os.path.join(self.target, 'sub'))
+        self.configfile = os.path.join(self.tempdir, 'fsnav')
+        self.historyfile = os.path.join(self.tempdir, 'history')
+        self.write({'__t__': self.target})
+        self.session = ipython.NavSession(self.configfile, historyfile=self.historyfile)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tempdir)
+
+    def write(self, aliases):
+        with open(self.configfile, 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: aliases}, f)
+
+    def test_chdir(self):
+        self.assertEqual(self.target, self.session.chdir('__t__'))
+        self.assertEqual(os.path.realpath(self.target), os.path.realpath(os.getcwd()))
+        self.session.chdir('@__t__/sub')
+        self.assertEqual(os.path.join(self.target, 'sub'), os.getcwd())
+        self.assertRaises(KeyError, self.session.chdir, '__nope__')
+        self.assertEqual(
+            [self.target, os.path.join(self.target, 'sub')],
+            [p for p, _ in history.History(self.historyfile).entries()])
+
+    def test_reload(self):
+        self.session.resolve('__t__')
+        self.session.resolve('__t__')
+        self.assertEqual(1, self.session.loads)
+
+        self.write({'__t__': self.target, '__u__': self.tempdir + os.sep})
+        self.assertEqual(self.tempdir + os.sep, self.session.resolve('__u__'))
+        self.assertEqual(2, self.session.loads)
+
+        # Editing a namespace shard also reloads
+        shard_dir = core.shard_dir(self.configfile)
+        os.mkdir(shard_dir)
+        with open(core.shard_path(shard_dir, 'ns'), 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {'t': self.target}}, f)
+        self.assertEqual(self.target, self.session.resolve('ns:t'))
+        self.assertEqual(3, self.session.loads)
+        with open(core.shard_path(shard_dir, 'ns'), 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {'t': self.tempdir}}, f)
+        self.assertEqual(self.tempdir, self.session.resolve('ns:t'))
+        self.assertEqual(4, self.session.loads)
+
+    @unittest.skipIf(UsageError is None, "IPython is not installed")
+    def test_magics(self):
+        shell = _Shell()
+        ipython.load_ipython_extension(shell)
+        self.addCleanup(ipython.unload_ipython_extension, shell)
+        self.assertEqual(['nav', 'nav_aliases'], sorted(shell.magics))
+
+        ipython._session = self.session
+        shell.magics['nav']('__t__')
+        self.assertEqual(self.target, os.getcwd())
+        for line in ('', '__nope__', '__t__/missing'):
+            self.assertRaises(UsageError, shell.magics['nav'], line)
+        shell.magics['nav_aliases']('__t')
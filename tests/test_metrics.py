@@ -0,0 +1,97 @@
+"""
+Unittests for: fsnav.metrics
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fsnav import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'metrics')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_flush(self):
+        m = metrics.Metrics(self.path)
+        m.increment('lookups', 2)
+        m.increment('misses')
+        m.alias('home')
+        m.alias('home')
+        m.observe('get', 0.001)
+        m.observe('get', 0.3)
+        m.flush()
+
+        # Updates add to the existing values
+        m.increment('lookups')
+        m.alias('desk')
+        m.flush()
+        size = os.path.getsize(self.path)
+
+        data = metrics.Metrics(self.path).read()
+        self.assertEqual(
+            {'lookups': 3, 'misses': 1, 'validations': 0, 'cache_hits': 0}, data['counters'])
+        self.assertEqual({'home': 2, 'desk': 1}, data['aliases'])
+        self.assertEqual(2, data['commands']['get']['count'])
+        self.assertAlmostEqual(0.301, data['commands']['get']['sum'])
+        self.assertEqual(
+            [1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0], data['commands']['get']['buckets'])
+
+        # The file never grows
+        for i in range(100):
+            m.alias('alias%s' % i)
+        m.flush()
+        self.assertEqual(size, os.path.getsize(self.path))
+
+    def test_full_table(self):
+        m = metrics.Metrics(self.path)
+        for i in range(metrics.ALIAS_SLOTS + 10):
+            m.alias('alias%s' % i)
+        m.alias('x' * 100)
+        m.flush()
+        self.assertEqual(metrics.ALIAS_SLOTS, len(m.read()['aliases']))
+
+    def test_unknown_counter(self):
+        self.assertRaises(ValueError, metrics.Metrics(self.path).increment, 'nope')
+
+    def test_not_a_metrics_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 100)
+        self.assertRaises(ValueError, metrics.Metrics(self.path).read)
+
+    def test_truncated(self):
+        m = metrics.Metrics(self.path)
+        m.increment('lookups')
+        m.flush()
+        with open(self.path, 'r+b') as f:
+            f.truncate(100)
+        self.assertRaises(ValueError, m.read)
+
+    def test_to_prometheus(self):
+        m = metrics.Metrics(self.path)
+        m.increment('lookups')
+        m.alias('we"ird')
+        m.observe('config path', 0.02)
+        m.flush()
+        text = metrics.to_prometheus(m.read())
+        self.assertIn('# TYPE fsnav_lookups_total counter\nfsnav_lookups_total 1\n', text)
+        self.assertIn('fsnav_alias_lookups_total{alias="we\\"ird"} 1\n', text)
+        self.assertIn(
+            'fsnav_command_duration_seconds_bucket{command="config path",le="0.01"} 0\n', text)
+        self.assertIn(
+            'fsnav_command_duration_seconds_bucket{command="config path",le="0.025"} 1\n', text)
+        self.assertIn(
+            'fsnav_command_duration_seconds_bucket{command="config path",le="+Inf"} 1\n', text)
+        self.assertIn('fsnav_command_duration_seconds_count{command="config path"} 1\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,13 @@ FS Nav unittests for utility: nav
 """
 
 
+import io
 import json
 import os
+import shutil
+import sys
 import tempfile
+import threading
 import unittest
 
 import click
@@ -14,7 +18,13 @@ from nose.tools import assert_raises
 
 import fsnav
 import fsnav.core
+import fsnav.discover
+import fsnav.health
+import fsnav.prompt
+import fsnav.snapshot
+import fsnav.store
 from fsnav import nav
+from fsnav.testing import SlowFilesystem
 
 
 class TestNav(unittest.TestCase):
@@ -23,6 +33,8 @@ class TestNav(unittest.TestCase):
         self.runner = CliRunner()
         self.configfile = tempfile.NamedTemporaryFile(mode='r+')
         self.default_aliases = fsnav.Aliases(fsnav.core.DEFAULT_ALIASES)
+        health_path = fsnav.health.health_path(self.configfile.name)
+        self.addCleanup(lambda: os.path.exists(health_path) and os.remove(health_path))
 
     def tearDown(self):
         self.configfile.close()
@@ -35,6 +47,44 @@ class TestNav(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
         self.assertEqual(self.default_aliases[a], result.output.strip())
 
+    def test_get_batch(self):
+
+        # nav get ${alias} ${alias} ; nav get --stdin [-0]
+        home = self.default_aliases['home']
+        args = ['--no-load-configfile', 'get']
+        result = self.runner.invoke(nav.main, args + ['home', 'home'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('%s\n%s\n' % (home, home), result.output)
+
+        result = self.runner.invoke(nav.main, args + ['home', '--stdin'], input='BAD\nhome\n')
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Unrecognized alias: 'BAD'", result.output)
+        self.assertEqual(
+            [home, '', home], [l for l in result.output.splitlines() if not l.startswith('Error')])
+
+        result = self.runner.invoke(nav.main, args + ['--stdin', '-0'], input='home\0home')
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('%s\0%s\0' % (home, home), result.output)
+
+        result = self.runner.invoke(nav.main, args)
+        self.assertNotEqual(0, result.exit_code)
+
+    def test_read_records_streams(self):
+
+        # NUL separated records are answered before the writer closes the pipe
+        read_fd, write_fd = os.pipe()
+        stream = io.open(read_fd, 'r')
+        self.addCleanup(stream.close)
+        self.addCleanup(os.close, write_fd)
+        os.write(write_fd, b'home\0caf\xc3\xa9\0par')
+        records = nav._read_records(stream, '\0')
+        received = []
+        reader = threading.Thread(target=lambda: received.extend([next(records), next(records)]))
+        reader.daemon = True
+        reader.start()
+        reader.join(5)
+        self.assertEqual(['home', u'caf\xe9'], received)
+
     def test_startup_generate(self):
 
         # nav startup generate
@@ -44,6 +94,20 @@ class TestNav(unittest.TestCase):
         expected = sorted(fsnav.fg_tools.generate_functions(self.default_aliases))
         self.assertEqual(actual, expected)
 
+    def test_startup_generate_dispatch(self):
+
+        # nav startup generate --dispatch --hot ${alias}
+        result = self.runner.invoke(nav.main, [
+            '--no-load-configfile', 'startup', 'generate', '--dispatch', '--hot', 'home'])
+        self.assertEqual(result.exit_code, 0)
+        expected = fsnav.fg_tools.generate_dispatcher(self.default_aliases, hot=['home'])
+        self.assertEqual(result.output.strip(), ' ; '.join(expected))
+
+        # Hot aliases must exist
+        result = self.runner.invoke(nav.main, [
+            '--no-load-configfile', 'startup', 'generate', '--dispatch', '--hot', '__nope__'])
+        self.assertNotEqual(result.exit_code, 0)
+
     def test_startup_profile(self):
 
         # nav startup profile
@@ -51,6 +115,11 @@ class TestNav(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
         self.assertEqual(result.output.strip(), fsnav.fg_tools.startup_code.strip())
 
+        result = self.runner.invoke(
+            nav.main, ['--no-load-configfile', 'startup', 'profile', '--dispatch'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output.strip(), fsnav.fg_tools.dispatch_startup_code.strip())
+
     def test_config_default(self):
 
         # nav config default
@@ -157,10 +226,542 @@ class TestNav(unittest.TestCase):
             '__h__', '-no'])
         self.assertEqual(1, result.exit_code)
 
+    def test_config_store(self):
+
+        # nav config store
+        home = os.path.expanduser('~')
+        dead = os.path.join(home, '__fsnav_missing__')
+        self.configfile.write(json.dumps(
+            {fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__h__': home, '__dead__': dead}}))
+        self.configfile.flush()
+        store_path = fsnav.store.store_path(self.configfile.name)
+        self.addCleanup(lambda: os.path.exists(store_path) and os.remove(store_path))
+
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'config', 'store'])
+        self.assertEqual(result.exit_code, 0)
+        with fsnav.store.AliasStore(store_path) as store:
+            self.assertEqual({'__h__': home, '__dead__': dead}, dict(store.items()))
+
+        # Dead paths are trusted like any other configfile alias until used
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'get', '__dead__'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('no longer exists', result.output)
+
+        # Lookups are answered from the store and fall back to the defaults
+        for alias, expected in (('__h__', home), ('home', self.default_aliases['home'])):
+            result = self.runner.invoke(nav.main, [
+                '--configfile', self.configfile.name, 'get', alias])
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual(expected, result.output.strip())
+
+        # Config commands keep the store in sync
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'config', 'addalias', '___h___=%s' % home])
+        self.assertEqual(result.exit_code, 0)
+        with fsnav.store.AliasStore(store_path) as store:
+            self.assertTrue(store.is_fresh(self.configfile.name))
+            self.assertEqual(
+                {'__h__': home, '___h___': home, '__dead__': dead}, dict(store.items()))
+
+        # Including commands that only change other sections
+        for command in (['reporoots', home], ['validation', 'autofs=never']):
+            result = self.runner.invoke(nav.main, [
+                '--configfile', self.configfile.name, 'config'] + command)
+            self.assertEqual(result.exit_code, 0)
+            with fsnav.store.AliasStore(store_path) as store:
+                self.assertTrue(store.is_fresh(self.configfile.name))
+                self.assertEqual(3, len(store))
+        self.addCleanup(fsnav.core.set_validation_policies)
+
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'config', 'store', '--remove'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertFalse(os.path.exists(store_path))
+
+    def test_prompt(self):
+
+        # nav prompt ${path}
+        home = os.path.expanduser('~')
+        path = os.path.join(home, 'some', 'dir')
+        result = self.runner.invoke(nav.main, ['--no-load-configfile', 'prompt', path])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            fsnav.prompt.PathIndex(self.default_aliases).shorten(path), result.output.strip())
+
+        # Aliases from the store override the defaults
+        self.configfile.write(
+            json.dumps({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'h': home}}))
+        self.configfile.flush()
+        store_path = fsnav.store.store_path(self.configfile.name)
+        self.addCleanup(lambda: os.path.exists(store_path) and os.remove(store_path))
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'config', 'store'])
+        self.assertEqual(result.exit_code, 0)
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'prompt', path])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('@h/some/dir', result.output.strip())
+
+    def test_history(self):
+
+        # nav history record ${path} ; nav back ; nav forward ; nav history
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        args = ['--no-load-configfile', '--historyfile', os.path.join(tempdir, 'history')]
+
+        result = self.runner.invoke(nav.main, args + ['back'])
+        self.assertNotEqual(result.exit_code, 0)
+
+        for path in ('/a', '/b'):
+            result = self.runner.invoke(nav.main, args + ['history', 'record', path])
+            self.assertEqual(result.exit_code, 0)
+
+        result = self.runner.invoke(nav.main, args + ['back'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('/a', result.output.strip())
+
+        result = self.runner.invoke(nav.main, args + ['history'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(['* /a', '  /b'], result.output.splitlines())
+
+        result = self.runner.invoke(nav.main, args + ['forward'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('/b', result.output.strip())
+
+    def test_config_import(self):
+
+        # nav config import ${file} --format csv
+        home = os.path.expanduser('~')
+        infile = tempfile.NamedTemporaryFile(mode='w', suffix='.csv')
+        self.addCleanup(infile.close)
+        infile.write('alias,path\n__h__,%s\nbad alias,%s\n' % (home, home))
+        infile.flush()
+
+        args = ['--configfile', self.configfile.name, 'config', 'import', infile.name,
+                '--format', 'csv']
+        result = self.runner.invoke(nav.main, args + ['--dry-run'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual('', self.configfile.read())
+
+        result = self.runner.invoke(nav.main, args)
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Imported 1 aliases, rejected 1', result.output)
+        self.assertDictEqual(
+            {fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__h__': home}}, json.load(self.configfile))
+
+        # Existing aliases in the namespace's shard are kept with --replace
+        shard_dir = fsnav.core.shard_dir(self.configfile.name)
+        os.mkdir(shard_dir)
+        self.addCleanup(shutil.rmtree, shard_dir)
+        with open(fsnav.core.shard_path(shard_dir, 'infra'), 'w') as f:
+            json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'c': home}}, f)
+        infile.seek(0)
+        infile.truncate()
+        infile.write('alias,path\ninfra:b,%s\n' % home)
+        infile.flush()
+        result = self.runner.invoke(nav.main, args + ['--replace'])
+        self.assertEqual(result.exit_code, 0)
+        with open(fsnav.core.shard_path(shard_dir, 'infra')) as f:
+            self.assertDictEqual({'b': home, 'c': home},
+                                 json.load(f)[fsnav.core.CONFIGFILE_ALIAS_SECTION])
+
+    def test_repos(self):
+
+        # nav config reporoots ${root} ; nav config rescan ; nav config repos
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(root, 'zzfsnavrepo', '.git'))
+        for path in (fsnav.discover.repos_path(self.configfile.name),
+                     fsnav.discover.state_path(self.configfile.name)):
+            self.addCleanup(lambda p=path: os.path.exists(p) and os.remove(p))
+        args = ['--no-pretty', '--configfile', self.configfile.name]
+
+        result = self.runner.invoke(nav.main, args + ['config', 'reporoots', root])
+        self.assertEqual(result.exit_code, 0)
+        result = self.runner.invoke(nav.main, args + ['config', 'rescan'])
+        self.assertEqual(result.exit_code, 0)
+
+        result = self.runner.invoke(nav.main, args + ['config', 'repos'])
+        self.assertEqual(result.exit_code, 0)
+        expected = {'zzfsnavrepo': os.path.join(root, 'zzfsnavrepo')}
+        self.assertEqual(expected, json.loads(result.output))
+
+        result = self.runner.invoke(nav.main, args + ['get', 'zzfsnavrepo'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(expected['zzfsnavrepo'], result.output.strip())
+
+        # Discovered paths are trusted when loading but checked on lookup
+        with SlowFilesystem(sleep=False) as fs:
+            result = self.runner.invoke(nav.main, args + ['--revalidate', '0', 'aliases'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('zzfsnavrepo', json.loads(result.output))
+        self.assertNotIn(expected['zzfsnavrepo'], fs.paths('isdir'))
+        shutil.rmtree(os.path.join(root, 'zzfsnavrepo'))
+        result = self.runner.invoke(nav.main, args + ['get', 'zzfsnavrepo'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('no longer exists', result.output)
+        os.makedirs(os.path.join(root, 'zzfsnavrepo', '.git'))
+
+        # Discovered aliases are not written to the configfile
+        result = self.runner.invoke(nav.main, args + [
+            'config', 'addalias', '__h__=%s' % os.path.expanduser('~')])
+        self.assertEqual(result.exit_code, 0)
+        with open(self.configfile.name) as f:
+            content = json.load(f)
+        self.assertEqual(['__h__'], list(content[fsnav.core.CONFIGFILE_ALIAS_SECTION]))
+        self.assertEqual([root], content[fsnav.core.CONFIGFILE_REPO_ROOTS_SECTION])
+
+    def test_namespaces(self):
+
+        # nav get ${namespace}:${alias}
+        home = os.path.expanduser('~')
+        shard_dir = fsnav.core.shard_dir(self.configfile.name)
+        self.addCleanup(shutil.rmtree, shard_dir, True)
+
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name,
+            'config', 'addalias', 'infra:logs=%s' % home, '__h__=%s' % home])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            {fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__h__': home}}, json.load(self.configfile))
+        with open(fsnav.core.shard_path(shard_dir, 'infra')) as f:
+            self.assertEqual({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'logs': home}}, json.load(f))
+
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'get', 'infra:logs'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(home, result.output.strip())
+
+        # All shards are listed
+        result = self.runner.invoke(nav.main, [
+            '--no-pretty', '--configfile', self.configfile.name, 'aliases'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(home, json.loads(result.output)['infra:logs'])
+
+        # Deleting the last alias in a namespace removes the shard
+        result = self.runner.invoke(nav.main, [
+            '--configfile', self.configfile.name, 'config', 'deletealias', 'infra:logs'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertFalse(os.path.exists(fsnav.core.shard_path(shard_dir, 'infra')))
+
+    def test_prune(self):
+
+        # nav config prune
+        home = os.path.expanduser('~')
+        dead = tempfile.mkdtemp()
+        os.rmdir(dead)
+        self.configfile.write(json.dumps(
+            {fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__h__': home, '__dead__': dead}}))
+        self.configfile.flush()
+        args = ['--configfile', self.configfile.name]
+
+        # Dead aliases don't break other commands but can't be used
+        result = self.runner.invoke(nav.main, args + ['--revalidate', '0', 'get', '__h__'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(home, result.output.strip())
+        result = self.runner.invoke(nav.main, args + ['--revalidate', '0', 'get', '__dead__'])
+        self.assertNotEqual(0, result.exit_code)
+        self.assertIn('nav config prune', result.output)
+
+        # Nothing has been revalidated yet
+        result = self.runner.invoke(nav.main, args + ['--revalidate', '0', 'config', 'prune'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Pruned 0 aliases', result.output)
+
+        # The previous calls revalidated both aliases
+        result = self.runner.invoke(nav.main, args + ['config', 'prune', '--dry-run'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Pruned: __dead__=%s' % dead, result.output)
+        self.configfile.seek(0)
+        self.assertIn('__dead__', json.load(self.configfile)[fsnav.core.CONFIGFILE_ALIAS_SECTION])
+
+        result = self.runner.invoke(nav.main, args + ['--revalidate', '0', 'config', 'prune'])
+        self.assertEqual(result.exit_code, 0)
+        self.configfile.seek(0)
+        self.assertEqual(
+            {'__h__': home}, json.load(self.configfile)[fsnav.core.CONFIGFILE_ALIAS_SECTION])
+
+    def test_prune_full(self):
+        dead = tempfile.mkdtemp()
+        os.rmdir(dead)
+        self.configfile.write(
+            json.dumps({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__dead__': dead}}))
+        self.configfile.flush()
+        result = self.runner.invoke(nav.main, [
+            '--revalidate', '0', '--configfile', self.configfile.name,
+            'config', 'prune', '--full'])
+        self.assertEqual(result.exit_code, 0)
+        self.configfile.seek(0)
+        self.assertEqual({}, json.load(self.configfile)[fsnav.core.CONFIGFILE_ALIAS_SECTION])
+
+    def test_metrics(self):
+
+        # nav --metricsfile ${path} metrics
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        args = ['--no-load-configfile', '--metricsfile', os.path.join(tempdir, 'metrics')]
+
+        result = self.runner.invoke(nav.main, ['--no-load-configfile', 'metrics'])
+        self.assertNotEqual(0, result.exit_code)
+
+        for alias in ('home', 'home', 'BAAAAAAAAAD-ALIAS'):
+            self.runner.invoke(nav.main, args + ['get', alias])
+        result = self.runner.invoke(nav.main, args + ['config', 'path'])
+        self.assertEqual(result.exit_code, 0)
+
+        result = self.runner.invoke(nav.main, args + ['metrics', '--format', 'json'])
+        self.assertEqual(result.exit_code, 0)
+        data = json.loads(result.output)
+        self.assertEqual(3, data['counters']['lookups'])
+        self.assertEqual(1, data['counters']['misses'])
+        self.assertEqual({'home': 2}, data['aliases'])
+        self.assertEqual(3, data['commands']['get']['count'])
+        self.assertEqual(1, data['commands']['config path']['count'])
+
+        output = os.path.join(tempdir, 'fsnav.prom')
+        result = self.runner.invoke(nav.main, args + ['metrics', '--output', output])
+        self.assertEqual(result.exit_code, 0)
+        with open(output) as f:
+            self.assertIn('fsnav_lookups_total 3\n', f.read())
+
+        # Corrupt files are reported instead of raising an exception
+        with open(os.path.join(tempdir, 'metrics'), 'r+b') as f:
+            f.truncate(100)
+        result = self.runner.invoke(nav.main, args + ['metrics'])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn('Corrupt metrics file', result.output)
+        self.assertNotIsInstance(result.exception, ValueError)
+
+    def test_go(self):
+
+        # nav go ${query}
+        home = os.path.expanduser('~')
+        dead = tempfile.mkdtemp()
+        os.rmdir(dead)
+        self.configfile.write(json.dumps(
+            {fsnav.core.CONFIGFILE_ALIAS_SECTION: {'zzfsnavhome': home, 'zzfsnavdead': dead}}))
+        self.configfile.flush()
+        args = ['--no-load-default', '--configfile', self.configfile.name]
+
+        # Dead aliases are skipped
+        result = self.runner.invoke(nav.main, args + ['go', 'zzfsnav'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(home, result.output.strip())
+
+        result = self.runner.invoke(nav.main, args + ['go', 'zzfsnav', '--top', '5'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            ['zzfsnavdead\t%s' % dead, 'zzfsnavhome\t%s' % home],
+            sorted(result.output.strip().splitlines()))
+
+        result = self.runner.invoke(nav.main, args + ['go', 'qqqqqqqq'])
+        self.assertNotEqual(0, result.exit_code)
+
+    def test_lazy_context(self):
+
+        # Subcommands only load the aliases they declare they need
+        self.configfile.write(json.dumps({
+            fsnav.core.CONFIGFILE_ALIAS_SECTION: {'invalid alias': os.path.expanduser('~')}}))
+        self.configfile.seek(0)
+        args = ['--configfile', self.configfile.name]
+
+        result = self.runner.invoke(nav.main, args + ['aliases'])
+        self.assertNotEqual(result.exit_code, 0)
+
+        with SlowFilesystem() as fs:
+            result = self.runner.invoke(nav.main, args + ['config', 'path'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output.strip(), self.configfile.name)
+        self.assertEqual(fs.paths('isdir'), [])
+
+        result = self.runner.invoke(nav.main, args + ['--no-pretty', 'config', 'default'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertDictEqual(json.loads(result.output), self.default_aliases.default())
+        self.assertFalse(os.path.exists(fsnav.health.health_path(self.configfile.name)))
+
+    def test_no_revalidation(self):
+
+        # Prompt and completion don't revalidate configfile aliases
+        self.configfile.write(json.dumps({
+            fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__h__': os.path.expanduser('~')}}))
+        self.configfile.seek(0)
+        health = fsnav.health.health_path(self.configfile.name)
+        repos = fsnav.discover.repos_path(self.configfile.name)
+        for path in (health, repos):
+            self.addCleanup(lambda p=path: os.path.exists(p) and os.remove(p))
+        with open(repos, 'w') as f:
+            json.dump({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__repo__': tempfile.gettempdir()}}, f)
+        # click checks that an existing history file is readable
+        args = ['--configfile', self.configfile.name,
+                '--historyfile', self.configfile.name + '.history']
+
+        for command in (['complete', '__'], ['prompt', os.path.expanduser('~')]):
+            with SlowFilesystem(sleep=False, functions=('isdir', 'access', 'scandir')) as fs:
+                result = self.runner.invoke(nav.main, args + command)
+            self.assertEqual(result.exit_code, 0)
+            self.assertFalse(os.path.exists(health))
+
+        # Prompt doesn't check any paths, only whether the configfile is readable
+        self.assertEqual([], fs.paths('isdir'))
+        self.assertEqual(set([self.configfile.name]), set(fs.paths('access')))
+        result = self.runner.invoke(nav.main, args + ['aliases'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue(os.path.exists(health))
+
+        # The health file is only rewritten when the state changes
+        os.utime(health, (0, 0))
+        result = self.runner.invoke(nav.main, args + ['aliases'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(0, os.stat(health).st_mtime)
+
+    def test_serve_stale(self):
+
+        # nav --serve-stale get ${alias}
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        path_ = os.path.join(tempdir, 'stale')
+        os.mkdir(path_)
+        self.configfile.write(json.dumps({fsnav.core.CONFIGFILE_ALIAS_SECTION: {'__s__': path_}}))
+        self.configfile.flush()
+        snapshot_path = fsnav.snapshot.snapshot_path(self.configfile.name)
+        self.addCleanup(lambda: os.path.exists(snapshot_path) and os.remove(snapshot_path))
+
+        spawned = []
+        spawn_refresh = fsnav.snapshot.spawn_refresh
+        fsnav.snapshot.spawn_refresh = lambda args, lock: spawned.append(args)
+        self.addCleanup(setattr, fsnav.snapshot, 'spawn_refresh', spawn_refresh)
+
+        args = ['--configfile', self.configfile.name, '--serve-stale']
+        result = self.runner.invoke(nav.main, args + ['config', 'snapshot'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue(os.path.exists(snapshot_path))
+
+        # The last validated path is returned without touching the filesystem
+        os.rmdir(path_)
+        with SlowFilesystem() as fs:
+            result = self.runner.invoke(nav.main, args + ['get', '__s__'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(path_, result.output.strip())
+        self.assertEqual([], fs.paths('isdir'))
+        self.assertEqual([], spawned)
+
+        result = self.runner.invoke(nav.main, args + ['startup', 'generate'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('function __s__()', result.output)
+
+        # Too stale, so validate before answering and refresh in the background
+        result = self.runner.invoke(nav.main, args + ['--max-staleness', '-1', 'get', '__s__'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('no longer exists', result.output)
+        self.assertEqual(['config', 'snapshot'], spawned[0][-2:])
+
+    def test_pattern_aliases(self):
+
+        # nav config addalias 'svc-{name}=/srv/services/{name}'
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        for name in ('api', 'auth'):
+            os.mkdir(os.path.join(tempdir, name))
+        template = os.path.join(tempdir, '{name}')
+        args = ['--configfile', self.configfile.name]
+
+        result = self.runner.invoke(
+            nav.main, args + ['config', 'addalias', 'svc-{name}=%s' % template])
+        self.assertEqual(result.exit_code, 0)
+        with open(self.configfile.name) as f:
+            self.assertDictEqual({'svc-{name}': template},
+                                 json.load(f)[fsnav.core.CONFIGFILE_ALIAS_SECTION])
+
+        result = self.runner.invoke(nav.main, args + ['get', 'svc-api'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(os.path.join(tempdir, 'api'), result.output.strip())
+        result = self.runner.invoke(nav.main, args + ['get', 'svc-nope'])
+        self.assertNotEqual(result.exit_code, 0)
+
+        result = self.runner.invoke(nav.main, args + ['complete', 'svc-'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(['svc-api', 'svc-auth'], result.output.split())
+
+        # Patterns are never revalidated or pruned
+        result = self.runner.invoke(nav.main, args + ['config', 'prune', '--full'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Pruned 0 aliases', result.output)
+
+        # Lookups the store can't answer fall back to the configfile's patterns
+        store = fsnav.store.store_path(self.configfile.name)
+        self.addCleanup(lambda: os.path.exists(store) and os.remove(store))
+        result = self.runner.invoke(nav.main, args + ['config', 'store'])
+        self.assertEqual(result.exit_code, 0)
+        result = self.runner.invoke(nav.main, args + ['get', 'svc-auth'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(os.path.join(tempdir, 'auth'), result.output.strip())
+
     def test_get_invalid_alias(self):
         result = self.runner.invoke(nav.main, ['get', 'BAAAAAAAAAD-ALIAS'])
         self.assertNotEqual(0, result.exit_code)
 
+    def test_each(self):
+
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        for name in ('ea', 'eb'):
+            os.mkdir(os.path.join(tempdir, name))
+        args = ['--configfile', self.configfile.name]
+        for name in ('ea', 'eb'):
+            result = self.runner.invoke(nav.main, args + [
+                'config', 'addalias', '__%s__=%s' % (name, os.path.join(tempdir, name))])
+            self.assertEqual(result.exit_code, 0)
+
+        command = [sys.executable, '-c', 'import os; print(os.getcwd())']
+        result = self.runner.invoke(nav.main, args + ['each', '--match', '__e*', '--'] + command)
+        self.assertEqual(result.exit_code, 0)
+        for name in ('ea', 'eb'):
+            self.assertIn('__%s__ | %s' % (name, os.path.join(tempdir, name)), result.output)
+            self.assertIn('exit 0', result.output)
+
+        result = self.runner.invoke(nav.main, args + [
+            'each', '--alias', '__ea__', '--', sys.executable, '-c', 'raise SystemExit(3)'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('exit 3', result.output)
+
+        result = self.runner.invoke(nav.main, args + ['each', '--alias', '__nope__', '--', 'true'])
+        self.assertNotEqual(result.exit_code, 0)
+
+        # Default aliases like / are only selected by name
+        result = self.runner.invoke(nav.main, args + ['each', '--', 'true'])
+        self.assertNotEqual(result.exit_code, 0)
+        result = self.runner.invoke(nav.main, args + ['each', '--match', '*', '--'] + command)
+        self.assertEqual(result.exit_code, 0)
+        for alias in fsnav.core.DEFAULT_ALIASES:
+            self.assertNotIn('%s |' % alias, result.output)
+
+    def test_validation_policies(self):
+
+        self.addCleanup(fsnav.core.set_validation_policies)
+        args = ['--configfile', self.configfile.name, 'config', 'validation']
+
+        result = self.runner.invoke(nav.main, args + ['remote=never', '/mnt/scratch=lazy'])
+        self.assertEqual(result.exit_code, 0)
+        with open(self.configfile.name) as f:
+            self.assertDictEqual(
+                {'remote': 'never', '/mnt/scratch': 'lazy'},
+                json.load(f)[fsnav.core.CONFIGFILE_VALIDATION_SECTION])
+
+        result = self.runner.invoke(nav.main, args)
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('remote=never', result.output.splitlines())
+        self.assertIn('local=eager', result.output.splitlines())
+
+        result = self.runner.invoke(nav.main, args + ['--remove', '/mnt/scratch'])
+        self.assertEqual(result.exit_code, 0)
+        result = self.runner.invoke(nav.main, args + ['remote=sometimes'])
+        self.assertNotEqual(result.exit_code, 0)
+        with open(self.configfile.name) as f:
+            self.assertDictEqual(
+                {'remote': 'never'}, json.load(f)[fsnav.core.CONFIGFILE_VALIDATION_SECTION])
+
 
 def test_cb_key_val():
     expected = {'key1': 'val1', 'key2': 'val2'}
@@ -0,0 +1,47 @@
+"""
+Unittests for: fsnav.prompt
+"""
+
+
+import os
+import unittest
+
+from fsnav import prompt
+
+
+ALIASES = {
+    'hd': os.sep,
+    'ghub': os.path.join(os.sep, 'home', 'user', 'github'),
+    'github': os.path.join(os.sep, 'home', 'user', 'github') + os.sep,
+    'fsnav': os.path.join(os.sep, 'home', 'user', 'github', 'FS-Nav'),
+}
+
+
+class TestPathIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = prompt.PathIndex(ALIASES)
+
+    def test_longest_prefix(self):
+        self.assertEqual(
+            ('fsnav', os.path.join('fsnav', 'tests')),
+            self.index.longest_prefix(ALIASES['fsnav'] + '/fsnav/tests'))
+        self.assertEqual(('fsnav', ''), self.index.longest_prefix(ALIASES['fsnav'] + os.sep))
+
+        # Only whole components match
+        self.assertEqual(
+            ('ghub', 'FS-Nav-old'), self.index.longest_prefix(ALIASES['ghub'] + '/FS-Nav-old'))
+
+        self.assertEqual(('hd', 'tmp'), self.index.longest_prefix('/tmp'))
+        self.assertIsNone(prompt.PathIndex({}).longest_prefix('/tmp'))
+
+    def test_shorten(self):
+
+        # Shorter aliases are preferred when several point to the same path
+        self.assertEqual('@ghub/other', self.index.shorten(ALIASES['ghub'] + '/other'))
+        self.assertEqual('@hd', self.index.shorten(os.sep))
+        self.assertEqual('relative', prompt.PathIndex({'ghub': ALIASES['ghub']}).shorten('relative'))
+
+    def test_shorten_path(self):
+        self.assertEqual(
+            '@fsnav/docs', prompt.shorten_path(ALIASES['fsnav'] + '/docs', ALIASES))
@@ -0,0 +1,99 @@
+"""
+Unittests for: fsnav.resolver
+"""
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import fsnav
+from fsnav import core
+from fsnav import discover
+from fsnav import resolver
+from fsnav.testing import SlowFilesystem
+
+
+class TestResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.homedir = os.path.expanduser('~')
+        self.aliases = core.Aliases(h=self.homedir)
+        self.resolver = resolver.Resolver(self.aliases)
+
+    def test_resolve(self):
+        self.assertEqual(self.homedir, self.resolver.resolve('h'))
+        self.assertEqual(os.path.join(self.homedir, 'a', 'b'), self.resolver.resolve('h/a/b'))
+        self.assertEqual(os.path.join(self.homedir, 'x'), self.resolver.resolve('@h/x'))
+        self.assertEqual(os.path.join(self.homedir, 'x'), self.resolver.resolve('~/x'))
+        self.assertEqual('/abs/path', self.resolver.resolve('/abs/path'))
+        self.assertEqual('rel/path', self.resolver.resolve('rel/path'))
+        self.assertRaises(KeyError, self.resolver.resolve, '@nope/x')
+
+    def test_pattern(self):
+        self.aliases['hd-{name}'] = os.path.join(self.homedir, '{name}')
+        self.assertEqual('hd-__nope__/x', self.resolver.resolve('hd-__nope__/x'))
+        self.assertRaises(KeyError, self.resolver.resolve, '@hd-__nope__/x')
+
+    def test_environment(self):
+        os.environ['__FSNAV_TEST__'] = 'val'
+        self.addCleanup(os.environ.pop, '__FSNAV_TEST__')
+        self.assertEqual(
+            os.path.join(self.homedir, 'val'), self.resolver.resolve('h/$__FSNAV_TEST__'))
+        self.assertEqual('/tmp/val', self.resolver.resolve('/tmp/${__FSNAV_TEST__}'))
+
+    def test_cache(self):
+        self.resolver.resolve_many(['h/a', 'h/a', 'h/b'])
+        info = self.resolver.cache_info()
+        self.assertEqual((1, 2), (info.hits, info.misses))
+
+        # Changes are only visible after invalidating
+        self.aliases['h'] = os.sep
+        self.assertEqual(os.path.join(self.homedir, 'a'), self.resolver.resolve('h/a'))
+        self.resolver.invalidate()
+        self.assertEqual(os.path.join(os.sep, 'a'), self.resolver.resolve('h/a'))
+        self.resolver.invalidate(core.Aliases())
+        self.assertEqual('h/a', self.resolver.resolve('h/a'))
+
+    def test_fallback_lru_cache(self):
+        calls = []
+        cached = resolver._fallback_lru_cache(maxsize=2)(lambda e: calls.append(e) or e.upper())
+        self.assertEqual(['A', 'B', 'A', 'C', 'B'], [cached(e) for e in 'abacb'])
+        self.assertEqual(['a', 'b', 'c', 'b'], calls)
+        self.assertEqual((1, 4, 2, 2), tuple(cached.cache_info()))
+        cached.cache_clear()
+        self.assertEqual((0, 0, 2, 0), tuple(cached.cache_info()))
+
+
+class TestLoadAliases(unittest.TestCase):
+
+    def test_load_aliases(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        configfile = os.path.join(tempdir, 'fsnav')
+        with open(configfile, 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {
+                '__h__': tempdir, '__bad__': '/.----III_DO_NOT-EX-X-IST', '__null__': None,
+                'bad alias': tempdir}}, f)
+        with open(discover.repos_path(configfile), 'w') as f:
+            json.dump({core.CONFIGFILE_ALIAS_SECTION: {
+                '__repo__': tempdir, '__gone__': '/.----III_DO_NOT-EX-X-IST'}}, f)
+        with SlowFilesystem(sleep=False) as fs:
+            aliases = resolver.load_aliases(configfile)
+        self.assertEqual(tempdir, aliases['__h__'])
+        self.assertNotIn('__bad__', aliases)
+        self.assertNotIn('__null__', aliases)
+        self.assertNotIn('__gone__', aliases)
+        for alias, path in core.DEFAULT_ALIASES.items():
+            self.assertEqual(path, aliases[alias])
+
+        # Same layers as nav and each distinct path is only checked once
+        self.assertEqual(core.LAYER_CONFIGFILE, aliases.layer_of('__h__'))
+        self.assertEqual(core.LAYER_DISCOVERED, aliases.layer_of('__repo__'))
+        self.assertEqual(1, fs.paths('isdir').count(tempdir))
+
+    def test_module_api(self):
+        self.assertEqual(['/x'], fsnav.resolve_many(['/x']))
+        self.assertEqual('/x', fsnav.resolve('/x'))
@@ -0,0 +1,69 @@
+"""
+Unittests for: fsnav.snapshot
+"""
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+from fsnav import snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.configfile = os.path.join(self.tempdir, 'fsnav')
+        with open(self.configfile, 'w') as f:
+            json.dump({'aliases': {'home': self.tempdir}}, f)
+        self.path = snapshot.snapshot_path(self.configfile)
+        self.aliases = {'home': self.tempdir, 'infra:logs': self.tempdir}
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_round_trip(self):
+        snapshot.write_snapshot(self.path, self.aliases, configfile=self.configfile)
+        created, aliases = snapshot.load_snapshot(self.path, self.configfile)
+        self.assertAlmostEqual(time.time(), created, delta=5)
+        self.assertDictEqual(self.aliases, dict(aliases.iter_all()))
+        self.assertEqual(['infra'], aliases.loaded_namespaces())
+
+    def test_mismatch(self):
+        self.assertIsNone(snapshot.load_snapshot(self.path, self.configfile))
+        snapshot.write_snapshot(self.path, self.aliases, configfile=self.configfile)
+        self.assertIsNone(snapshot.load_snapshot(
+            self.path, self.configfile, flags=snapshot.FLAG_NO_LOAD_DEFAULT))
+
+        # Editing the configfile invalidates the snapshot
+        with open(self.configfile, 'a') as f:
+            f.write(' ')
+        self.assertIsNone(snapshot.load_snapshot(self.path, self.configfile))
+
+        with open(self.path, 'wb') as f:
+            f.write(b'garbage')
+        self.assertIsNone(snapshot.load_snapshot(self.path))
+
+    def test_spawn_refresh(self):
+        lock = snapshot.lock_path(self.configfile)
+        args = [sys.executable, '-c', 'import os ; os.remove(%r)' % lock]
+        self.assertTrue(snapshot.spawn_refresh(args, lock))
+
+        # Only one refresh runs at a time
+        self.assertFalse(snapshot.spawn_refresh(args, lock))
+        for _ in range(100):
+            if not os.path.exists(lock):
+                break
+            time.sleep(0.05)
+        self.assertFalse(os.path.exists(lock))
+
+        # Abandoned locks are taken over
+        open(lock, 'w').close()
+        old = time.time() - snapshot.LOCK_TIMEOUT - 1
+        os.utime(lock, (old, old))
+        self.assertTrue(snapshot.spawn_refresh([sys.executable, '-c', ''], lock))
@@ -0,0 +1,102 @@
+"""
+Unittests for: fsnav.store
+"""
+
+
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from fsnav import core
+from fsnav import store
+
+
+class TestAliasStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.configfile = os.path.join(self.tempdir, 'fsnav.json')
+        with open(self.configfile, 'w') as f:
+            f.write('{}')
+        self.path = store.store_path(self.configfile)
+        self.aliases = {'a%s' % i: '/path/%s' % i for i in range(100)}
+        self.aliases['unicode'] = u'/p\xe4th'
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_roundtrip(self):
+        store.write_store(self.path, self.aliases, configfile=self.configfile)
+        with store.AliasStore(self.path) as s:
+            self.assertEqual(len(self.aliases), len(s))
+            for alias, path in self.aliases.items():
+                self.assertIn(alias, s)
+                self.assertEqual(path, s[alias])
+            self.assertEqual(sorted(self.aliases), list(s))
+            self.assertEqual(self.aliases, dict(s.items()))
+
+    @unittest.skipIf(sys.version_info[0] < 3, "surrogateescape requires Python 3")
+    def test_undecodable_path(self):
+        path = os.fsdecode(b'/tmp/caf\xe9')
+        store.write_store(self.path, {'cafe': path})
+        with store.AliasStore(self.path) as s:
+            self.assertEqual(path, s['cafe'])
+            self.assertEqual(('cafe', 'x'), s.longest_prefix(path + '/x'))
+
+    def test_missing(self):
+        store.write_store(self.path, self.aliases)
+        with store.AliasStore(self.path) as s:
+            self.assertNotIn('a', s)
+            self.assertNotIn('zzz', s)
+            self.assertIsNone(s.get('a100'))
+            self.assertRaises(KeyError, s.__getitem__, 'a100')
+
+    def test_empty(self):
+        store.write_store(self.path, {})
+        with store.AliasStore(self.path) as s:
+            self.assertEqual(0, len(s))
+            self.assertNotIn('home', s)
+
+    def test_is_fresh(self):
+        store.write_store(self.path, self.aliases, configfile=self.configfile)
+        with store.AliasStore(self.path) as s:
+            self.assertTrue(s.is_fresh(self.configfile))
+            with open(self.configfile, 'w') as f:
+                f.write('{"aliases": {}}')
+            self.assertFalse(s.is_fresh(self.configfile))
+
+    def test_source_signature(self):
+        st = os.stat(self.configfile)
+        self.assertEqual((st.st_size, core._mtime_ns(st)), store._source_signature(self.configfile))
+        self.assertEqual((0, 0), store._source_signature(self.configfile + '.missing'))
+
+        # Python 2 stat results don't have st_mtime_ns
+        py2_stat = collections.namedtuple('stat_result', ['st_size', 'st_mtime'])(1, 2.5)
+        self.assertEqual(2500000000, core._mtime_ns(py2_stat))
+
+    def test_longest_prefix(self):
+        aliases = {
+            'hd': '/',
+            'ghub': '/home/user/github/',
+            'github': '/home/user/github',
+            'fsnav': '/home/user/github/FS-Nav',
+        }
+        store.write_store(self.path, aliases)
+        with store.AliasStore(self.path) as s:
+            self.assertEqual(('fsnav', 'a/b'), s.longest_prefix('/home/user/github/FS-Nav/a/b'))
+            self.assertEqual(('ghub', ''), s.longest_prefix('/home/user/github'))
+            self.assertEqual(('ghub', 'FS'), s.longest_prefix('/home/user/github/FS'))
+            self.assertEqual(('hd', 'tmp'), s.longest_prefix('/tmp'))
+            self.assertEqual(('hd', ''), s.longest_prefix('/'))
+
+        store.write_store(self.path, {'ghub': '/home/user/github'})
+        with store.AliasStore(self.path) as s:
+            self.assertIsNone(s.longest_prefix('/tmp'))
+
+    def test_invalid(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a store at all, just some bytes')
+        self.assertRaises(ValueError, store.AliasStore, self.path)
@@ -0,0 +1,121 @@
+"""
+Unittests for: fsnav.testing
+"""
+
+
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from fsnav import core
+from fsnav import testing
+
+
+class TestSlowFilesystem(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dirs = []
+        for name in ('a', 'b', 'c'):
+            self.dirs.append(os.path.join(self.tempdir, name))
+            os.mkdir(self.dirs[-1])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_virtual_latency(self):
+        fs = testing.SlowFilesystem(latency=10, sleep=False)
+        start = time.time()
+        with fs:
+            aliases = core.Aliases(a=self.dirs[0], b=self.dirs[1])
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(2, len(aliases))
+        self.assertEqual(20, fs.elapsed)
+        # The os.stat() inside os.path.isdir() is not counted
+        self.assertEqual(sorted(self.dirs[:2]), sorted(fs.paths('isdir')))
+        self.assertEqual([], fs.paths('access'))
+
+    def test_restores_functions(self):
+        isdir, access = os.path.isdir, os.access
+        with testing.SlowFilesystem():
+            self.assertIsNot(isdir, os.path.isdir)
+        self.assertIs(isdir, os.path.isdir)
+        self.assertIs(access, os.access)
+
+    def test_fail(self):
+        fs = testing.SlowFilesystem(sleep=False)
+        fs.add_rule(os.path.join(self.tempdir, 'b'), fail=True)
+        with fs:
+            self.assertTrue(core.validate_path(self.dirs[0]))
+            self.assertFalse(core.validate_path(self.dirs[1]))
+            self.assertRaises(ValueError, core.Aliases, b=self.dirs[1])
+        self.assertEqual(['isdir', 'isdir', 'access', 'isdir', 'access'],
+                         [f for f, _, _ in fs.calls])
+
+    def test_error(self):
+        fs = testing.SlowFilesystem(sleep=False, functions=('stat',))
+        fs.add_rule(self.tempdir + '/*', error=errno.EIO)
+        with fs:
+            with self.assertRaises(OSError) as e:
+                os.stat(self.dirs[2])
+        self.assertEqual(errno.EIO, e.exception.errno)
+
+    def test_rule_latency(self):
+        fs = testing.SlowFilesystem(latency=1, sleep=False)
+        fs.add_rule('*/c', latency=5)
+        with fs:
+            for d in self.dirs:
+                core.validate_path(d)
+        self.assertEqual(7, fs.elapsed)
+
+    def test_hang(self):
+        fs = testing.SlowFilesystem(sleep=False)
+        fs.add_rule('*/a', hang=True)
+        results = []
+        with fs:
+            thread = threading.Thread(
+                target=lambda: results.append(core.validate_path(self.dirs[0])))
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(1, fs.in_flight)
+            fs.release()
+            thread.join()
+        # Hanging calls fail once released
+        self.assertEqual([False], results)
+
+    def test_hang_timeout(self):
+        fs = testing.SlowFilesystem(sleep=False, hang_timeout=0.01)
+        fs.add_rule('*', hang=True)
+        with fs:
+            self.assertFalse(os.path.isdir(self.dirs[0]))
+
+    def test_max_in_flight(self):
+        fs = testing.SlowFilesystem(latency=0.05)
+        with fs:
+            threads = [threading.Thread(target=core.validate_path, args=(d,))
+                       for d in self.dirs]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertGreater(fs.max_in_flight, 1)
+        self.assertEqual(0, fs.in_flight)
+
+    def test_default_aliases(self):
+        fs = testing.SlowFilesystem(sleep=False)
+        fs.add_rule(self.dirs[1], fail=True)
+        with fs:
+            existing = core._existing_aliases(dict(zip(('a', 'b', 'c'), self.dirs)))
+        self.assertEqual({'a': self.dirs[0], 'c': self.dirs[2]}, existing)
+
+    def test_unknown_function(self):
+        self.assertRaises(ValueError, testing.SlowFilesystem, functions=('open',))
+
+
+if __name__ == '__main__':
+    unittest.main()
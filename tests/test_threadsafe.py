@@ -0,0 +1,113 @@
+"""
+Unittests for: fsnav.threadsafe
+"""
+
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import fsnav
+from fsnav import threadsafe
+
+
+class TestConcurrentAliases(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dirs = {}
+        for name in ('a', 'b', 'c'):
+            self.dirs[name] = os.path.join(self.tempdir, name)
+            os.mkdir(self.dirs[name])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_mapping(self):
+        aliases = threadsafe.ConcurrentAliases(self.dirs, home='~/')
+        self.assertEqual(4, len(aliases))
+        self.assertEqual(os.path.expanduser('~/'), aliases['home'])
+        self.assertEqual(self.dirs['a'], aliases.get('a'))
+        self.assertIsNone(aliases.get('missing'))
+        del aliases['home']
+        self.assertEqual(sorted(self.dirs), sorted(aliases))
+        self.assertEqual(self.dirs, aliases.as_dict())
+        self.assertIsInstance(aliases.to_aliases(), fsnav.Aliases)
+        self.assertEqual(self.dirs, aliases.copy().as_dict())
+        aliases.clear()
+        self.assertEqual(0, len(aliases))
+
+    def test_validation(self):
+        aliases = threadsafe.ConcurrentAliases()
+        with self.assertRaises(KeyError):
+            aliases['bad alias'] = self.dirs['a']
+        with self.assertRaises(ValueError):
+            aliases['a'] = os.path.join(self.tempdir, 'missing')
+
+    def test_atomic_update(self):
+        aliases = threadsafe.ConcurrentAliases(a=self.dirs['a'])
+        version = aliases.version
+        with self.assertRaises(ValueError):
+            aliases.update(b=self.dirs['b'], c=os.path.join(self.tempdir, 'missing'))
+        self.assertEqual({'a': self.dirs['a']}, aliases.as_dict())
+        self.assertEqual(version, aliases.version)
+
+    def test_patterns(self):
+        aliases = threadsafe.ConcurrentAliases(a=self.dirs['a'])
+        aliases.update({'dir-{name}': os.path.join(self.tempdir, '{name}')})
+
+        # Pattern aliases aren't part of the mapping, like Aliases()
+        self.assertNotIn('dir-{name}', aliases.snapshot())
+        self.assertEqual(['a'], list(aliases))
+        self.assertEqual(1, len(aliases))
+        self.assertEqual({'a': self.dirs['a']}, dict(aliases.items()))
+        self.assertEqual({'dir-{name}': os.path.join(self.tempdir, '{name}')}, aliases.patterns())
+        self.assertEqual(self.dirs['b'], aliases['dir-b'])
+        self.assertIn('dir-c', aliases)
+        self.assertIsNone(aliases.get('dir-missing'))
+        self.assertDictEqual(
+            {'dir-{name}': os.path.join(self.tempdir, '{name}')},
+            aliases.to_aliases().patterns())
+        self.assertEqual(self.dirs['c'], aliases.copy()['dir-c'])
+        del aliases['dir-{name}']
+        self.assertNotIn('dir-b', aliases)
+        self.assertEqual({}, aliases.patterns())
+
+    def test_snapshot(self):
+        aliases = threadsafe.ConcurrentAliases(self.dirs)
+        snapshot = aliases.snapshot()
+        del aliases['a']
+        self.assertIn('a', snapshot)
+        with self.assertRaises(TypeError):
+            snapshot['a'] = self.dirs['b']
+
+    def test_concurrent_readers(self):
+        aliases = threadsafe.ConcurrentAliases(a=self.dirs['a'])
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                snapshot = aliases.snapshot()
+                # Both aliases from an update are always visible together
+                if ('b' in snapshot) != ('c' in snapshot):
+                    errors.append(dict(snapshot))
+                for alias in aliases:
+                    aliases.get(alias)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for t in readers:
+            t.start()
+        for _ in range(200):
+            aliases.update(b=self.dirs['b'], c=self.dirs['c'])
+            aliases.clear()
+        stop.set()
+        for t in readers:
+            t.join()
+        self.assertEqual([], errors)
+
+
+if __name__ == '__main__':
+    unittest.main()